@@ -1,115 +1,103 @@
-import datetime
-from zoneinfo import ZoneInfo
-from google.adk.agents import Agent, ParallelAgent, SequentialAgent, LlmAgent
-from google.adk.tools import agent_tool, AgentTool
+from google.adk.agents import SequentialAgent, LlmAgent
 from google.adk.tools import google_search
-from .generaltools.generaltools import get_current_date
-from .lsegtools.tickhistory import getVWAP, getMarketPsycSentiment, getCompanyDetails, getSignificantEvents, getESGEnvIndicator, getESGGovIndicator, getESGSocIndicator
-from .generaltools.finhubtools import symbol_lookup
-from .config import config
-import google.auth
-
-from google.adk.tools.bigquery import BigQueryCredentialsConfig
-from google.adk.tools.bigquery import BigQueryToolset
-from google.adk.tools.bigquery.config import BigQueryToolConfig
-from google.adk.tools.bigquery.config import WriteMode
-
-# Define a tool configuration to block any write operations
-tool_config = BigQueryToolConfig(write_mode=WriteMode.BLOCKED)
-
-application_default_credentials, _ = google.auth.default()
-print(application_default_credentials)
-
-credentials_config = BigQueryCredentialsConfig(
-    credentials=application_default_credentials
-)
-
-# Instantiate a BigQuery toolset
-bigquery_toolset = BigQueryToolset(
-    credentials_config=credentials_config, bigquery_tool_config=tool_config
-)
+from .lsegtools.ricresolver import CachedRicAgentTool, RicLookup
+from .pipeline.deadlineparallel import DeadlineParallelAgent
+from .pipeline.fetchengine import FetchEngineAgent
+from .pipeline.modelrouting import install_latency_budgets, model_for
+from .pipeline.progressivereport import report_instruction
+from .pipeline.reportcompaction import compact_report_inputs
+from .pipeline.researchcontext import ResearchContextAgent, create_research_request_agent
+from .lsegtools.asynctickhistory import getVWAPBars, getSignificantEvents
 
 symbol_to_ric_agent = LlmAgent(
     name="symbol_to_ric_agent",
     # model="gemini-2.5-flash",
-    model=config.gemini_model,
+    model=model_for("symbol_to_ric_agent"),
     description=(
         "Agent to convert Company to RIC"
     ),
     instruction=(
-        "convert the Company name to the RIC code and return the ric code in the response"
+        "convert the Company name to the RIC code and return the ric code in the ric field of the response"
         "Get the RIC code for common stock traded on the London Stock Exchange (LSE)"
         "if the the company is Vodafone then the RIC is VOD.L"
         "if the the company is BT then the RIC is BT.L"
+        "leave the ric field empty if no RIC is found"
     ),
     tools=[google_search],
+    output_schema=RicLookup,
 )
 
+# One cached lookup shared by every agent, symbol_to_ric_agent only runs on a cache miss
+ric_lookup_tool = CachedRicAgentTool(agent=symbol_to_ric_agent)
+
 companynews_agent = LlmAgent(
     name="companynews_agent",
     # model="gemini-2.5-flash",
-    model=config.gemini_model,
+    model=model_for("companynews_agent"),
     description=(
         "Agent to get the company info for a list of company RICs"
     ),
     instruction=(
         "You are an investemnt helper agent that gets the company news for a company or set of companies."
-        "Make sure the news is for the time period requested by the user"
+        "Get the news for {companies} ({ric_list})"
+        "Make sure the news is for the period {start_date} to {end_date}"
         "Only look for verified news and not roumers"
         "use news from reputable sites and providers"
     ),
     tools=[google_search],
-    output_key="companynews_result"
+    output_key="companynews_result",
 )
 
 companyinfo_agent = LlmAgent(
     name="companyinfo_agent",
     # model="gemini-2.5-flash",
-    model=config.gemini_model,
+    model=model_for("companyinfo_agent"),
     description=(
         "Agent to get the company info for a list of company RICs"
     ),
     instruction=(
         "You are an investemnt helper agent that gets the company info for a stock or stocks via the RIC code."
-        "Use the symbol_to_ric_agent tool to first get the ric code and use it as input to the getCompanyDetails tool"
-        "You can send multiple RICs to the getCompanyDetails tool as well"
+        "The getCompanyDetails results for {ric_list} have already been retrieved, analyse them directly: {companyinfo_data}"
+        "{data_format}"
         "Return the company info with a formatted table in the repsonse that can be used in a report"
         "ignore any time duration when doing this analysis"
         "do not prompt the user, just return the company info in the repsonse"
     ),
-    tools=[AgentTool(agent=symbol_to_ric_agent), getCompanyDetails],
-    output_key="companyinfo_result"
+    output_key="companyinfo_result",
 )
 
 
 vwap_agent = LlmAgent(
     name="vwap_agent",
     # model="gemini-2.5-flash",
-    model=config.gemini_model,
+    model=model_for("vwap_agent"),
     description=(
         "Agent to get the VWAP for a list of stock RICs"
     ),
     instruction=(
         "You are an investemnt helper agent that gets the VWAP for a stock or stocks via the RIC code."
-        "Use the symbol_to_ric_agent tool to first get the ric code and use it as input to the getVWAP tool"
-        "You can sent multiple RICs to the getVWAP tool as well"
+        "The getVWAP results for {ric_list} have already been retrieved, analyse them directly: {vwap_data}"
+        "{data_format}"
+        "The results cover the period {start_date} to {end_date}"
         "Return the VWAP table in the repsonse and an analysis of the results"
+        "If the user asks about intraday moves, use the getVWAPBars tool to get intraday OHLC and VWAP bars, it may use a coarser bucket than requested for long windows"
     ),
-    tools=[AgentTool(agent=symbol_to_ric_agent), get_current_date, getVWAP],
-    output_key="vwap_result"
+    tools=[getVWAPBars],
+    output_key="vwap_result",
 )
 
 marketpsycsentiment_agent = LlmAgent(
     name="marketpsycsentiment_agent",
     # model="gemini-2.5-flash",
-    model=config.gemini_model,
+    model=model_for("marketpsycsentiment_agent"),
     description=(
         "Agent to get the market sentiment for a list of stock RICs"
     ),
     instruction=(
         "You are an investemnt helper agent that gets the sentiment for a stock or stocks via the RIC code."
-        "Use the symbol_to_ric_agent tool to first get the ric code and use it as input to the getMarketPsycSentiment tool"
-        "You can sent multiple RICs to the getMarketPsycSentiment tool as well"
+        "The getMarketPsycSentiment results for {ric_list} have already been retrieved, analyse them directly: {marketpsycsentiment_data}"
+        "{data_format}"
+        "The results cover the period {start_date} to {end_date}"
         "Return the sentiment table in the repsonse and an analysis of the results"
         "The values for these fields are typically float type and represent a metric derived from content analysis." 
         "Fields marked with (Range: -1 to 1) are bipolar, representing a net balance of positive vs. negative references." 
@@ -119,97 +107,98 @@ marketpsycsentiment_agent = LlmAgent(
         "Contextualize: For any company showing low Trust or high Anger/Fear, cross-reference these findings with other risk-related fields in the same table, such as DebtDefault, Litigation, or MgmtTrust to identify potential drivers of the negative sentiment."
         "Do not generate code, just analyse the data directly"
     ),
-    tools=[AgentTool(agent=symbol_to_ric_agent), get_current_date, getMarketPsycSentiment],
-    output_key="marketpsycsentiment_result"
+    output_key="marketpsycsentiment_result",
 )
 
 significantevent_agent = LlmAgent(
     name="significantevent_agent",
     # model="gemini-2.5-flash",
-    model=config.gemini_model,
+    model=model_for("significantevent_agent"),
     description=(
         "Agent to get the significant events for a list of stock RICs"
     ),
     instruction=(
         "You are an investemnt helper agent that gets the significant events for a stock or stocks via the RIC code."
-        "Use the symbol_to_ric_agent tool to first get the ric code and use it as input to the getSignificantEvents tool"
-        "You can sent multiple RICs to the getSignificantEvents tool as well"
+        "The getSignificantEvents results for {ric_list} have already been retrieved, analyse them directly: {significantevent_data}"
+        "{data_format}"
+        "The results cover the period {start_date} to {end_date}"
         "Return the details of significant events in the repsonse and an analysis of the results"
+        "getSignificantEvents returns the most recent events first, one page at a time. Only if you need older events, call it again with the returned next_page_token as page_token"
     ),
-    tools=[AgentTool(agent=symbol_to_ric_agent), get_current_date, getSignificantEvents],
-    output_key="significantevent_result"
+    tools=[getSignificantEvents],
+    output_key="significantevent_result",
 )
 
 esgenvindicator_agent = LlmAgent(
     name="esgenvindicator_agent",
     # model="gemini-2.5-flash",
-    model=config.gemini_model,
+    model=model_for("esgenvindicator_agent"),
     description=(
         "Agent to get the ESG Environmental Indicators for a list of stock RICs"
     ),
     instruction=(
         "You are an investemnt helper agent that gets the ESG Environmental Indicators for a stock or stocks via the RIC code."
-        "Use the symbol_to_ric_agent tool to first get the ric code and use it as input to the getESGEnvIndicator tool"
-        "You can sent multiple RICs to the getESGEnvIndicator tool as well"
+        "The getESGEnvIndicator results for {ric_list} have already been retrieved, analyse them directly: {esgenvindicator_data}"
+        "{data_format}"
         "Return the details of ESG Environmental Indicator in the repsonse and an analysis of the results"
-        "getESGEnvIndicator tool requires the fyscal year (as a interger) as input."
         "Do not generate code, just analyse the data directly"
-        "ignore any time duration from the pompt when doing this analysis, just use the current fiscal year based on the users input and get_current_date"
-        "If you are unsure about the year, use 2025"
-        "Make sure your run the getESGGovIndicator tool with the year 2025 regard if you are unable to do anything"
-        "Regardless of the request duration use the current year 2025 and call the tool: getESGGovIndicator"
+        "The results are for the fiscal year {fiscal_year}, ignore any time duration from the pompt when doing this analysis"
     ),
-    tools=[AgentTool(agent=symbol_to_ric_agent), get_current_date, getESGEnvIndicator],
-    output_key="esgenvindicator_result"
+    output_key="esgenvindicator_result",
 )
 
 esggovindicator_agent = LlmAgent(
     name="esggovindicator_agent",
     # model="gemini-2.5-flash",
-    model=config.gemini_model,
+    model=model_for("esggovindicator_agent"),
     description=(
         "Agent to get the ESG Gov Indicators for a list of stock RICs"
     ),
     instruction=(
         "You are an investemnt helper agent that gets the ESG Gov Indicators for a stock or stocks via the RIC code."
-        "Use the symbol_to_ric_agent tool to first get the ric code and use it as input to the getESGGovIndicator tool"
-        "You can sent multiple RICs to the getESGGovIndicator tool as well"
+        "The getESGGovIndicator results for {ric_list} have already been retrieved, analyse them directly: {esggovindicator_data}"
+        "{data_format}"
         "Return the details of ESG Gov Indicator in the repsonse and an analysis of the results"
-        "getESGGovIndicator tool requires the fyscal year (as a interger) as input. "
         "Do not generate code, just analyse the data directly"
-        "ignore any time duration from the pompt when doing this analysis, just use the current fiscal year based on the users input and get_current_date"
-        "If you are unsure about the year, use 2025"
-        "Make sure your run the getESGGovIndicator tool with the current year if you are unable to do anything"
-        "Regardless of the request duration use the current year 2025 and call the tool: getESGGovIndicator"
+        "The results are for the fiscal year {fiscal_year}, ignore any time duration from the pompt when doing this analysis"
     ),
-    tools=[AgentTool(agent=symbol_to_ric_agent), get_current_date, getESGGovIndicator],
-    output_key="esggovindicator_result"
+    output_key="esggovindicator_result",
 )
 
 esgsocindicator_agent = LlmAgent(
     name="esgsocindicator_agent",
     # model="gemini-2.5-flash",
-    model=config.gemini_model,
+    model=model_for("esgsocindicator_agent"),
     description=(
         "Agent to get the ESG Soc Indicators for a list of stock RICs"
     ),
     instruction=(
         "You are an investemnt helper agent that gets the ESG Soc Indicators for a stock or stocks via the RIC code."
-        "Use the symbol_to_ric_agent tool to first get the ric code and use it as input to the getESGSocIndicator tool"
-        "You can sent multiple RICs to the getESGSocIndicator tool as well"
+        "The getESGSocIndicator results for {ric_list} have already been retrieved, analyse them directly: {esgsocindicator_data}"
+        "{data_format}"
         "Return the details of ESG Soc Indicator in the repsonse and an analysis of the results"
-        "getESGSocIndicator tool requires the fyscal year (as a interger) as input. "
         "Do not generate code, just analyse the data directly"
-        "ignore any time duration from the pompt when doing this analysis, just use the current fiscal year based on the users input date and get_current_date"
-        "If you are unsure about the year, use 2025"
-        "Make sure your run the getESGGovIndicator tool with the current year if you are unable to do anything"
-        "Regardless of the request duration use the current year 2025 and call the tool: getESGGovIndicator"
+        "The results are for the fiscal year {fiscal_year}, ignore any time duration from the pompt when doing this analysis"
     ),
-    tools=[AgentTool(agent=symbol_to_ric_agent), get_current_date, getESGSocIndicator],
-    output_key="esgsocindicator_result"
+    output_key="esgsocindicator_result",
+)
+
+# Resolve the companies and the period once and publish them into session state for the data agents
+research_request_agent = create_research_request_agent()
+
+research_context_agent = ResearchContextAgent(
+    name="research_context_agent",
+    description="Resolves the RICs and the date window once and publishes them into session state",
+    ric_tool=ric_lookup_tool,
+)
+
+# Run the LSEG tool calls concurrently without LLM turns, the data agents below only analyse the results
+data_fetch_agent = FetchEngineAgent(
+    name="data_fetch_agent",
+    description="Runs the LSEG data queries concurrently and stores the results in session state",
 )
 
-data_retrieval_agent = ParallelAgent(
+data_retrieval_agent = DeadlineParallelAgent(
     name="data_retrieval_agent",
     # model="gemini-2.5-flash",
     description=(
@@ -228,32 +217,18 @@ data_retrieval_agent = ParallelAgent(
 )
 
 
-report_creation_agent = LlmAgent(
-    name="report_creation_agent",
-    # model="gemini-2.5-flash",
-    model=config.gemini_model,
-    description=(
-        "You are an agent helping an investment analyst create a report on an asset or stock"
-    ),
-    instruction=(
+REPORT_INSTRUCTION = (
         """
         Your primary task is to synthesize the following research summaries, clearly attributing findings to their source areas. Structure your response using headings for each topic. Ensure the report is coherent and integrates the key points smoothly.
         **Crucially: Your entire response MUST be grounded *exclusively* on the information provided in the 'Input Summaries' below. Do NOT add any external knowledge, facts, or details not present in these specific summaries.**
          **Input Summaries:**
-            {companyinfo_result}
-            {vwap_result}
-            {marketpsycsentiment_result}
-            {significantevent_result}
-            {esgenvindicator_result}
-            {esggovindicator_result}
-            {esgsocindicator_result}
-            {companynews_result}
-
-    In the analysis always add a section at the end to correlate the VAWP Result {vwap_result} with the news data {marketpsycsentiment_result} and explain how the news impacts the vwap
-    Also include details from {significantevent_result}, {esgenvindicator_result}, {esgsocindicator_result}, {companynews_result},and {esggovindicator_result} in the correlations as well.
+            {report_inputs}
+
+    In the analysis always add a section at the end to correlate the VWAP section with the Market Sentiment section and explain how the news impacts the vwap
+    Also include details from the Significant Events, ESG Environmental, ESG Social, ESG Governance and Company News sections in the correlations as well.
     Make sure the entire report output is professionally formated in markdown. 
         **Comprehensive Report:** Your report should be comprehensive, detailes
-        Start with a seciton detailing the company info as stated in {companyinfo_result}. Format it nicely as a table with all the detail and some infrered metrics.
+        Start with a seciton detailing the company info as stated in the Company Info section. Format it nicely as a table with all the detail and some infrered metrics.
 
 
                         **4. Data Handling and Error Management:**
@@ -265,7 +240,35 @@ report_creation_agent = LlmAgent(
                         **5. Analytical Perspective:**
 
                         *   **Asset Management Lens:** Conduct all analysis with an asset manager's perspective in mind. Evaluate the company as a potential investment, focusing on risk, return, and long-term prospects."""
-    )
+)
+
+# In progressive mode the data sections have already been shown to the user as each data agent completed
+PROGRESSIVE_REPORT_INSTRUCTION = (
+        """
+        The research sections below have already been shown to the user one by one as they completed. Do not repeat them.
+        Your task is to write only the closing part of the report: a short executive summary followed by a section correlating the findings.
+        **Crucially: Your entire response MUST be grounded *exclusively* on the information provided in the 'Input Summaries' below. Do NOT add any external knowledge, facts, or details not present in these specific summaries.**
+         **Input Summaries:**
+            {report_inputs}
+
+    In the correlation section correlate the VWAP section with the Market Sentiment section and explain how the news impacts the vwap
+    Also include details from the Significant Events, ESG Environmental, ESG Social, ESG Governance and Company News sections in the correlations as well.
+    Make sure the output is professionally formated in markdown.
+
+                        *   **Asset Management Lens:** Conduct all analysis with an asset manager's perspective in mind. Evaluate the company as a potential investment, focusing on risk, return, and long-term prospects."""
+)
+
+report_creation_agent = LlmAgent(
+    name="report_creation_agent",
+    # model="gemini-2.5-flash",
+    model=model_for("report_creation_agent"),
+    description=(
+        "You are an agent helping an investment analyst create a report on an asset or stock"
+    ),
+    before_agent_callback=compact_report_inputs,
+    instruction=report_instruction(REPORT_INSTRUCTION, PROGRESSIVE_REPORT_INSTRUCTION),
+    # the sections come once, compacted, through {report_inputs} rather than again from the conversation
+    include_contents="none",
 )
 
 sequential_agent = SequentialAgent(
@@ -273,13 +276,13 @@ sequential_agent = SequentialAgent(
     description=(
         "you are the agent that runs the process for collecting the data and creating the report"
     ),
-    sub_agents=[data_retrieval_agent, report_creation_agent]
+    sub_agents=[research_request_agent, research_context_agent, data_fetch_agent, data_retrieval_agent, report_creation_agent]
 )
 
 root_agent = LlmAgent(
     name="investment_agent",
     # model="gemini-2.5-flash",
-    model=config.gemini_model,
+    model=model_for("investment_agent"),
     description=(
         "You are an agent helping an investment analyst at an asset manager"
     ),
@@ -301,16 +304,11 @@ root_agent = LlmAgent(
                         **1. RIC Identification and Lookup:**
 
                         *   **Primary RIC Focus:** When multiple RICs exist for a company, prioritize the *primary* RIC on the LSE market.
-                        *   **Mandatory symbol_to_ric_agent tool Lookup:** Before executing any other functions, always use the `symbol_to_ric_agent` function to identify and confirm the correct primary RIC for the company or companies under analysis. Do not proceed without a successful lookup.
-                        *   **Handle Lookup Failures:** If `symbol_to_ric_agent` fails to identify a symbol, inform the user and gracefully end the analysis.
+                        *   **RIC Lookup:** Do not look up RICs yourself. The sequential_agent resolves the primary RICs for the companies the user asks about once, before any data is retrieved, and shares them with every sub agent.
 
                         **2. Date Handling:**
 
-                        *   **Current Date Determination:** Use the `get_current_date` function to obtain the current date at the beginning of each analysis. This date is critical for subsequent time-sensitive operations.
-                        *   **Default Year Range:** If a function call requires a date range and the user has not supplied one, calculate the start and end dates for the *current year* using the date obtained from `current_date`. Use these as the default start and end dates in the relevant function calls.
-                        *   Make sure you get the date and calculate the start and end date based on the current date if the prompt asks.
-                        If the prompt already mentions a start and end date then use it.
-                        Do not generate code to handle date, use the the get_current_date tool to do the date calculation.
+                        *   **Analysis Period:** Do not calculate dates yourself. The sequential_agent works out the start and end date from the user's request once, defaulting to the *current year* to date when the user has not supplied a period.
 
                         **3. Analysis Components:**
 
@@ -330,12 +328,10 @@ root_agent = LlmAgent(
 
                         **Example Workflow (Implicit):**
 
-                        1.  Get the current date using `get_current_date`.
-                        2.  Use `symbol_to_ric_agent` to identify the primary RICs for the company provided by the user.
-                        3.  If no RIC is found, end the process and report back.
-                        4.  Calculate the start and end date by using the result of the get_current_date tool.
-                        5.  Call the data_retrieval_agent retrieve the company_profile_agent, company_news_agent, company_basic_financials_agent, insider_sentiment_agent, financials_reported_agent, and sec_filings_agent, news, financials, insider sentiment, and SEC filings. Use the current year start and end date when required, or the date specified by the user.
-                        6.  Assemble a detailed and insightful report that addresses each of the sections mentioned above using report_creation_agent.
+                        1.  Transfer the user's request to the sequential_agent. It resolves the RICs and the analysis period once.
+                        2.  The sequential_agent then calls the data_retrieval_agent to retrieve the company info, VWAP, sentiment, significant events, ESG indicators and news for those RICs and that period.
+                        3.  If no RIC is found, report back.
+                        4.  Assemble a detailed and insightful report that addresses each of the sections mentioned above using report_creation_agent.
                         
                         "Make sure you run all the sub agents" 
                         "Use the report_creation_agent to create a report on the investment and return it"
@@ -343,12 +339,13 @@ root_agent = LlmAgent(
                         "report_creation_agent should be called right at the end of the analysis to create the final report."
                         Always call report_creation_agent at the end of the analysis.
 
-                        Make sure you get convert the company name to RIC using the symbol_to_ric_agent. Do this first always.
-
                         """
 
     ),
-    tools=[get_current_date],
     # sub_agents=[symbol_lookup_agent, data_retrieval_agent, report_creation_agent]
     sub_agents=[sequential_agent]
-)
\ No newline at end of file
+)
+
+# Latency budgets and model fallback for every LLM agent, see config.agent_latency_budgets
+install_latency_budgets(root_agent)
+install_latency_budgets(symbol_to_ric_agent)
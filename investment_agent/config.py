@@ -1,5 +1,6 @@
 import os
-from dataclasses import dataclass
+import tempfile
+from dataclasses import dataclass, field
 
 
 @dataclass
@@ -10,8 +11,177 @@ class ResearchConfiguration:
     gemini_flash_model: str = "gemini-2.5-flash"
     gemini_pro_model: str = "gemini-2.5-pro"
     gemini_model: str = "gemini-2.5-flash"
+    gemini_lite_model: str = "gemini-2.5-flash-lite"
+
+    # Model of each agent, agents not listed use gemini_model; the defaults are filled in
+    # from the gemini_*_model fields above in __post_init__
+    agent_models: dict = field(default_factory=dict)
+    # Latency budget of each agent in seconds, agents not listed have no budget
+    agent_latency_budgets: dict = field(default_factory=lambda: {
+        "symbol_to_ric_agent": 10,
+        "research_request_agent": 10,
+        "companyinfo_agent": 20,
+        "esgenvindicator_agent": 20,
+        "esggovindicator_agent": 20,
+        "esgsocindicator_agent": 20,
+        "companynews_agent": 30,
+        "vwap_agent": 30,
+        "marketpsycsentiment_agent": 30,
+        "significantevent_agent": 30,
+        "report_creation_agent": 90,
+    })
+    # The faster model a call falls back to once its agent is over budget
+    model_fallbacks: dict = field(default_factory=lambda: {
+        "gemini-2.5-pro": "gemini-2.5-flash",
+        "gemini-2.5-flash": "gemini-2.5-flash-lite",
+    })
+    # How long an agent stays on its fallback model after a run over budget, in seconds
+    model_fallback_cooldown: int = 600
+    # Seconds after which the budget clock of an agent that never finished (cancelled) is dropped
+    latency_clock_max_age: int = 3600
+    # Hard deadline of each data agent in seconds, after which it is cancelled and its report
+    # section marked unavailable; bounds the data retrieval stage by the longest deadline
+    agent_deadlines: dict = field(default_factory=lambda: {
+        "companynews_agent": 45,
+    })
+    default_agent_deadline: float = 60.0
+
+    # BigQuery execution for the LSEG tools
+    bigquery_max_workers: int = 8
+    # Read results as Arrow record batches (Storage Read API when installed) instead of DataFrames
+    bigquery_arrow_fetch: bool = True
+    # Tool calls the fetch engine runs at the same time
+    fetch_max_concurrency: int = 8
+    # Seconds a fetch may run before its data is reported unavailable
+    fetch_deadline: float = 60.0
+
+    # Async tools: concurrent calls per backend and the BigQuery job polling interval (seconds, doubling)
+    bigquery_async_concurrency: int = 16
+    bigquery_poll_interval: float = 0.25
+    bigquery_max_poll_interval: float = 2.0
+    finnhub_async_concurrency: int = 8
+    finnhub_timeout: float = 30.0
+
+    # Finnhub client: API root (point it at a stub server for tests), the plan's rate limit with
+    # its burst size, connection pool size and retries of 429/5xx responses (backoff in seconds)
+    finnhub_base_url: str = "https://finnhub.io/api/v1"
+    finnhub_calls_per_minute: int = 60
+    finnhub_burst: int = 10
+    finnhub_pool_size: int = 16
+    finnhub_max_retries: int = 4
+    finnhub_backoff_base: float = 0.5
+    finnhub_backoff_max: float = 30.0
+
+    # TTL cache of the Finnhub lookups per tool in seconds, kept in "memory" or also in a "sqlite" file
+    finnhub_cache_enabled: bool = True
+    finnhub_cache_ttls: dict = field(default_factory=lambda: {
+        "symbol_lookup": 7 * 24 * 3600,
+        "company_profile": 24 * 3600,
+        "company_basic_financials": 24 * 3600,
+        "insider_sentiment": 24 * 3600,
+        "financials_reported": 7 * 24 * 3600,
+    })
+    finnhub_cache_backend: str = "memory"
+    finnhub_cache_max_entries: int = 512
+    finnhub_cache_path: str = os.path.join(tempfile.gettempdir(), "marketmind", "finnhub.sqlite")
+
+    # SEC filing pages: concurrent downloads and (connect, read) timeout in seconds
+    filing_max_concurrency: int = 8
+    filing_timeout: tuple = (5, 30)
+    # Filing text extraction: backend ("auto", "selectolax", "lxml" or "bs4"), bytes read of each
+    # page and the sections kept, e.g. ["mdna", "risk_factors"] (empty keeps the whole text)
+    text_extractor: str = "auto"
+    filing_max_bytes: int = 5 * 1024 * 1024
+    filing_sections: list = field(default_factory=list)
+    # On-disk store of the fetched filing texts, least recently read ones evicted past the size limit
+    filing_store_dir: str = os.path.join(tempfile.gettempdir(), "marketmind", "filings")
+    filing_store_max_bytes: int = 512 * 1024 * 1024
+    # Passage index over filings and news: passage size and overlap in characters, the most passages
+    # search_passages returns, the documents kept, and the filing text sec_filings returns (0 for the
+    # whole text, only set a limit for agents that also have the search_passages tool)
+    passage_chars: int = 800
+    passage_overlap: int = 150
+    passage_max_results: int = 20
+    passage_index_max_documents: int = 500
+    filing_report_max_chars: int = 0
+
+    # Result cache in front of the tickhistory tools (TTLs in seconds)
+    result_cache_enabled: bool = True
+    result_cache_max_entries: int = 256
+    result_cache_dir: str = os.path.join(tempfile.gettempdir(), "marketmind", "results")
+    result_cache_max_disk_bytes: int = 256 * 1024 * 1024
+    result_cache_historical_ttl: int = 30 * 24 * 3600
+    result_cache_live_ttl: int = 15 * 60
+    result_cache_reference_ttl: int = 24 * 3600
+    # RICs whose daily VWAP aggregates are kept in memory, least recently used ones evicted
+    vwap_store_max_rics: int = 1000
+
+    # Fetch the Env/Gov/Soc ESG pillars with one UNION'd query and share it between the tools
+    esg_combined_fetch: bool = True
+    # Seconds the split pillars stay in memory for the sibling tools, whether or not the result cache is on
+    esg_pillars_hold_seconds: int = 300
+    # ESG fiscal year the data agents analyse, 0 for the year before the end of the research period
+    # (the latest year the ESG tables have reported figures for)
+    esg_fiscal_year: int = 0
+
+    # Encoding of the tickhistory reports: "columns", "csv" or the legacy "json"
+    result_encoding: str = "columns"
+    result_float_digits: int = 4
+
+    # Row cap per page for getSignificantEvents and getCompanyDetails
+    tool_page_size: int = 50
+    tool_max_page_size: int = 500
+    # Default columns of getCompanyDetails (company_info_RKDFndCmpDet) and getSignificantEvents
+    # (rkdcmpsigdev). They are checked against the live table schema: when any is missing, the ones
+    # that exist come first, followed by the table's other columns except the large ones and those
+    # listed in projection_excluded_columns
+    company_details_columns: list = field(default_factory=lambda: [
+        "code", "compname", "busdesc", "country", "sector", "industry", "employees", "website", "exchange", "currency",
+    ])
+    significant_events_columns: list = field(default_factory=lambda: [
+        "ric", "srcdt", "initdt", "lastupdt", "headline", "brief", "significance", "topic",
+    ])
+    projection_excluded_columns: list = field(default_factory=list)
+
+    # Intraday bars: row budget for getVWAPBars and the LSE continuous trading session length
+    bars_max_rows: int = 2000
+    trading_minutes_per_day: int = 510
+
+    # Token budget of the data sections report_creation_agent reads, estimated from their length
+    report_input_token_budget: int = 24000
+    report_chars_per_token: int = 4
+
+    # The data sections reach the user as each agent completes; in progressive mode the report agent
+    # then only writes the summary and correlation sections instead of repeating them
+    progressive_report: bool = False
+
+    # Company name -> RIC cache shared by the agents, in front of symbol_to_ric_agent, and the seconds
+    # before a failed seed from the LSEG company info table is retried
+    ric_cache_path: str = os.path.join(tempfile.gettempdir(), "marketmind", "rics.json")
+    ric_seed_retry_seconds: int = 300
+
+    # `import investment_agent` may take at most this many times as long as importing the modules it
+    # depends on, both timed in fresh interpreters on the same machine, see importaudit.py
+    import_time_budget_ratio: float = 1.4
+
+    def __post_init__(self):
+        lite, flash, pro = self.gemini_lite_model, self.gemini_flash_model, self.gemini_pro_model
+        self.agent_models = {
+            "symbol_to_ric_agent": lite,
+            "research_request_agent": lite,
+            "companyinfo_agent": lite,
+            "esgenvindicator_agent": lite,
+            "esggovindicator_agent": lite,
+            "esgsocindicator_agent": lite,
+            "companynews_agent": flash,
+            "vwap_agent": flash,
+            "marketpsycsentiment_agent": flash,
+            "significantevent_agent": flash,
+            "report_creation_agent": pro,
+            "investment_agent": flash,
+            **self.agent_models,
+        }
 
-    
 
 
 config = ResearchConfiguration()
\ No newline at end of file
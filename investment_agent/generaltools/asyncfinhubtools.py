@@ -0,0 +1,285 @@
+"""Async versions of the Finnhub tools.
+
+They call the Finnhub REST API through AsyncFinnhubClient, which shares the paths,
+rate limiter, retry policy and counters of FinnhubClient but sends the requests
+over an aiohttp session, and return the same results as the tools in
+finhubtools.py. Each event loop gets its own session, closed when the loop shuts
+down, with at most config.finnhub_async_concurrency API requests and
+config.filing_max_concurrency filing downloads in flight.
+"""
+import asyncio
+import logging
+import threading
+import weakref
+
+import aiohttp
+
+from ..config import config
+from . import filingstore, helpercode, passageindex, textextract
+from .filingfetch import dedupe_filings
+from .finhubtools import get_finnhub_client
+from .finnhubcache import cached_endpoint
+from .finnhubclient import RETRY_STATUS_CODES, FinnhubClient
+
+logger = logging.getLogger("MarketMind")
+
+# aiohttp negotiates the content encodings it can decode itself
+FILING_REQUEST_HEADERS = {name: value for name, value in helpercode.REQUEST_HEADERS.items()
+                          if name != "accept-encoding"}
+
+
+class _LoopSession:
+    """The aiohttp session of one event loop and its API and filing download limits."""
+
+    def __init__(self):
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=config.finnhub_async_concurrency + config.filing_max_concurrency),
+            timeout=aiohttp.ClientTimeout(total=config.finnhub_timeout),
+        )
+        self.api_limit = asyncio.Semaphore(config.finnhub_async_concurrency)
+        self.filing_limit = asyncio.Semaphore(config.filing_max_concurrency)
+        self.closer = None
+
+
+_loop_sessions = weakref.WeakKeyDictionary()
+
+
+async def _close_with_loop(loop_ref: weakref.ref, session: aiohttp.ClientSession):
+    # the loop closes its suspended async generators on shutdown (asyncio.run does), closing the session;
+    # the loop is held weakly so the generator doesn't keep its own _loop_sessions key alive
+    try:
+        yield
+    finally:
+        loop = loop_ref()
+        if loop is not None:
+            _loop_sessions.pop(loop, None)
+        await session.close()
+
+
+async def _get_loop_session() -> _LoopSession:
+    """Returns the session of the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    # the session references its loop, so the entry of a loop closed without shutting down
+    # its async generators (its closer never ran) would outlive the loop, drop it here
+    for closed in [other for other in _loop_sessions if other.is_closed()]:
+        del _loop_sessions[closed]
+    state = _loop_sessions.get(loop)
+    if state is None or state.session.closed:
+        state = _LoopSession()
+        state.closer = _close_with_loop(weakref.ref(loop), state.session)
+        await state.closer.__anext__()
+        _loop_sessions[loop] = state
+    return state
+
+
+class AsyncFinnhubClient(FinnhubClient):
+    """FinnhubClient whose endpoint methods return coroutines, sent with aiohttp."""
+
+    def _create_session(self) -> None:
+        # requests go through the aiohttp session of the running loop instead
+        return None
+
+    async def _get(self, path: str, **params):
+        url, params = self._prepare(path, params)
+        state = await _get_loop_session()
+        for attempt in range(config.finnhub_max_retries + 1):
+            wait = self.limiter.reserve()
+            self._count("limiter_wait_seconds", wait)
+            await asyncio.sleep(wait)
+            self._count("requests")
+            try:
+                async with state.api_limit:
+                    async with state.session.get(url, params=params) as response:
+                        if response.status not in RETRY_STATUS_CODES:
+                            if not response.ok:
+                                self._count("failures")
+                            response.raise_for_status()
+                            return await response.json()
+                        delay = self._retry_delay(path, attempt, response.status, response.headers.get("Retry-After"))
+                        if delay is None:
+                            response.raise_for_status()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                delay = self._retry_delay(path, attempt, error=e)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def _create_client() -> AsyncFinnhubClient:
+    global _client
+    with _client_lock:
+        if _client is None:
+            # the API key is read from Secret Manager once, for the sync and the async tools
+            _client = AsyncFinnhubClient(api_key=get_finnhub_client().api_key)
+        return _client
+
+
+async def get_async_client() -> AsyncFinnhubClient:
+    """Returns the shared AsyncFinnhubClient, created in a thread on first use."""
+    return _client or await asyncio.to_thread(_create_client)
+
+
+async def _read_capped(response: aiohttp.ClientResponse) -> bytes:
+    chunks = []
+    size = 0
+    async for chunk in response.content.iter_chunked(64 * 1024):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= config.filing_max_bytes:
+            logger.info(f"{response.url}: truncated at {config.filing_max_bytes} bytes")
+            break
+    return b"".join(chunks)[:config.filing_max_bytes]
+
+
+async def _get_text(url: str) -> str:
+    state = await _get_loop_session()
+    connect_timeout, read_timeout = config.filing_timeout
+    timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+    try:
+        async with state.filing_limit:
+            async with state.session.get(url, headers=FILING_REQUEST_HEADERS, timeout=timeout) as response:
+                response.raise_for_status()
+                content = await _read_capped(response)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.warning(f"Error fetching URL: {e}")
+        return ""
+    # parsing is CPU bound, keep it off the event loop
+    return await asyncio.to_thread(textextract.extract_text, content, [])
+
+
+@cached_endpoint
+async def symbol_lookup(company_name: str) -> dict:
+    """Does a lookup on a compay name to get its trading symbol
+
+    Args:
+        company_name (str): The name of the company whoes symbol is being looked up.
+
+    Returns:
+        dict: status and result or error msg.
+    """
+    return {
+        "status": "success",
+        "report": await (await get_async_client()).symbol_lookup(company_name),
+    }
+
+async def company_news(symbol: str, start_date: str, end_date: str) -> dict:
+    """Does a search of company news between the start date and the end date supplied
+
+    Args:
+        symbol (str): The stock symbol of the company being looked up for financial news.
+        start_date (str): The date from which to start search for news.
+        end_date (str): The date from whcih to end searching for news.
+
+    Returns:
+        dict: status and result or error msg.
+    """
+    news = await (await get_async_client()).company_news(symbol, _from=start_date, to=end_date)
+    await asyncio.to_thread(passageindex.index_news, symbol, news)
+    return {
+        "status": "success",
+        "report": news,
+    }
+
+@cached_endpoint
+async def company_profile(symbol: str) -> dict:
+    """Retrieves the company profile for the symbol specified
+
+    Args:
+        symbol (str): The stock symbol of the company being looked up for Company Profile.
+
+    Returns:
+        dict: status and result or error msg.
+    """
+    return {
+        "status": "success",
+        "report": await (await get_async_client()).company_profile2(symbol=symbol),
+    }
+
+@cached_endpoint
+async def company_basic_financials(symbol: str) -> dict:
+    """Retrieves the company financials for the symbol specified
+
+    Args:
+        symbol (str): The stock symbol of the company being looked up for company basic financials.
+
+    Returns:
+        dict: status and result or error msg.
+    """
+    return {
+        "status": "success",
+        "report": await (await get_async_client()).company_basic_financials(symbol, 'all'),
+    }
+
+@cached_endpoint
+async def insider_sentiment(symbol: str, start_date: str, end_date: str) -> dict:
+    """Retrieves the insider sentiment for the symbol specified
+
+    Args:
+        symbol (str): The stock symbol of the company being looked up for Insider Sentiment.
+        start_date (str): The date from which to start search for news.
+        end_date (str): The date from whcih to end searching for news.
+
+    Returns:
+        dict: status and result or error msg.
+    """
+    return {
+        "status": "success",
+        "report": await (await get_async_client()).stock_insider_sentiment(symbol, start_date, end_date),
+    }
+
+@cached_endpoint
+async def financials_reported(symbol: str) -> dict:
+    """Retrieves the financials reported for the symbol specified
+
+    Args:
+        symbol (str): The stock symbol of the company being looked up for financials reported.
+
+    Returns:
+        dict: status and result or error msg.
+    """
+    return {
+        "status": "success",
+        "report": await (await get_async_client()).financials_reported(symbol=symbol),
+    }
+
+async def sec_filings(symbol: str, start_date: str, end_date: str) -> dict:
+    """Retrieves the sec filings for the symbol specified
+
+    Args:
+        symbol (str): The stock symbol of the company being looked up for Sec Filings.
+        start_date (str): The date from which to start search for news.
+        end_date (str): The date from whcih to end searching for news.
+
+    Returns:
+        dict: status and result or error msg.
+    """
+    secfilings = await (await get_async_client()).filings(symbol=symbol, _from=start_date, to=end_date)
+    filings = dedupe_filings([filing for filing in secfilings if filing['form'] in ['10-Q', '8-K']])
+    store = filingstore.get_filing_store()
+    texts = await asyncio.to_thread(store.get_texts, [filing['accessNumber'] for filing in filings])
+    missing = [filing for filing in filings if filing['accessNumber'] not in texts]
+    fetched = await asyncio.gather(*(_get_text(filing['reportUrl']) for filing in missing))
+    for filing, text in zip(missing, fetched):
+        if text:
+            await asyncio.to_thread(store.put, symbol, filing, text)
+            texts[filing['accessNumber']] = text
+    for filing in filings:
+        if filing['accessNumber'] in texts:
+            await asyncio.to_thread(passageindex.index_filing, symbol, filing, texts[filing['accessNumber']])
+    parsed_filings = [{"accessNumber": filing['accessNumber'],
+                       "symbol": symbol,
+                       "filedDate": filing['filedDate'],
+                       "report": passageindex.filing_preview(
+                           textextract.select_sections(texts.get(filing['accessNumber'], ""), config.filing_sections))}
+                      for filing in filings]
+
+    return {
+        "status": "success",
+        "report": (
+            parsed_filings
+        ),
+    }
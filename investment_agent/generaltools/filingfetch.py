@@ -0,0 +1,85 @@
+"""Concurrent fetching of SEC filing pages for the sec_filings tool.
+
+Filings are de-duplicated by accessNumber and reportUrl, then downloaded over one
+pooled requests.Session by at most config.filing_max_concurrency threads, with
+config.filing_timeout on every request and at most config.filing_max_bytes read
+of each page. Texts are kept by the filing store, which the tools check first, so
+each page is only fetched once.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ..config import config
+from . import helpercode, textextract
+
+logger = logging.getLogger("MarketMind")
+
+_session = None
+_pool = None
+_lock = threading.Lock()
+_stats = {"fetched": 0, "errors": 0, "duplicates": 0}
+
+
+def _get_session() -> requests.Session:
+    global _session, _pool
+    with _lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.headers.update(helpercode.REQUEST_HEADERS)
+            adapter = HTTPAdapter(pool_connections=config.filing_max_concurrency,
+                                  pool_maxsize=config.filing_max_concurrency)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+            _pool = ThreadPoolExecutor(max_workers=config.filing_max_concurrency, thread_name_prefix="filings")
+        return _session
+
+
+def dedupe_filings(filings: list) -> list:
+    """Returns the filings without repeated accessNumber or reportUrl entries, keeping the first."""
+    seen_numbers, seen_urls = set(), set()
+    unique = []
+    for filing in filings:
+        number, url = filing.get("accessNumber"), filing.get("reportUrl")
+        if number in seen_numbers or url in seen_urls:
+            with _lock:
+                _stats["duplicates"] += 1
+            continue
+        seen_numbers.add(number)
+        seen_urls.add(url)
+        unique.append(filing)
+    return unique
+
+
+def fetch_filing_text(url: str) -> str:
+    """Returns the text of a filing page, or "" when it can't be fetched."""
+    session = _get_session()
+    try:
+        response = session.get(url, timeout=config.filing_timeout, stream=True)
+        response.raise_for_status()
+        content = textextract.read_capped(response)
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Error fetching URL: {e}")
+        with _lock:
+            _stats["errors"] += 1
+        return ""
+
+    with _lock:
+        _stats["fetched"] += 1
+    # the whole text, the tools select config.filing_sections from it
+    return textextract.extract_text(content, sections=[])
+
+
+def fetch_filing_texts(urls: list) -> list:
+    """Fetches the filing pages concurrently and returns their texts in the order of `urls`."""
+    _get_session()
+    return list(_pool.map(fetch_filing_text, urls))
+
+
+def get_stats() -> dict:
+    """Returns the pages fetched, failed and skipped as duplicates."""
+    with _lock:
+        return dict(_stats)
@@ -0,0 +1,145 @@
+"""Persistent, content-addressed store of SEC filing texts.
+
+Published filings never change, so the text of each one is kept on disk once
+fetched. Texts are gzip'd files named by their MD5 hash (helpercode.get_md5_hash),
+so identical texts are stored once, and a sqlite index maps each accessNumber to
+its text and to the filing's symbol and date. When the texts grow past
+config.filing_store_max_bytes the least recently read filings are evicted.
+"""
+import gzip
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from ..config import config
+from . import helpercode
+
+logger = logging.getLogger("MarketMind")
+
+
+class FilingStore:
+    """Filing texts on disk by content hash, indexed by accessNumber, symbol and filed date."""
+
+    def __init__(self, store_dir: str = None, max_bytes: int = None):
+        self._dir = store_dir or config.filing_store_dir
+        self._max_bytes = max_bytes or config.filing_store_max_bytes
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evicted": 0}
+        os.makedirs(os.path.join(self._dir, "texts"), exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(self._dir, "index.sqlite"), check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS filings (access_number TEXT PRIMARY KEY, symbol TEXT, "
+                         "filed_date TEXT, report_url TEXT, text_hash TEXT, size INTEGER, last_access REAL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS filings_symbol_date ON filings (symbol, filed_date)")
+        self._db.commit()
+
+    def _path(self, text_hash: str) -> str:
+        return os.path.join(self._dir, "texts", text_hash + ".txt.gz")
+
+    def get_texts(self, access_numbers: list) -> dict:
+        """Returns the stored text of each filing found, by accessNumber."""
+        texts = {}
+        with self._lock:
+            for access_number in access_numbers:
+                row = self._db.execute("SELECT text_hash FROM filings WHERE access_number = ?",
+                                       (access_number,)).fetchone()
+                text = None
+                if row is not None:
+                    try:
+                        with gzip.open(self._path(row[0]), "rt", encoding="utf-8") as f:
+                            text = f.read()
+                    except OSError:
+                        self._db.execute("DELETE FROM filings WHERE access_number = ?", (access_number,))
+                if text is None:
+                    self._stats["misses"] += 1
+                    continue
+                texts[access_number] = text
+                self._stats["hits"] += 1
+                self._db.execute("UPDATE filings SET last_access = ? WHERE access_number = ?",
+                                 (time.time(), access_number))
+            self._db.commit()
+        return texts
+
+    def put(self, symbol: str, filing: dict, text: str):
+        """Stores the text of a filing (a Finnhub filings entry) and evicts old ones if over budget."""
+        text_hash = helpercode.get_md5_hash(text)
+        path = self._path(text_hash)
+        with self._lock:
+            if not os.path.exists(path):
+                temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                try:
+                    with gzip.open(temp_path, "wt", encoding="utf-8") as f:
+                        f.write(text)
+                    os.replace(temp_path, path)
+                except OSError as e:
+                    logger.warning(f"Could not store filing {filing['accessNumber']}: {e}")
+                    return
+            self._db.execute("INSERT OR REPLACE INTO filings VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             (filing["accessNumber"], symbol.strip().upper(), filing.get("filedDate"),
+                              filing.get("reportUrl"), text_hash, os.path.getsize(path), time.time()))
+            self._stats["stores"] += 1
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        # texts shared by several filings count once
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM "
+                                 "(SELECT DISTINCT text_hash, size FROM filings)").fetchone()[0]
+        if total <= self._max_bytes:
+            return
+        rows = self._db.execute("SELECT access_number, text_hash FROM filings ORDER BY last_access").fetchall()
+        for access_number, text_hash in rows:
+            self._db.execute("DELETE FROM filings WHERE access_number = ?", (access_number,))
+            self._stats["evicted"] += 1
+            if self._db.execute("SELECT 1 FROM filings WHERE text_hash = ?", (text_hash,)).fetchone():
+                continue
+            path = self._path(text_hash)
+            try:
+                total -= os.path.getsize(path)
+                os.remove(path)
+            except OSError:
+                pass
+            if total <= self._max_bytes:
+                break
+
+    def find(self, symbol: str, start_date: str = None, end_date: str = None) -> list:
+        """Lists the stored filings of a symbol, optionally filed between two dates (YYYY-MM-DD).
+
+        Returns:
+            list: accessNumber, symbol, filedDate and reportUrl of each filing, newest first.
+        """
+        query = "SELECT access_number, symbol, filed_date, report_url FROM filings WHERE symbol = ?"
+        params = [symbol.strip().upper()]
+        if start_date:
+            query += " AND substr(filed_date, 1, 10) >= ?"
+            params.append(start_date)
+        if end_date:
+            query += " AND substr(filed_date, 1, 10) <= ?"
+            params.append(end_date)
+        with self._lock:
+            rows = self._db.execute(query + " ORDER BY filed_date DESC", params).fetchall()
+        return [{"accessNumber": row[0], "symbol": row[1], "filedDate": row[2], "reportUrl": row[3]} for row in rows]
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["filings"] = self._db.execute("SELECT COUNT(*) FROM filings").fetchone()[0]
+            stats["bytes"] = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM "
+                                              "(SELECT DISTINCT text_hash, size FROM filings)").fetchone()[0]
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+_filing_store = None
+_filing_store_lock = threading.Lock()
+
+
+def get_filing_store() -> FilingStore:
+    """Returns the process-wide FilingStore in config.filing_store_dir."""
+    global _filing_store
+    with _filing_store_lock:
+        if _filing_store is None:
+            _filing_store = FilingStore()
+        return _filing_store
@@ -1,11 +1,25 @@
-import finnhub
-from . import helpercode
+from ..config import config
+from . import filingfetch, filingstore, helpercode, passageindex, textextract
+from .finnhubcache import cached_endpoint
+from .finnhubclient import FinnhubClient
 import logging
+import threading
 
-PROJECT_ID = helpercode.get_project_id()
+logger = logging.getLogger("MarketMind")
 
-finnhub_client = finnhub.Client(api_key=helpercode.access_secret_version(PROJECT_ID, "FinHubAccessKey"))
+_finnhub_client = None
+_finnhub_client_lock = threading.Lock()
 
+def get_finnhub_client() -> FinnhubClient:
+    """Returns the shared FinnhubClient, reading the API key from Secret Manager on first use."""
+    global _finnhub_client
+    with _finnhub_client_lock:
+        if _finnhub_client is None:
+            project_id = helpercode.get_project_id()
+            _finnhub_client = FinnhubClient(api_key=helpercode.access_secret_version(project_id, "FinHubAccessKey"))
+        return _finnhub_client
+
+@cached_endpoint
 def symbol_lookup(company_name: str) -> dict:
     """Does a lookup on a compay name to get its trading symbol
 
@@ -18,7 +32,7 @@ def symbol_lookup(company_name: str) -> dict:
     return {
         "status": "success",
         "report": (
-            finnhub_client.symbol_lookup(company_name)
+            get_finnhub_client().symbol_lookup(company_name)
         ),
     }
 
@@ -33,13 +47,16 @@ def company_news(symbol: str, start_date: str, end_date: str) -> dict:
     Returns:
         dict: status and result or error msg.
     """
+    news = get_finnhub_client().company_news(symbol, _from=start_date, to=end_date)
+    passageindex.index_news(symbol, news)
     return {
         "status": "success",
         "report": (
-            finnhub_client.company_news(symbol, _from=start_date, to=end_date)
+            news
         ),
     }
 
+@cached_endpoint
 def company_profile(symbol: str) -> dict:
     """Retrieves the company profile for the symbol specified
 
@@ -52,10 +69,11 @@ def company_profile(symbol: str) -> dict:
     return {
         "status": "success",
         "report": (
-            finnhub_client.company_profile2(symbol=symbol)
+            get_finnhub_client().company_profile2(symbol=symbol)
         ),
     }
 
+@cached_endpoint
 def company_basic_financials(symbol: str) -> dict:
     """Retrieves the company financials for the symbol specified
 
@@ -68,10 +86,11 @@ def company_basic_financials(symbol: str) -> dict:
     return {
         "status": "success",
         "report": (
-            finnhub_client.company_basic_financials(symbol, 'all')
+            get_finnhub_client().company_basic_financials(symbol, 'all')
         ),
     }
 
+@cached_endpoint
 def insider_sentiment(symbol: str, start_date: str, end_date: str) -> dict:
     """Retrieves the insider sentiment for the symbol specified
 
@@ -86,10 +105,11 @@ def insider_sentiment(symbol: str, start_date: str, end_date: str) -> dict:
     return {
         "status": "success",
         "report": (
-            finnhub_client.stock_insider_sentiment(symbol, start_date, end_date)
+            get_finnhub_client().stock_insider_sentiment(symbol, start_date, end_date)
         ),
     }
 
+@cached_endpoint
 def financials_reported(symbol: str) -> dict:
     """Retrieves the financials reported for the symbol specified
 
@@ -102,7 +122,7 @@ def financials_reported(symbol: str) -> dict:
     return {
         "status": "success",
         "report": (
-            finnhub_client.financials_reported(symbol)
+            get_finnhub_client().financials_reported(symbol=symbol)
         )
     }
 
@@ -117,17 +137,25 @@ def sec_filings(symbol: str, start_date: str, end_date: str) -> dict:
     Returns:
         dict: status and result or error msg.
     """
-    print("sec_filings called")
-    secfilings = finnhub_client.filings(symbol, start_date, end_date)
-    parsed_filings = []
-    for filing in secfilings:
-        if filing['form'] in ['10-Q', '8-K']:
-            parsed_filings.append({"accessNumber":filing['accessNumber'], 
-                                   "symbol": symbol, 
-                                   "filedDate": filing['filedDate'],
-                                   "report": helpercode.get_text_from_url(filing['reportUrl'])})
-            print(filing['reportUrl'])
-
+    secfilings = get_finnhub_client().filings(symbol=symbol, _from=start_date, to=end_date)
+    filings = filingfetch.dedupe_filings([filing for filing in secfilings if filing['form'] in ['10-Q', '8-K']])
+    store = filingstore.get_filing_store()
+    texts = store.get_texts([filing['accessNumber'] for filing in filings])
+    missing = [filing for filing in filings if filing['accessNumber'] not in texts]
+    logger.info(f"sec_filings: {len(texts)} of {len(filings)} filings for {symbol} stored, fetching {len(missing)}")
+    for filing, text in zip(missing, filingfetch.fetch_filing_texts([filing['reportUrl'] for filing in missing])):
+        if text:
+            store.put(symbol, filing, text)
+            texts[filing['accessNumber']] = text
+    for filing in filings:
+        if filing['accessNumber'] in texts:
+            passageindex.index_filing(symbol, filing, texts[filing['accessNumber']])
+    parsed_filings = [{"accessNumber": filing['accessNumber'],
+                       "symbol": symbol,
+                       "filedDate": filing['filedDate'],
+                       "report": passageindex.filing_preview(
+                           textextract.select_sections(texts.get(filing['accessNumber'], ""), config.filing_sections))}
+                      for filing in filings]
 
     return {
         "status": "success",
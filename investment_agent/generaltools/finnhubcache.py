@@ -0,0 +1,140 @@
+"""TTL cache for the Finnhub lookup tools.
+
+Each endpoint has its own TTL in config.finnhub_cache_ttls, from a day for profiles
+and metrics to a week for symbol lookups and reported financials. Keys are built
+from normalized arguments, so "apple inc" and " Apple  Inc " or "aapl" and "AAPL"
+share an entry. At most config.finnhub_cache_max_entries entries live in memory,
+least recently used ones evicted first, and all of them also in a sqlite file when
+config.finnhub_cache_backend is "sqlite", so they survive restarts.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from ..config import config
+from ..lsegtools.resultcache import cache_results, normalize_date
+
+logger = logging.getLogger("MarketMind")
+
+
+def normalize_argument(name: str, value):
+    """Canonicalizes a Finnhub tool argument: symbols upper-cased, names case-folded, dates ISO."""
+    if not isinstance(value, str):
+        return value
+    text = " ".join(value.split())
+    if name == "symbol":
+        return text.upper()
+    if name.endswith("_date"):
+        return normalize_date(text)
+    return text.casefold()
+
+
+def make_key(endpoint: str, arguments: dict) -> str:
+    normalized = {name: normalize_argument(name, value) for name, value in arguments.items()}
+    return json.dumps({"endpoint": endpoint, "args": normalized}, sort_keys=True, default=str)
+
+
+class FinnhubCache:
+    """In-memory LRU and TTL cache of Finnhub results, optionally backed by a sqlite file."""
+
+    def __init__(self, path: str = None, max_entries: int = None):
+        self._max_entries = max_entries or config.finnhub_cache_max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "expired": 0}
+        self._db = None
+        if path:
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute("CREATE TABLE IF NOT EXISTS finnhub_cache "
+                                 "(key TEXT PRIMARY KEY, expires_at REAL, value TEXT)")
+                self._db.execute("DELETE FROM finnhub_cache WHERE expires_at <= ?", (time.time(),))
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Finnhub cache: could not open {path}, caching in memory only: {e}")
+                self._db = None
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None and self._db is not None:
+                row = self._db.execute("SELECT expires_at, value FROM finnhub_cache WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    entry = (row[0], json.loads(row[1]))
+                    self._remember(key, entry)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._memory[key]
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._memory.move_to_end(key)
+            self._stats["hits"] += 1
+            return value
+
+    def _remember(self, key: str, entry: tuple):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._max_entries:
+            self._memory.popitem(last=False)
+
+    def set(self, key: str, value, ttl: int):
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._remember(key, (expires_at, value))
+            self._stats["stores"] += 1
+            if self._db is not None:
+                try:
+                    self._db.execute("INSERT OR REPLACE INTO finnhub_cache VALUES (?, ?, ?)",
+                                     (key, expires_at, json.dumps(value)))
+                    self._db.commit()
+                except (sqlite3.Error, TypeError) as e:
+                    logger.warning(f"Could not write Finnhub cache entry: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM finnhub_cache")
+                self._db.commit()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._memory)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+_finnhub_cache = None
+_finnhub_cache_lock = threading.Lock()
+
+
+def get_finnhub_cache() -> FinnhubCache:
+    """Returns the process-wide FinnhubCache, using the backend in config.finnhub_cache_backend."""
+    global _finnhub_cache
+    with _finnhub_cache_lock:
+        if _finnhub_cache is None:
+            path = config.finnhub_cache_path if config.finnhub_cache_backend == "sqlite" else None
+            _finnhub_cache = FinnhubCache(path)
+        return _finnhub_cache
+
+
+def cached_endpoint(func):
+    """Caches a Finnhub tool's successful results for the TTL of its endpoint.
+
+    The TTL is looked up by the tool's name in config.finnhub_cache_ttls, so the sync
+    and async versions of a tool share their entries.
+    """
+    return cache_results(func, get_finnhub_cache, make_key, lambda arguments: config.finnhub_cache_ttls[func.__name__],
+                         lambda: config.finnhub_cache_enabled, "Finnhub cache")
@@ -0,0 +1,196 @@
+"""Finnhub REST client with rate limiting, connection pooling and retries.
+
+A drop-in for the finnhub.Client methods the tools use, with the same signatures
+and the same requests. Every request first takes a token from a bucket shared by
+the sync and async tools, so parallel agents stay within the plan's per-minute
+quota, and 429 and 5xx responses and connection errors are retried with jittered
+exponential backoff. The base URL is configurable so the client can run against a
+local stub server.
+
+Unlike finnhub.Client, requests time out after config.finnhub_timeout, parameters
+left as None are not sent, and errors raise requests.HTTPError rather than
+finnhub.FinnhubAPIException.
+"""
+import logging
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ..config import config
+
+logger = logging.getLogger("MarketMind")
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilling `rate` tokens per second up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Takes a token and returns how long to wait, in seconds, before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self) -> float:
+        """Blocks until a token is available and returns the time waited."""
+        wait = self.reserve()
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> TokenBucket:
+    """Returns the process wide Finnhub limiter, sized by config.finnhub_calls_per_minute."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = TokenBucket(config.finnhub_calls_per_minute / 60, config.finnhub_burst)
+        return _limiter
+
+
+def backoff_delay(attempt: int, retry_after: str = None) -> float:
+    """Returns the delay before retry number `attempt` (from 0), with full jitter.
+
+    A Retry-After header in seconds from the server takes precedence.
+    """
+    if retry_after:
+        try:
+            return min(float(retry_after), config.finnhub_backoff_max)
+        except ValueError:
+            pass
+    return random.uniform(0, min(config.finnhub_backoff_max, config.finnhub_backoff_base * 2 ** attempt))
+
+
+class FinnhubClient:
+    """Pooled, rate limited and retrying client for the Finnhub REST API.
+
+    The endpoint methods only build the request and call _get(), so a subclass with
+    an async _get() (asyncfinhubtools.AsyncFinnhubClient) shares the paths, the
+    retry policy and the counters.
+
+    Args:
+        api_key (str): The Finnhub API key.
+        base_url (str): The API root, defaults to config.finnhub_base_url.
+        limiter (TokenBucket): The rate limiter, defaults to the shared one.
+    """
+
+    def __init__(self, api_key: str, base_url: str = None, limiter: TokenBucket = None):
+        self.api_key = api_key
+        self.base_url = (base_url or config.finnhub_base_url).rstrip("/")
+        self.limiter = limiter or get_rate_limiter()
+        self.session = self._create_session()
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "throttled": 0,
+            "server_errors": 0,
+            "retries": 0,
+            "failures": 0,
+            "limiter_wait_seconds": 0.0,
+        }
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=config.finnhub_pool_size, pool_maxsize=config.finnhub_pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _count(self, name: str, value=1):
+        with self._lock:
+            self._stats[name] += value
+
+    def _prepare(self, path: str, params: dict) -> tuple:
+        params = {name: value for name, value in params.items() if value is not None}
+        params["token"] = self.api_key
+        return f"{self.base_url}{path}", params
+
+    def _retry_delay(self, path: str, attempt: int, status: int = None, retry_after: str = None, error=None):
+        """Counts a failed attempt and returns the delay before the next one, or None to give up.
+
+        Args:
+            path (str): The API path, for the log.
+            attempt (int): The attempt that failed, from 0.
+            status (int): The retryable HTTP status of the response, None for a connection error.
+            retry_after (str): The Retry-After header of the response.
+            error (Exception): The connection error or timeout.
+        """
+        if status is not None:
+            self._count("throttled" if status == 429 else "server_errors")
+        if attempt >= config.finnhub_max_retries:
+            self._count("failures")
+            return None
+        delay = backoff_delay(attempt, retry_after)
+        logger.warning(f"Finnhub {path}: {error or f'HTTP {status}'}, retrying in {delay:.2f}s")
+        self._count("retries")
+        return delay
+
+    def _get(self, path: str, **params):
+        url, params = self._prepare(path, params)
+        for attempt in range(config.finnhub_max_retries + 1):
+            self._count("limiter_wait_seconds", self.limiter.acquire())
+            self._count("requests")
+            try:
+                response = self.session.get(url, params=params, timeout=config.finnhub_timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                delay = self._retry_delay(path, attempt, error=e)
+                if delay is None:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUS_CODES:
+                    if not response.ok:
+                        self._count("failures")
+                    response.raise_for_status()
+                    return response.json()
+                delay = self._retry_delay(path, attempt, response.status_code, response.headers.get("Retry-After"))
+                if delay is None:
+                    response.raise_for_status()
+            time.sleep(delay)
+
+    def get_stats(self) -> dict:
+        """Returns the request, throttling (429), server error, retry and failure counters."""
+        with self._lock:
+            return dict(self._stats)
+
+    # The endpoint methods keep the signatures of finnhub.Client (finnhub-python 2.4)
+
+    def symbol_lookup(self, query: str):
+        return self._get("/search", q=query)
+
+    def company_news(self, symbol: str, _from: str, to: str):
+        return self._get("/company-news", symbol=symbol, **{"from": _from, "to": to})
+
+    def company_profile2(self, **params):
+        return self._get("/stock/profile2", **params)
+
+    def company_basic_financials(self, symbol: str, metric: str):
+        return self._get("/stock/metric", symbol=symbol, metric=metric)
+
+    def stock_insider_sentiment(self, symbol: str, _from: str, to: str):
+        return self._get("/stock/insider-sentiment", symbol=symbol, **{"from": _from, "to": to})
+
+    def financials_reported(self, **params):
+        return self._get("/stock/financials-reported", **params)
+
+    def filings(self, symbol: str = "", cik: str = "", access_number: str = "", form: str = "", _from: str = "",
+                to: str = ""):
+        return self._get("/stock/filings", symbol=symbol, cik=cik, accessNumber=access_number, form=form,
+                         **{"from": _from, "to": to})
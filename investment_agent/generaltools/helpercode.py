@@ -1,41 +1,44 @@
 import requests
-from bs4 import BeautifulSoup
 import tempfile
 import logging
-from google.cloud import secretmanager
 import google.auth
 import datetime
+import functools
 import hashlib
+from ..config import config
+from . import textextract
 
 
 logger = logging.getLogger("MarketMind")
 
+REQUEST_HEADERS = {
+    "accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
+    "accept-encoding":"gzip, deflate, br, zstd",
+    "accept-language":"en-US,en;q=0.9",
+    "cache-control":"max-age=0",
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36',
+    'sec-ch-ua': '"Google Chrome";v="131", "Chromium";v="131", "Not_A Brand";v="24"',
+    'sec-ch-ua-mobile': '?0',
+    'sec-ch-ua-platform': '"macOS"',
+    'sec-fetch-dest': 'document',
+    'sec-fetch-mode': 'navigate',
+    'sec-fetch-site': 'none',
+    'sec-fetch-user': '?1',
+    'upgrade-insecure-requests': '1',
+}
+
+def html_to_text(content):
+    return textextract.extract_text(content) # Extracts the text without scripts, styles and XBRL headers
+
 def get_text_from_url(url):
     try:
-        request_header = {
-            "accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
-            "accept-encoding":"gzip, deflate, br, zstd",
-            "accept-language":"en-US,en;q=0.9",
-            "cache-control":"max-age=0",
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36',
-            'sec-ch-ua': '"Google Chrome";v="131", "Chromium";v="131", "Not_A Brand";v="24"',
-            'sec-ch-ua-mobile': '?0',
-            'sec-ch-ua-platform': '"macOS"',
-            'sec-fetch-dest': 'document',
-            'sec-fetch-mode': 'navigate',
-            'sec-fetch-site': 'none',
-            'sec-fetch-user': '?1',
-            'upgrade-insecure-requests': '1',
-        }
-        response = requests.get(url, headers=request_header)
+        response = requests.get(url, headers=REQUEST_HEADERS, timeout=config.filing_timeout, stream=True)
         response.raise_for_status()  # Raise an exception for bad status codes (4xx or 5xx)
 
-        soup = BeautifulSoup(response.content, "html.parser")
-        text = soup.get_text(strip=True) # Extracts and cleans all text from the HTML
-        return text
+        return html_to_text(textextract.read_capped(response))
     
     except requests.exceptions.RequestException as e:
-        print(f"Error fetching URL: {e}")
+        logger.warning(f"Error fetching URL: {e}")
         return ""
     
 
@@ -45,7 +48,8 @@ def access_secret_version(project_id, secret_id, version_id="latest"):
     can be a version number as a string (e.g. "5") or an alias (e.g. "latest").
     """
 
-    # Create the Secret Manager client.
+    # Create the Secret Manager client, imported here as it is slow to load and rarely needed.
+    from google.cloud import secretmanager
     client = secretmanager.SecretManagerServiceClient()
 
     # Build the resource name of the secret version.
@@ -54,7 +58,6 @@ def access_secret_version(project_id, secret_id, version_id="latest"):
     # Access the secret version.
     response = client.access_secret_version(request={"name": name})
 
-    logger.warning(response.payload.data.decode("UTF-8"))
     # Return the decoded payload.
     return response.payload.data.decode("UTF-8")
 
@@ -74,8 +77,9 @@ def create_temp_credentials_file(credentials_json):
     return temp_file_path
 
 
+@functools.lru_cache(maxsize=None)
 def get_project_id():
-    """Gets the current GCP project ID.
+    """Gets the current GCP project ID, resolving the default credentials once.
 
     Returns:
         The project ID as a string.
@@ -0,0 +1,229 @@
+"""Local BM25 passage index over the fetched filings and news.
+
+Filing texts and news items are split into passages of about config.passage_chars
+characters and kept in an in-memory inverted index, so an agent can ask for the few
+passages relevant to a question (search_passages) instead of reading whole filings.
+Filings in the filing store are indexed on first search for their symbol. At most
+config.passage_index_max_documents documents are kept, the least recently added or
+matched ones are dropped first.
+"""
+import datetime
+import logging
+import math
+import re
+import threading
+from collections import Counter, OrderedDict, defaultdict
+
+from ..config import config
+from . import filingstore
+
+logger = logging.getLogger("MarketMind")
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.'][a-z0-9]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were which with "
+    "will would our we they their".split()
+)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> list:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def chunk_text(text: str, size: int = None, overlap: int = None) -> list:
+    """Splits a text into passages of whole lines of about `size` characters.
+
+    Each passage starts with the last lines of the previous one, up to `overlap`
+    characters, so a sentence cut at a boundary is still found whole in one of them.
+    """
+    size = size or config.passage_chars
+    overlap = min(config.passage_overlap if overlap is None else overlap, size // 2)
+    passages = []
+    current = []
+    length = 0
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        # very long lines (text without separators) are cut into pieces
+        while len(line) > size:
+            passages.append(line[:size])
+            line = line[size - overlap:]
+        if current and length + len(line) > size:
+            passages.append("\n".join(current))
+            carried = []
+            while current and sum(len(part) for part in carried) + len(current[-1]) <= overlap:
+                carried.insert(0, current.pop())
+            current, length = carried, sum(len(part) + 1 for part in carried)
+        current.append(line)
+        length += len(line) + 1
+    if current:
+        passages.append("\n".join(current))
+    return passages
+
+
+class PassageIndex:
+    """Thread-safe in-memory BM25 index of passages with their source metadata, bounded by documents."""
+
+    def __init__(self, max_documents: int = None):
+        self._max_documents = max_documents or config.passage_index_max_documents
+        self._lock = threading.Lock()
+        self._postings = defaultdict(dict)  # term -> {passage id: term frequency}
+        self._passages = {}  # passage id -> (metadata with text, token count, terms)
+        self._documents = OrderedDict()  # doc id -> passage ids, least recently used first
+        self._document_of = {}  # passage id -> doc id
+        self._next_id = 0
+        self._total_length = 0
+
+    def has_document(self, doc_id: str) -> bool:
+        with self._lock:
+            return doc_id in self._documents
+
+    def add_document(self, doc_id: str, text: str, metadata: dict) -> int:
+        """Indexes the passages of a document once, returns the passages added."""
+        if not text:
+            return 0
+        with self._lock:
+            if doc_id in self._documents:
+                self._documents.move_to_end(doc_id)
+                return 0
+        passages = [(passage, Counter(tokenize(passage))) for passage in chunk_text(text)]
+        with self._lock:
+            if doc_id in self._documents:
+                return 0
+            passage_ids = []
+            for passage, counts in passages:
+                passage_id = self._next_id
+                self._next_id += 1
+                length = sum(counts.values())
+                self._passages[passage_id] = (dict(metadata, text=passage), length, list(counts))
+                self._document_of[passage_id] = doc_id
+                self._total_length += length
+                for term, count in counts.items():
+                    self._postings[term][passage_id] = count
+                passage_ids.append(passage_id)
+            self._documents[doc_id] = passage_ids
+            while len(self._documents) > self._max_documents:
+                self._drop_document(next(iter(self._documents)))
+        return len(passages)
+
+    def _drop_document(self, doc_id: str):
+        for passage_id in self._documents.pop(doc_id):
+            _, length, terms = self._passages.pop(passage_id)
+            del self._document_of[passage_id]
+            self._total_length -= length
+            for term in terms:
+                postings = self._postings[term]
+                del postings[passage_id]
+                if not postings:
+                    del self._postings[term]
+
+    def search(self, query: str, top_k: int = 5, symbol: str = None) -> list:
+        """Returns the top_k passages for the query by BM25 score, optionally for one symbol only."""
+        terms = set(tokenize(query))
+        symbol = symbol.strip().upper() if symbol else None
+        with self._lock:
+            count = len(self._passages)
+            if not count or not terms:
+                return []
+            average_length = self._total_length / count
+            scores = defaultdict(float)
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for passage_id, frequency in postings.items():
+                    passage, length, _ = self._passages[passage_id]
+                    if symbol and passage.get("symbol") != symbol:
+                        continue
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+                    scores[passage_id] += idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+            best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+            for passage_id, _ in best:
+                self._documents.move_to_end(self._document_of[passage_id])
+            return [dict(self._passages[passage_id][0], score=round(score, 3)) for passage_id, score in best]
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {"documents": len(self._documents), "passages": len(self._passages), "terms": len(self._postings)}
+
+
+_passage_index = None
+_passage_index_lock = threading.Lock()
+
+
+def get_passage_index() -> PassageIndex:
+    """Returns the process-wide PassageIndex."""
+    global _passage_index
+    with _passage_index_lock:
+        if _passage_index is None:
+            _passage_index = PassageIndex()
+        return _passage_index
+
+
+def index_filing(symbol: str, filing: dict, text: str):
+    get_passage_index().add_document(f"filing:{filing['accessNumber']}", text, {
+        "source": f"{filing.get('form', 'SEC filing')} {filing['accessNumber']}",
+        "symbol": symbol.strip().upper(),
+        "date": str(filing.get("filedDate", ""))[:10],
+    })
+
+
+def _news_date(timestamp) -> str:
+    # Finnhub news times are UNIX seconds
+    if isinstance(timestamp, (int, float)) and timestamp > 0:
+        return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).strftime("%Y-%m-%d")
+    return str(timestamp or "")
+
+
+def index_news(symbol: str, news: list):
+    for item in news or []:
+        text = "\n".join(part for part in (item.get("headline"), item.get("summary")) if part)
+        get_passage_index().add_document(f"news:{item.get('id') or item.get('url')}", text, {
+            "source": item.get("url") or item.get("source", "news"),
+            "symbol": symbol.strip().upper(),
+            "date": _news_date(item.get("datetime")),
+        })
+
+
+def _index_stored_filings(symbol: str):
+    store = filingstore.get_filing_store()
+    filings = [filing for filing in store.find(symbol)
+               if not get_passage_index().has_document(f"filing:{filing['accessNumber']}")]
+    texts = store.get_texts([filing["accessNumber"] for filing in filings])
+    for filing in filings:
+        if filing["accessNumber"] in texts:
+            index_filing(symbol, filing, texts[filing["accessNumber"]])
+
+
+def filing_preview(text: str) -> str:
+    """Cuts a filing text to config.filing_report_max_chars, pointing to search_passages for the rest."""
+    limit = config.filing_report_max_chars
+    if not limit or len(text) <= limit:
+        return text
+    return f"{text[:limit]}\n[... {len(text) - limit} more characters, use search_passages to find the relevant passages]"
+
+
+def search_passages(query: str, symbol: str = "", top_k: int = 5) -> dict:
+    """Searches the SEC filings and company news fetched so far for the passages most relevant to a question
+
+    Args:
+        query (str): What to look for, e.g. "revenue guidance" or "supply chain risk".
+        symbol (str): The stock symbol of the company to search, or "" for all companies.
+        top_k (int): The number of passages to return.
+
+    Returns:
+        dict: status and result or error msg.
+    """
+    if symbol:
+        _index_stored_filings(symbol)
+    top_k = max(1, min(int(top_k), config.passage_max_results))
+    passages = get_passage_index().search(query, top_k, symbol or None)
+    logger.info(f"search_passages: {len(passages)} passages for {query!r} ({get_passage_index().get_stats()})")
+    return {
+        "status": "success",
+        "report": passages,
+    }
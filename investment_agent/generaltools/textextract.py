@@ -0,0 +1,200 @@
+"""Text extraction from filing and news HTML.
+
+The extractor backend is picked by config.text_extractor: "selectolax" and "lxml"
+parse an order of magnitude faster than BeautifulSoup's html.parser, which stays as
+the fallback when neither is installed ("auto" takes the fastest available one).
+Script, style and inline XBRL header noise is dropped before the text is joined
+line by line, and config.filing_sections can narrow a filing down to its key
+sections such as MD&A and Risk Factors.
+
+Run `python -m investment_agent.generaltools.textextract <fixture dir>` to compare
+the parse throughput of the installed backends on saved filings.
+"""
+import logging
+import os
+import re
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+from ..config import config
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:  # the selectolax backend is optional
+    HTMLParser = None
+
+try:
+    import lxml.html
+except ImportError:  # the lxml backend is optional
+    lxml = None
+
+logger = logging.getLogger("MarketMind")
+
+NOISE_TAGS = ["script", "style", "noscript", "template", "head"]
+# Inline XBRL filings carry their hidden facts in <ix:header>, which is never displayed
+IXBRL_HEADER = re.compile(rb"<ix:header\b.*?</ix:header\s*>", re.IGNORECASE | re.DOTALL)
+SECTION_TITLES = {
+    "business": r"business",
+    "risk_factors": r"risk\s+factors",
+    "mdna": r"management.s\s+discussion\s+and\s+analysis",
+    "market_risk": r"quantitative\s+and\s+qualitative\s+disclosures?\s+about\s+market\s+risk",
+    "controls": r"controls\s+and\s+procedures",
+    "legal_proceedings": r"legal\s+proceedings",
+}
+ITEM_HEADING = r"^\s*item\s+\d+[a-z]?\b[.:\s-]*"
+
+
+def _selectolax_text(content: bytes) -> str:
+    tree = HTMLParser(content)
+    tree.strip_tags(NOISE_TAGS)
+    root = tree.body or tree.root
+    if root is None:
+        return ""
+    # whitespace-only text nodes come out as empty lines
+    return "\n".join(line for line in root.text(separator="\n", strip=True).split("\n") if line)
+
+
+def _lxml_text(content: bytes) -> str:
+    root = lxml.html.fromstring(content)
+    for element in list(root.iter(*NOISE_TAGS)):
+        element.drop_tree()
+    return "\n".join(text.strip() for text in root.itertext() if text.strip())
+
+
+def _bs4_text(content: bytes) -> str:
+    soup = BeautifulSoup(content, "html.parser")
+    for element in soup(NOISE_TAGS):
+        element.decompose()
+    return soup.get_text("\n", strip=True)
+
+
+EXTRACTORS = {
+    "selectolax": _selectolax_text,
+    "lxml": _lxml_text,
+    "bs4": _bs4_text,
+}
+
+
+def available_extractors() -> list:
+    """Returns the installed extractor backends, fastest first."""
+    installed = {"selectolax": HTMLParser is not None, "lxml": lxml is not None, "bs4": True}
+    return [name for name in EXTRACTORS if installed[name]]
+
+
+def get_extractor(name: str = None):
+    """Returns the extraction function of a backend, by default config.text_extractor."""
+    name = name or config.text_extractor
+    available = available_extractors()
+    if name == "auto":
+        return EXTRACTORS[available[0]]
+    if name not in available:
+        logger.warning(f"Text extractor {name} is not installed, using {available[0]}")
+        return EXTRACTORS[available[0]]
+    return EXTRACTORS[name]
+
+
+def select_sections(text: str, sections: list) -> str:
+    """Returns only the given sections of a filing's text, or the whole text if none is found.
+
+    A section runs from its "Item N. Title" heading to the next item heading. The
+    table of contents repeats the headings, so the longest match of each is kept.
+
+    Args:
+        text (str): The filing text, one block per line.
+        sections (list): Keys of SECTION_TITLES, e.g. ["mdna", "risk_factors"].
+
+    Returns:
+        str: the text of the sections found, in filing order.
+    """
+    next_item = re.compile(ITEM_HEADING, re.IGNORECASE | re.MULTILINE)
+    found = []
+    for section in sections:
+        heading = re.compile(ITEM_HEADING + SECTION_TITLES[section], re.IGNORECASE | re.MULTILINE)
+        best = None
+        for match in heading.finditer(text):
+            following = next_item.search(text, match.end())
+            end = following.start() if following else len(text)
+            if best is None or end - match.start() > best[1] - best[0]:
+                best = (match.start(), end)
+        if best:
+            found.append(best)
+    if not found:
+        return text
+    return "\n".join(text[start:end].strip() for start, end in sorted(found))
+
+
+def extract_text(content, sections: list = None, extractor: str = None) -> str:
+    """Extracts the readable text of an HTML page.
+
+    Args:
+        content (bytes | str): The HTML, cut to config.filing_max_bytes.
+        sections (list): The filing sections to keep, defaults to config.filing_sections (all text if empty).
+        extractor (str): The backend to use, defaults to config.text_extractor.
+
+    Returns:
+        str: the page text, one block per line.
+    """
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    content = IXBRL_HEADER.sub(b"", content[:config.filing_max_bytes])
+    if not content.strip():
+        return ""
+    text = get_extractor(extractor)(content)
+    sections = config.filing_sections if sections is None else sections
+    return select_sections(text, sections) if sections else text
+
+
+def read_capped(response, max_bytes: int = None) -> bytes:
+    """Reads a streamed requests response up to max_bytes (config.filing_max_bytes) and closes it."""
+    max_bytes = max_bytes or config.filing_max_bytes
+    chunks = []
+    size = 0
+    try:
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= max_bytes:
+                logger.info(f"{response.url}: truncated at {max_bytes} bytes")
+                break
+    finally:
+        response.close()
+    return b"".join(chunks)[:max_bytes]
+
+
+def benchmark_extractors(fixture_dir: str, repeat: int = 3) -> dict:
+    """Measures the parse throughput of each installed backend on the HTML files in a directory.
+
+    Args:
+        fixture_dir (str): A directory of saved filings (.htm or .html).
+        repeat (int): Parses of each file per backend.
+
+    Returns:
+        dict: megabytes per second and output characters of one pass, by backend.
+    """
+    fixtures = []
+    for name in sorted(os.listdir(fixture_dir)):
+        if name.lower().endswith((".htm", ".html")):
+            with open(os.path.join(fixture_dir, name), "rb") as f:
+                fixtures.append(f.read()[:config.filing_max_bytes])
+    total_bytes = sum(len(content) for content in fixtures) * repeat
+    results = {}
+    for name in available_extractors():
+        extractor = EXTRACTORS[name]
+        start = time.perf_counter()
+        for _ in range(repeat):
+            characters = sum(len(extractor(IXBRL_HEADER.sub(b"", content))) for content in fixtures)
+        seconds = time.perf_counter() - start
+        results[name] = {
+            "files": len(fixtures),
+            "seconds": round(seconds, 3),
+            "mb_per_second": round(total_bytes / 1e6 / seconds, 2) if seconds else None,
+            "output_chars": characters,
+        }
+    return results
+
+
+if __name__ == "__main__":
+    for backend, result in benchmark_extractors(sys.argv[1]).items():
+        print(backend, result)
@@ -0,0 +1,147 @@
+"""Import audit of the investment_agent package.
+
+Importing the agent must stay cheap and free of side effects: no credentials, no
+Secret Manager or BigQuery clients, and none of the heavy client libraries that only
+the tools need. The audit imports the package in a fresh interpreter with
+`python -X importtime` and fails when one of the DEFERRED_MODULES was imported by
+the package itself, or when the import is over its time budget:
+
+    python -m investment_agent.importaudit
+
+Deferred modules loaded by our dependencies (google.genai imports aiohttp, for
+instance) are reported but can't be deferred from here. The time budget is
+calibrated on the machine running the audit: the package import may take at most
+config.import_time_budget_ratio times as long as importing, on their own, the
+third-party and standard modules the package imports.
+"""
+import json
+import logging
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from .config import config
+
+logger = logging.getLogger("MarketMind")
+
+PACKAGE = "investment_agent"
+# Loaded on first use by the tools, never by the import of the agent
+DEFERRED_MODULES = [
+    "google.cloud",
+    "aiohttp",
+    "pandas",
+    "pyarrow",
+]
+
+
+def _parse_importtime(output: str) -> tuple:
+    """Returns the self and cumulative import time in seconds of each module, and the module that imported each one.
+
+    `-X importtime` prints each module after the modules it imported, indented one
+    level deeper, so the importer of a module is the next one printed a level up.
+    """
+    modules = {}
+    importers = {}
+    pending = defaultdict(list)
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        level = (len(name) - len(name.lstrip())) // 2
+        name = name.strip()
+        modules[name] = (int(self_us) / 1e6, int(cumulative_us) / 1e6)
+        for child in pending.pop(level + 1, []):
+            importers[child] = name
+        pending[level].append(name)
+    return modules, importers
+
+
+def _run_python(*args) -> subprocess.CompletedProcess:
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-W", "ignore", *args],
+                            capture_output=True, text=True, cwd=package_dir, check=False)
+    if result.returncode != 0:
+        raise RuntimeError(f"{args[-1]} failed:\n{result.stderr[-2000:]}")
+    return result
+
+
+def measure_import(package: str = PACKAGE) -> tuple:
+    """Imports the package in a fresh interpreter and returns the per-module import times and importers."""
+    return _parse_importtime(_run_python("-X", "importtime", "-c", f"import {package}").stderr)
+
+
+def time_import(modules: list) -> float:
+    """Returns the wall-clock time in seconds of importing the modules in a fresh interpreter."""
+    statement = f"import time; start = time.perf_counter(); import {', '.join(modules)}; print(time.perf_counter() - start)"
+    return float(_run_python("-c", statement).stdout)
+
+
+def _in_package(name: str, package: str) -> bool:
+    return name == package or name.startswith(package + ".")
+
+
+def deferred_importers(modules: dict, importers: dict) -> dict:
+    """Returns the modules outside each loaded deferred package that imported it, by package."""
+    loaded = {}
+    for deferred in DEFERRED_MODULES:
+        found = set()
+        for name in modules:
+            importer = importers.get(name)
+            if _in_package(name, deferred) and not (importer and _in_package(importer, deferred)):
+                found.add(importer or "<interpreter>")
+        if found:
+            loaded[deferred] = sorted(found)
+    return loaded
+
+
+def dependency_imports(importers: dict) -> list:
+    """Returns the modules outside the package that the package's own modules imported first."""
+    return sorted(name for name, importer in importers.items()
+                  if _in_package(importer, PACKAGE) and not _in_package(name, PACKAGE))
+
+
+def audit_imports(repeats: int = 5, top: int = 10) -> dict:
+    """Checks that importing the package loads none of the DEFERRED_MODULES itself and stays within budget.
+
+    Args:
+        repeats (int): Fresh imports timed for the package and for its dependencies, taken in
+            turns so both see the same machine load, the fastest of each is kept.
+        top (int): The slowest modules to list, by self time.
+
+    Returns:
+        dict: the package and dependency import times, their ratio against
+            config.import_time_budget_ratio, the slowest modules, the deferred modules
+            loaded by the package and by its dependencies with their importers, and
+            whether both checks passed.
+    """
+    modules, importers = measure_import()
+    loaded = deferred_importers(modules, importers)
+    by_package = {name: found for name, found in loaded.items()
+                  if any(_in_package(importer, PACKAGE) for importer in found)}
+    dependencies = dependency_imports(importers)
+    package_seconds = dependency_seconds = float("inf")
+    for _ in range(repeats):
+        package_seconds = min(package_seconds, time_import([PACKAGE]))
+        dependency_seconds = min(dependency_seconds, time_import(dependencies))
+    ratio = package_seconds / dependency_seconds if dependency_seconds else 1.0
+    slowest = sorted(modules.items(), key=lambda item: item[1][0], reverse=True)[:top]
+    results = {
+        "import_seconds": round(package_seconds, 3),
+        "dependency_import_seconds": round(dependency_seconds, 3),
+        "import_ratio": round(ratio, 3),
+        "budget_ratio": config.import_time_budget_ratio,
+        "slowest_modules": {name: round(self_seconds, 4) for name, (self_seconds, _) in slowest},
+        "deferred_loaded_by_package": by_package,
+        "deferred_loaded_by_dependencies": {name: found for name, found in loaded.items() if name not in by_package},
+        "passed": not by_package and ratio <= config.import_time_budget_ratio,
+    }
+    if not results["passed"]:
+        logger.warning(f"Import of {PACKAGE} is over budget or loads deferred modules: {results}")
+    return results
+
+
+if __name__ == "__main__":
+    results = audit_imports()
+    print(json.dumps(results, indent=2))
+    sys.exit(0 if results["passed"] else 1)
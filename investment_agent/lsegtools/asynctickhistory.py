@@ -0,0 +1,196 @@
+"""Async versions of the tickhistory tools.
+
+They take the same arguments, return the same results and share the same caches as
+the tools in tickhistory.py, but await the BigQuery jobs (QueryExecutor.run_async)
+instead of blocking a thread while they run. ADK runs async tools on the event loop.
+"""
+import asyncio
+from typing import Optional
+
+from .esgfetch import fetch_esg_pillar_async
+from .projection import ProjectionError
+from .querybuilder import parse_date_range
+from .queryexecutor import get_executor
+from .resultcache import cached_tool, normalize_rics
+from .tickhistory import (_date_range_error, _error, bar_bucket_minutes, build_company_details_query,
+                          build_sentiment_query, build_significant_events_query, build_vwap_bars_query,
+                          build_vwap_query, paged_result, vwap_bars_result, vwap_result)
+from .vwapstore import get_vwap_store
+
+
+@cached_tool
+async def getVWAP(rics: list, start_date: str, end_date: str) -> dict:
+    """Uses The tick history product to get the VWAP for a RIC code
+
+    Args:
+        rics (lsit): The stock RICs of the companies whoes VWAP is being retreived.
+        start_date (str): The date from which to start VWAP calculation.
+        end_date (str): The date from whcih to end VWAP calculation.
+
+    Returns:
+        dict: status and result or error msg.
+    """
+    try:
+        start, end = parse_date_range(start_date, end_date)
+    except ValueError:
+        return _date_range_error("getVWAP", start_date, end_date)
+    rics = normalize_rics(rics)
+
+    # Only scan the days not already held in the daily aggregate store, the missing ranges concurrently
+    store = get_vwap_store()
+    missing = store.missing_ranges(rics, start, end)
+    results = await asyncio.gather(*(
+        get_executor().query_to_records_async(build_vwap_query(missing_rics, range_start, range_end), label="getVWAP")
+        for range_start, range_end, missing_rics in missing
+    ))
+    for (range_start, range_end, missing_rics), records in zip(missing, results):
+        store.add(records, missing_rics, range_start, range_end)
+    return vwap_result(rics, start, end)
+
+@cached_tool
+async def getVWAPBars(rics: list, start_date: str, end_date: str, bucket_minutes: int = 5) -> dict:
+    """Uses The tick history product to get intraday OHLC and VWAP bars for RIC codes
+
+    The bars are aggregated in BigQuery. When the window is too long for the requested bucket
+    size, a coarser bucket is used automatically so the result stays compact. Each RIC gets an
+    equal share of the row budget and the RICs cut short are listed in truncated_rics.
+
+    Args:
+        rics (list): The stock RICs of the companies whoes bars are being retreived.
+        start_date (str): The date from which to start the bars.
+        end_date (str): The date at which to end the bars.
+        bucket_minutes (int): The requested bar size in minutes, e.g. 1, 5, 15, 30 or 60.
+
+    Returns:
+        dict: status and result or error msg, with the bucket_minutes actually used.
+    """
+    try:
+        start, end = parse_date_range(start_date, end_date)
+    except ValueError:
+        return _date_range_error("getVWAPBars", start_date, end_date)
+    rics = normalize_rics(rics)
+    requested = max(int(bucket_minutes or 1), 1)
+    minutes = bar_bucket_minutes(requested, len(rics), start, end)
+    records = await get_executor().query_to_records_async(
+        build_vwap_bars_query(rics, start, end, minutes), label="getVWAPBars")
+    return vwap_bars_result(records, rics, minutes, requested)
+
+@cached_tool
+async def getMarketPsycSentiment(rics: list, start_date: str, end_date: str) -> dict:
+    """Uses LSEG QA MarketPsyc data to get Sentiment data for  RIC codes
+
+    Args:
+        rics (list): The stock RIC of the companys whoes sentiment is being retreived.
+        start_date (str): The date from which to start sentiment retreival.
+        end_date (str): The date from whcih to end sentiment retreival.
+
+    Returns:
+        dict: status and result or error msg.
+    """
+    try:
+        start, end = parse_date_range(start_date, end_date)
+    except ValueError:
+        return _date_range_error("getMarketPsycSentiment", start_date, end_date)
+    return {
+        "status": "success",
+        "function": "getMarketPsycSentiment",
+        **await get_executor().query_encoded_async(build_sentiment_query(rics, start, end),
+                                                   label="getMarketPsycSentiment"),
+    }
+
+@cached_tool
+async def getCompanyDetails(rics: list, columns: Optional[list[str]] = None, page_size: int = 0,
+                            page_token: str = "") -> dict:
+    """Uses LSEG QA Data to get Company Details  RIC codes
+
+    Args:
+        rics (list): The stock RIC of the companies whoes details is being retreived.
+        columns (list): Optional company detail columns to return, a default set is used when empty.
+        page_size (int): Optional maximum number of rows to return, 0 uses the default page size.
+        page_token (str): The next_page_token of a previous call, to get the following page.
+    Returns:
+        dict: status and result or error msg, with next_page_token set when more rows are available.
+    """
+    try:
+        # the table schema lookup is a blocking call the first time
+        query, column_names, page_size, offset = await asyncio.to_thread(
+            build_company_details_query, rics, columns, page_size, page_token)
+    except ProjectionError as e:
+        return _error("getCompanyDetails", str(e))
+    records = await get_executor().query_to_records_async(query, label="getCompanyDetails")
+    return paged_result("getCompanyDetails", records, column_names, page_size, offset)
+
+@cached_tool
+async def getSignificantEvents(rics: list, start_date: str, end_date: str, columns: Optional[list[str]] = None,
+                               page_size: int = 0, page_token: str = "") -> dict:
+    """Uses LSEG QA Significant Developments data to get the significant events for RIC codes, most recent first
+
+    Args:
+        rics (list): The stock RIC of the companies whoes significant events are being retreived.
+        start_date (str): The date from which to start significant events retreival.
+        end_date (str): The date from whcih to end significant events retreival.
+        columns (list): Optional event columns to return, a default set is used when empty.
+        page_size (int): Optional maximum number of events to return, 0 uses the default page size.
+        page_token (str): The next_page_token of a previous call, to get the following page.
+    Returns:
+        dict: status and result or error msg, with next_page_token set when more events are available.
+    """
+    try:
+        start, end = parse_date_range(start_date, end_date)
+    except ValueError:
+        return _date_range_error("getSignificantEvents", start_date, end_date)
+    try:
+        query, column_names, page_size, offset = await asyncio.to_thread(
+            build_significant_events_query, rics, start, end, columns, page_size, page_token)
+    except ProjectionError as e:
+        return _error("getSignificantEvents", str(e))
+    records = await get_executor().query_to_records_async(query, label="getSignificantEvents")
+    return paged_result("getSignificantEvents", records, column_names, page_size, offset)
+
+@cached_tool
+async def getESGEnvIndicator(rics: list, fyscal_year: int) -> dict:
+    """Uses LSEG QA ESG data to get Env Indicators data for  RIC codes
+
+    Args:
+        rics (list): The stock RIC of the companies whoes significant events are being retreived.
+        fyscal_year (int): The fiscal year (just the year as an integer) for which to retreive the ESG env indicator.
+    Returns:
+        dict: status and result or error msg.
+    """
+    return {
+        "status": "success",
+        "function": "getESGEnvIndicator",
+        **await fetch_esg_pillar_async(rics, fyscal_year, "Env"),
+    }
+
+@cached_tool
+async def getESGGovIndicator(rics: list, fyscal_year: int) -> dict:
+    """Uses LSEG QA ESG data to get Gov Indicators data for  RIC codes
+
+    Args:
+        rics (list): The stock RIC of the companies whoes significant events are being retreived.
+        fyscal_year (int): The fiscal year (just the year as an integer) for which to retreive the ESG Gov indicator.
+    Returns:
+        dict: status and result or error msg.
+    """
+    return {
+        "status": "success",
+        "function": "getESGGovIndicator",
+        **await fetch_esg_pillar_async(rics, fyscal_year, "Gov"),
+    }
+
+@cached_tool
+async def getESGSocIndicator(rics: list, fyscal_year: int) -> dict:
+    """Uses LSEG QA ESG data to get Soc Indicators data for  RIC codes
+
+    Args:
+        rics (list): The stock RIC of the companies whoes significant events are being retreived.
+        fyscal_year (int): The fiscal year (just the year as an integer) for which to retreive the ESG Soc indicator.
+    Returns:
+        dict: status and result or error msg.
+    """
+    return {
+        "status": "success",
+        "function": "getESGSocIndicator",
+        **await fetch_esg_pillar_async(rics, fyscal_year, "Soc"),
+    }
@@ -0,0 +1,232 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from ..config import config
+from .queryexecutor import get_executor
+from .querybuilder import build_query
+from .resultcache import get_result_cache, make_key, normalize_rics
+from .resultencoding import encode_records
+
+logger = logging.getLogger("MarketMind")
+
+ESG_PILLAR_TABLES = {
+    "Env": "ESG2EnvIndicator",
+    "Gov": "ESG2GovIndicator",
+    "Soc": "ESG2SocIndicator",
+}
+ESG_DATASET = "genaillentsearch.LSEGQA202510"
+ESG_ITEM_TABLE = "ESG2Item"
+# Split results of the combined query kept in memory for the sibling pillar tools
+RECENT_PILLARS_MAX_ENTRIES = 32
+
+# Indicator rows are returned as JSON strings so the pillars can be UNION'd whatever their
+# column layout, and the company and item tables are only scanned once for all pillars.
+ESG_PILLAR_SELECT = """select '{pillar}' AS pillar, b.orgpermid, b.item, TO_JSON_STRING(b) AS indicator
+            from `genaillentsearch.LSEGQA202510.{table}` b
+            where b.fy=@fiscal_year"""
+
+ESG_QUERY = """### Obtain ESG Indicators for RICs
+        WITH Companies AS (
+            select ric, orgpermid from `genaillentsearch.LSEGQA202510.company_info_mpicmpinfo`
+            where ric in UNNEST(@rics)
+            ),
+        Indicators AS (
+            {indicators}
+            )
+        select i.pillar, a.ric, i.indicator, TO_JSON_STRING(c) AS item from Companies a
+        inner join Indicators i
+        on a.orgpermid = i.orgpermid
+        inner join `genaillentsearch.LSEGQA202510.ESG2Item` c
+        on i.item = c.item
+        """
+
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one execution.
+
+    The first caller runs the function, callers arriving while it is in flight wait
+    on the same Future and share its result or exception. Async calls run in a task
+    of their own that every caller, the first one included, only waits on, so a
+    caller that is cancelled stops waiting without cancelling the others.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._tasks = set()
+
+    def _join(self, key: str) -> tuple:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+        return future, leader
+
+    def _finish(self, key: str):
+        with self._lock:
+            del self._calls[key]
+
+    def do(self, key: str, fn):
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._finish(key)
+
+    async def _run(self, key: str, future: Future, coroutine_fn):
+        try:
+            future.set_result(await coroutine_fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            self._finish(key)
+
+    async def do_async(self, key: str, coroutine_fn):
+        """Async version of do(), sharing the in-flight calls of both versions."""
+        future, leader = self._join(key)
+        if leader:
+            task = asyncio.ensure_future(self._run(key, future, coroutine_fn))
+            # the event loop only keeps weak references to its tasks
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+
+_single_flight = SingleFlight()
+
+
+_recent_pillars = OrderedDict()
+_recent_pillars_lock = threading.Lock()
+
+
+def _pillar_columns(pillar: str) -> list:
+    """Returns the columns of a pillar's records, from the indicator and item table schemas."""
+    executor = get_executor()
+    return list(dict.fromkeys([
+        "ric",
+        *executor.get_table_columns(f"{ESG_DATASET}.{ESG_PILLAR_TABLES[pillar]}"),
+        *executor.get_table_columns(f"{ESG_DATASET}.{ESG_ITEM_TABLE}"),
+    ]))
+
+
+def _split_pillars(rows: list) -> dict:
+    """Splits the combined rows into one encoded report per pillar.
+
+    A pillar without rows still reports its columns, read from the table schemas.
+    """
+    records = {pillar: [] for pillar in ESG_PILLAR_TABLES}
+    for row in rows:
+        records[row["pillar"]].append({"ric": row["ric"], **json.loads(row["indicator"]), **json.loads(row["item"])})
+    reports = {}
+    for pillar, pillar_records in records.items():
+        if pillar_records:
+            column_names = list(dict.fromkeys(name for record in pillar_records for name in record))
+        else:
+            column_names = _pillar_columns(pillar)
+        reports[pillar] = encode_records(pillar_records, column_names)
+    return reports
+
+
+def _pillars_query(rics: list, fiscal_year: int, pillars: list) -> tuple:
+    indicators = "\n            UNION ALL\n            ".join(
+        ESG_PILLAR_SELECT.format(pillar=pillar, table=ESG_PILLAR_TABLES[pillar])
+        for pillar in pillars
+    )
+    query = build_query(ESG_QUERY.format(indicators=indicators), rics=rics, fiscal_year=int(fiscal_year))
+    label = "getESGIndicators" if len(pillars) > 1 else f"getESG{pillars[0]}Indicator"
+    return query, label
+
+
+def _query_pillars(rics: list, fiscal_year: int, pillars: list) -> dict:
+    query, label = _pillars_query(rics, fiscal_year, pillars)
+    reports = _split_pillars(get_executor().query_to_records(query, label=label))
+    return {pillar: reports[pillar] for pillar in pillars}
+
+
+async def _query_pillars_async(rics: list, fiscal_year: int, pillars: list) -> dict:
+    query, label = _pillars_query(rics, fiscal_year, pillars)
+    records = await get_executor().query_to_records_async(query, label=label)
+    reports = await asyncio.to_thread(_split_pillars, records)
+    return {pillar: reports[pillar] for pillar in pillars}
+
+
+def _combined_key(rics: list, fiscal_year: int) -> str:
+    return make_key("esg_pillars", {"rics": rics, "fyscal_year": int(fiscal_year)})
+
+
+def _cache_pillars(key: str, reports: dict):
+    with _recent_pillars_lock:
+        _recent_pillars[key] = (time.monotonic() + config.esg_pillars_hold_seconds, reports)
+        _recent_pillars.move_to_end(key)
+        while len(_recent_pillars) > RECENT_PILLARS_MAX_ENTRIES:
+            _recent_pillars.popitem(last=False)
+    if config.result_cache_enabled:
+        get_result_cache().set(key, reports, config.result_cache_reference_ttl)
+
+
+def _cached_pillars(key: str):
+    with _recent_pillars_lock:
+        entry = _recent_pillars.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                return entry[1]
+            del _recent_pillars[key]
+    return get_result_cache().get(key) if config.result_cache_enabled else None
+
+
+def fetch_esg_pillar(rics: list, fiscal_year: int, pillar: str) -> dict:
+    """Returns the encoded report for one ESG pillar, as produced by encode_frame().
+
+    In combined mode all three pillars are fetched by one UNION'd query per (RIC set,
+    fiscal year). The split result is held in memory for config.esg_pillars_hold_seconds
+    (and in the result cache when it is enabled) so the sibling pillar tools read it
+    from there, and concurrent requests wait on the query already in flight instead
+    of starting their own.
+    """
+    rics = normalize_rics(rics)
+    if not config.esg_combined_fetch:
+        return _query_pillars(rics, fiscal_year, [pillar])[pillar]
+
+    key = _combined_key(rics, fiscal_year)
+
+    def fetch_all():
+        reports = _cached_pillars(key)
+        if reports is None:
+            reports = _query_pillars(rics, fiscal_year, list(ESG_PILLAR_TABLES))
+            _cache_pillars(key, reports)
+        return reports
+
+    return _single_flight.do(key, fetch_all)[pillar]
+
+
+async def fetch_esg_pillar_async(rics: list, fiscal_year: int, pillar: str) -> dict:
+    """Async version of fetch_esg_pillar(), sharing its cache and in-flight queries."""
+    rics = normalize_rics(rics)
+    if not config.esg_combined_fetch:
+        return (await _query_pillars_async(rics, fiscal_year, [pillar]))[pillar]
+
+    key = _combined_key(rics, fiscal_year)
+
+    async def fetch_all():
+        reports = _cached_pillars(key)
+        if reports is None:
+            reports = await _query_pillars_async(rics, fiscal_year, list(ESG_PILLAR_TABLES))
+            _cache_pillars(key, reports)
+        return reports
+
+    return (await _single_flight.do_async(key, fetch_all))[pillar]
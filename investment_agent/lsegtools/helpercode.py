@@ -2,10 +2,11 @@ import requests
 from bs4 import BeautifulSoup
 import tempfile
 import logging
-from google.cloud import secretmanager
 import google.auth
 import datetime
+import functools
 import hashlib
+from ..config import config
 
 
 logger = logging.getLogger("MarketMind")
@@ -27,7 +28,7 @@ def get_text_from_url(url):
             'sec-fetch-user': '?1',
             'upgrade-insecure-requests': '1',
         }
-        response = requests.get(url, headers=request_header)
+        response = requests.get(url, headers=request_header, timeout=config.filing_timeout)
         response.raise_for_status()  # Raise an exception for bad status codes (4xx or 5xx)
 
         soup = BeautifulSoup(response.content, "html.parser")
@@ -35,7 +36,7 @@ def get_text_from_url(url):
         return text
     
     except requests.exceptions.RequestException as e:
-        print(f"Error fetching URL: {e}")
+        logger.warning(f"Error fetching URL: {e}")
         return ""
     
 
@@ -45,7 +46,8 @@ def access_secret_version(project_id, secret_id, version_id="latest"):
     can be a version number as a string (e.g. "5") or an alias (e.g. "latest").
     """
 
-    # Create the Secret Manager client.
+    # Create the Secret Manager client, imported here as it is slow to load and rarely needed.
+    from google.cloud import secretmanager
     client = secretmanager.SecretManagerServiceClient()
 
     # Build the resource name of the secret version.
@@ -54,7 +56,6 @@ def access_secret_version(project_id, secret_id, version_id="latest"):
     # Access the secret version.
     response = client.access_secret_version(request={"name": name})
 
-    logger.warning(response.payload.data.decode("UTF-8"))
     # Return the decoded payload.
     return response.payload.data.decode("UTF-8")
 
@@ -74,8 +75,9 @@ def create_temp_credentials_file(credentials_json):
     return temp_file_path
 
 
+@functools.lru_cache(maxsize=None)
 def get_project_id():
-    """Gets the current GCP project ID.
+    """Gets the current GCP project ID, resolving the default credentials once.
 
     Returns:
         The project ID as a string.
@@ -0,0 +1,101 @@
+import base64
+import binascii
+import json
+import logging
+
+from ..config import config
+from .queryexecutor import get_executor
+
+logger = logging.getLogger("MarketMind")
+
+
+class ProjectionError(ValueError):
+    """Raised when a tool asks for columns the table doesn't have."""
+
+
+# Column types left out when the default columns don't match the schema: binary, nested and
+# repeated values are large and unreadable in a report
+LARGE_FIELD_TYPES = {"BYTES", "JSON", "RECORD", "STRUCT", "GEOGRAPHY"}
+
+# Tables whose missing default columns have been logged
+_reported_tables = set()
+
+
+def _compact_columns(table_id: str) -> list:
+    """Returns the table's columns without the large ones, or all of them if every column is large."""
+    fields = get_executor().get_table_fields(table_id)
+    excluded = {name.lower() for name in config.projection_excluded_columns}
+    compact = [name for name, field_type, mode in fields
+               if field_type not in LARGE_FIELD_TYPES and mode != "REPEATED" and name.lower() not in excluded]
+    return compact or [name for name, _, _ in fields]
+
+
+def resolve_columns(table_id: str, requested: list, defaults: list) -> list:
+    """Maps requested (or default) column names onto the table's actual columns.
+
+    Names are matched case-insensitively against the live table schema. Requested
+    columns that don't exist raise a ProjectionError listing the available ones.
+    When some default columns are missing from the schema, the defaults don't
+    describe this table: the missing ones are logged once, and the defaults that
+    exist are followed by the rest of the table's columns, without the large ones
+    (LARGE_FIELD_TYPES, repeated fields and config.projection_excluded_columns), so
+    no column the full select used to return is lost.
+
+    Returns:
+        list: the table's column names to select, in the requested order.
+    """
+    available = get_executor().get_table_columns(table_id)
+    by_name = {name.lower(): name for name in available}
+    if requested:
+        unknown = [name for name in requested if str(name).strip().lower() not in by_name]
+        if unknown:
+            raise ProjectionError(f"Unknown columns {unknown}, available columns are {available}")
+        names = requested
+    else:
+        names = [name for name in defaults if name.lower() in by_name]
+        missing = [name for name in defaults if name.lower() not in by_name]
+        if missing:
+            if table_id not in _reported_tables:
+                _reported_tables.add(table_id)
+                logger.warning(f"Default columns {missing} are not in {table_id}, "
+                               f"selecting its columns {available} without the large ones")
+            names += _compact_columns(table_id)
+    return list(dict.fromkeys(by_name[str(name).strip().lower()] for name in names))
+
+
+def select_list(alias: str, columns: list) -> str:
+    return ", ".join(f"{alias}.`{name}`" for name in columns)
+
+
+def page_size_or_default(page_size: int) -> int:
+    if not page_size or page_size <= 0:
+        return config.tool_page_size
+    return min(int(page_size), config.tool_max_page_size)
+
+
+def encode_page_token(offset: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"offset": offset}).encode("utf-8")).decode("ascii")
+
+
+def decode_page_token(page_token: str) -> int:
+    """Returns the row offset held in a page token, 0 for an empty token.
+
+    Raises:
+        ProjectionError: if the token wasn't produced by encode_page_token().
+    """
+    if not page_token:
+        return 0
+    try:
+        offset = json.loads(base64.urlsafe_b64decode(page_token.encode("ascii")))["offset"]
+    except (binascii.Error, ValueError, KeyError, TypeError, UnicodeEncodeError):
+        raise ProjectionError(f"Invalid page token {page_token}")
+    if not isinstance(offset, int) or offset < 0:
+        raise ProjectionError(f"Invalid page token {page_token}")
+    return offset
+
+
+def page_result(records: list, page_size: int, offset: int) -> tuple:
+    """Splits a LIMIT page_size + 1 result into the page and the token for the next one."""
+    if len(records) > page_size:
+        return records[:page_size], encode_page_token(offset + page_size)
+    return records, ""
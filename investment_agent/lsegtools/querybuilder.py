@@ -0,0 +1,87 @@
+import datetime
+from dataclasses import dataclass, field
+
+from .resultcache import normalize_date, normalize_rics
+
+
+def canonical_sql(sql: str) -> str:
+    """Strips indentation and blank lines so the same template always yields the same text."""
+    return "\n".join(line.strip() for line in sql.strip().splitlines() if line.strip())
+
+
+def _parameter(name: str, value):
+    # google.cloud.bigquery loads pandas and pyarrow, import it on first query rather than with the agent
+    from google.cloud.bigquery import ArrayQueryParameter, ScalarQueryParameter
+
+    if name == "rics":
+        return ArrayQueryParameter("rics", "STRING", normalize_rics(value))
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=datetime.timezone.utc)
+        return ScalarQueryParameter(name, "TIMESTAMP", value)
+    if isinstance(value, datetime.date):
+        return ScalarQueryParameter(name, "DATE", value)
+    if isinstance(value, bool):
+        return ScalarQueryParameter(name, "BOOL", value)
+    if isinstance(value, int):
+        return ScalarQueryParameter(name, "INT64", value)
+    if isinstance(value, float):
+        return ScalarQueryParameter(name, "FLOAT64", value)
+    if isinstance(value, (list, tuple)):
+        return ArrayQueryParameter(name, "STRING", sorted({str(item) for item in value}))
+    return ScalarQueryParameter(name, "STRING", str(value))
+
+
+@dataclass
+class Query:
+    """A canonical SQL text plus its typed query parameters."""
+
+    sql: str
+    parameters: list = field(default_factory=list)
+
+    def job_config(self, **kwargs) -> "QueryJobConfig":
+        from google.cloud.bigquery import QueryJobConfig
+
+        return QueryJobConfig(**{"query_parameters": self.parameters, "use_query_cache": True, **kwargs})
+
+
+def build_query(template: str, **params) -> Query:
+    """Builds a parameterized query that is byte-identical for equivalent requests.
+
+    The SQL text is canonicalized and never has values formatted into it, `rics` becomes
+    a sorted, de-duplicated ARRAY<STRING> parameter, datetimes become TIMESTAMP and dates
+    DATE parameters, so BigQuery's result cache sees the same query for the same data.
+
+    Args:
+        template (str): The SQL, referencing values as @name query parameters.
+        **params: The parameter values by name.
+
+    Returns:
+        Query: the canonical SQL and its parameters, sorted by name.
+    """
+    return Query(
+        sql=canonical_sql(template),
+        parameters=[_parameter(name, params[name]) for name in sorted(params)],
+    )
+
+
+def day_bounds(start_date: datetime.date, end_date: datetime.date) -> tuple:
+    """Returns the half-open [start, end) UTC timestamp range covering whole days.
+
+    The end bound is midnight after end_date, so filters are written as
+    `col >= @start_ts AND col < @end_ts` on the bare partitioning column, which
+    BigQuery can use to prune partitions.
+    """
+    start = datetime.datetime.combine(start_date, datetime.time.min, tzinfo=datetime.timezone.utc)
+    end = datetime.datetime.combine(end_date + datetime.timedelta(days=1), datetime.time.min, tzinfo=datetime.timezone.utc)
+    return start, end
+
+
+def parse_date_range(start_date, end_date) -> tuple:
+    """Parses a tool's start/end date arguments into datetime.date objects.
+
+    Raises:
+        ValueError: if either date can't be parsed.
+    """
+    return (datetime.date.fromisoformat(normalize_date(start_date)),
+            datetime.date.fromisoformat(normalize_date(end_date)))
@@ -0,0 +1,361 @@
+import asyncio
+import functools
+import importlib
+import logging
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import google.auth
+from google.auth.transport.requests import AuthorizedSession
+import requests
+
+from ..config import config
+from .querybuilder import Query
+from .resultencoding import encode_arrow_batches, encode_frame
+
+logger = logging.getLogger("MarketMind")
+
+BIGQUERY_SCOPES = ["https://www.googleapis.com/auth/cloud-platform"]
+
+
+@functools.lru_cache(maxsize=None)
+def _optional_module(name: str):
+    """Imports a module on first use, or returns None when it isn't installed.
+
+    The BigQuery client libraries pull in pandas and pyarrow, so they are loaded with
+    the first query instead of when the agent is imported.
+    """
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+
+class QueryExecutor:
+    """Runs the LSEG BigQuery jobs through one long-lived, pooled client.
+
+    The client, its credentials and its HTTP connection pool are created on first use
+    and shared by every tool call afterwards, so the parallel data agents reuse warm
+    connections instead of paying for auth and TLS setup on every query.
+    """
+
+    def __init__(self, project_id: str = None, max_workers: int = None):
+        self._project_id = project_id
+        self._max_workers = max_workers or config.bigquery_max_workers
+        self._client = None
+        self._credentials = None
+        self._bqstorage_client = None
+        self._pool = None
+        # asyncio primitives belong to one event loop, so each loop gets its own semaphore
+        self._async_limits = weakref.WeakKeyDictionary()
+        self._table_fields = {}
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {}
+
+    @property
+    def client(self) -> "google.cloud.bigquery.Client":
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._create_client()
+        return self._client
+
+    def _create_client(self) -> "google.cloud.bigquery.Client":
+        from google.cloud import bigquery
+
+        credentials, default_project = google.auth.default(scopes=BIGQUERY_SCOPES)
+        self._credentials = credentials
+        session = AuthorizedSession(credentials)
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=self._max_workers, pool_maxsize=self._max_workers
+        )
+        session.mount("https://", adapter)
+        return bigquery.Client(
+            project=self._project_id or default_project,
+            credentials=credentials,
+            _http=session,
+        )
+
+    @property
+    def arrow_enabled(self) -> bool:
+        # the Arrow fetch path is optional
+        return config.bigquery_arrow_fetch and _optional_module("pyarrow") is not None
+
+    @property
+    def bqstorage_client(self):
+        """The shared Storage Read API client, or None when it isn't installed."""
+        # without the Storage Read API results are paged through REST
+        bigquery_storage = _optional_module("google.cloud.bigquery_storage")
+        if bigquery_storage is None:
+            return None
+        if self._bqstorage_client is None:
+            self.client  # creating the client resolves the shared credentials
+            with self._lock:
+                if self._bqstorage_client is None:
+                    self._bqstorage_client = bigquery_storage.BigQueryReadClient(credentials=self._credentials)
+        return self._bqstorage_client
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self._max_workers, thread_name_prefix="bigquery"
+                    )
+        return self._pool
+
+    def _async_semaphore(self) -> asyncio.Semaphore:
+        """Returns the semaphore of the running event loop, creating it on first use."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._async_limits.get(loop)
+            if semaphore is None:
+                semaphore = self._async_limits[loop] = asyncio.Semaphore(config.bigquery_async_concurrency)
+        return semaphore
+
+    def run(self, query, job_config=None, label: str = "query"):
+        """Runs a query and blocks until its rows are available.
+
+        Args:
+            query (Query | str): The query from build_query(), or plain SQL.
+            job_config (QueryJobConfig): Optional job configuration, ignored for Query objects.
+            label (str): The name the timing stats are recorded under, usually the tool name.
+
+        Returns:
+            RowIterator: the rows of the finished job.
+        """
+        if isinstance(query, Query):
+            query, job_config = query.sql, query.job_config()
+        start = time.perf_counter()
+        try:
+            query_job = self.client.query(query, job_config=job_config)
+            rows = query_job.result()
+        except Exception:
+            self._record(label, time.perf_counter() - start, error=True)
+            raise
+        self._record(
+            label,
+            time.perf_counter() - start,
+            bytes_processed=query_job.total_bytes_processed or 0,
+            cache_hit=bool(query_job.cache_hit),
+        )
+        return rows
+
+    def query_to_dataframe(self, query, job_config=None, label: str = "query"):
+        """Runs a query and returns its rows as a pandas DataFrame."""
+        rows = self.run(query, job_config=job_config, label=label)
+        start = time.perf_counter()
+        df = rows.to_dataframe()
+        self._record(label, time.perf_counter() - start, fetch=True)
+        return df
+
+    def query_to_records(self, query, job_config=None, label: str = "query") -> list:
+        """Runs a query and returns its rows as a list of dicts, through Arrow when available."""
+        rows = self.run(query, job_config=job_config, label=label)
+        return self._rows_to_records(rows, label)
+
+    def _rows_to_records(self, rows, label: str) -> list:
+        start = time.perf_counter()
+        if self.arrow_enabled:
+            records = []
+            for batch in rows.to_arrow_iterable(bqstorage_client=self.bqstorage_client):
+                records.extend(batch.to_pylist())
+        else:
+            records = rows.to_dataframe().to_dict("records")
+        self._record(label, time.perf_counter() - start, fetch=True)
+        return records
+
+    def query_encoded(self, query, job_config=None, label: str = "query", encoding: str = None,
+                      float_digits: dict = None) -> dict:
+        """Runs a query and returns its encoded report (see resultencoding.encode_frame).
+
+        With pyarrow installed the rows are read as Arrow record batches, through the
+        Storage Read API for large results, and encoded batch by batch without building
+        a DataFrame. Otherwise the rows go through to_dataframe().
+        """
+        rows = self.run(query, job_config=job_config, label=label)
+        return self._encode_rows(rows, label, encoding, float_digits)
+
+    def _encode_rows(self, rows, label: str, encoding: str = None, float_digits: dict = None) -> dict:
+        start = time.perf_counter()
+        if self.arrow_enabled:
+            batches = rows.to_arrow_iterable(bqstorage_client=self.bqstorage_client)
+            encoded = encode_arrow_batches(batches, encoding=encoding, float_digits=float_digits)
+        else:
+            encoded = encode_frame(rows.to_dataframe(), encoding=encoding, float_digits=float_digits)
+        self._record(label, time.perf_counter() - start, fetch=True)
+        return encoded
+
+    async def run_async(self, query, job_config=None, label: str = "query"):
+        """Runs a query without blocking the event loop or a thread while the job executes.
+
+        The job is inserted and its status polled through the worker pool, with the event
+        loop sleeping between polls (config.bigquery_poll_interval, doubling up to
+        config.bigquery_max_poll_interval). At most config.bigquery_async_concurrency
+        jobs run at once per event loop.
+
+        Returns:
+            RowIterator: the rows of the finished job.
+        """
+        if isinstance(query, Query):
+            query, job_config = query.sql, query.job_config()
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        async with self._async_semaphore():
+            start = time.perf_counter()
+            try:
+                query_job = await loop.run_in_executor(
+                    pool, functools.partial(self.client.query, query, job_config=job_config))
+                interval = config.bigquery_poll_interval
+                while not await loop.run_in_executor(pool, query_job.done):
+                    await asyncio.sleep(interval)
+                    interval = min(interval * 2, config.bigquery_max_poll_interval)
+                rows = await loop.run_in_executor(pool, query_job.result)
+            except Exception:
+                self._record(label, time.perf_counter() - start, error=True)
+                raise
+        self._record(
+            label,
+            time.perf_counter() - start,
+            bytes_processed=query_job.total_bytes_processed or 0,
+            cache_hit=bool(query_job.cache_hit),
+        )
+        return rows
+
+    async def query_to_records_async(self, query, job_config=None, label: str = "query") -> list:
+        """Async version of query_to_records()."""
+        rows = await self.run_async(query, job_config=job_config, label=label)
+        return await asyncio.get_running_loop().run_in_executor(
+            self._get_pool(), self._rows_to_records, rows, label)
+
+    async def query_encoded_async(self, query, job_config=None, label: str = "query", encoding: str = None,
+                                  float_digits: dict = None) -> dict:
+        """Async version of query_encoded()."""
+        rows = await self.run_async(query, job_config=job_config, label=label)
+        return await asyncio.get_running_loop().run_in_executor(
+            self._get_pool(), self._encode_rows, rows, label, encoding, float_digits)
+
+    def dry_run(self, query, label: str = "dry_run") -> int:
+        """Validates a query without running it and returns the bytes it would process."""
+        if isinstance(query, Query):
+            query, job_config = query.sql, query.job_config(dry_run=True, use_query_cache=False)
+        else:
+            from google.cloud.bigquery import QueryJobConfig
+
+            job_config = QueryJobConfig(dry_run=True, use_query_cache=False)
+        query_job = self.client.query(query, job_config=job_config)
+        bytes_processed = query_job.total_bytes_processed or 0
+        logger.info(f"{label}: dry run would process {bytes_processed} bytes")
+        return bytes_processed
+
+    def get_table_fields(self, table_id: str) -> list:
+        """Returns a table's (column name, field type, mode) triples, looked up once per process."""
+        fields = self._table_fields.get(table_id)
+        if fields is None:
+            fields = [(schema_field.name, schema_field.field_type, schema_field.mode)
+                      for schema_field in self.client.get_table(table_id).schema]
+            with self._lock:
+                self._table_fields[table_id] = fields
+        return fields
+
+    def get_table_columns(self, table_id: str) -> list:
+        """Returns a table's column names, looked up once per process."""
+        return [name for name, _, _ in self.get_table_fields(table_id)]
+
+    def benchmark_fetch_paths(self, query, repeats: int = 3, encoding: str = None) -> dict:
+        """Times the to_dataframe().to_json() path against the Arrow encoding path.
+
+        The query runs once; each repeat re-reads the finished job's results, so only
+        the fetch and encoding costs are compared. The best time of each path is kept.
+
+        Returns:
+            dict: rows, seconds and output bytes for each path.
+        """
+        if not self.arrow_enabled:
+            raise RuntimeError("pyarrow is required to benchmark the Arrow fetch path")
+        if isinstance(query, Query):
+            query, job_config = query.sql, query.job_config()
+        else:
+            job_config = None
+        query_job = self.client.query(query, job_config=job_config)
+        row_count = query_job.result().total_rows
+
+        dataframe_seconds = arrow_seconds = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            dataframe_report = query_job.result().to_dataframe().to_json()
+            dataframe_seconds = min(dataframe_seconds, time.perf_counter() - start)
+
+            start = time.perf_counter()
+            batches = query_job.result().to_arrow_iterable(bqstorage_client=self.bqstorage_client)
+            arrow_report = encode_arrow_batches(batches, encoding=encoding)
+            arrow_seconds = min(arrow_seconds, time.perf_counter() - start)
+
+        results = {
+            "rows": row_count,
+            "dataframe_json_seconds": dataframe_seconds,
+            "dataframe_json_bytes": len(dataframe_report.encode("utf-8")),
+            "arrow_seconds": arrow_seconds,
+            "arrow_bytes": arrow_report["report_bytes"],
+            "arrow_encoding": arrow_report["encoding"],
+            "storage_read_api": self.bqstorage_client is not None,
+        }
+        logger.info(f"Fetch path benchmark: {results}")
+        return results
+
+    def submit(self, query, job_config=None, label: str = "query"):
+        """Submits a query to the shared worker pool.
+
+        Returns:
+            Future: resolves to the RowIterator returned by run().
+        """
+        return self._get_pool().submit(self.run, query, job_config, label)
+
+    def _record(self, label, seconds, bytes_processed=0, cache_hit=False, error=False, fetch=False):
+        with self._stats_lock:
+            stats = self._stats.setdefault(label, {
+                "calls": 0,
+                "errors": 0,
+                "cache_hits": 0,
+                "bytes_processed": 0,
+                "query_seconds": 0.0,
+                "max_query_seconds": 0.0,
+                "fetch_seconds": 0.0,
+            })
+            if fetch:
+                stats["fetch_seconds"] += seconds
+            else:
+                stats["calls"] += 1
+                stats["errors"] += int(error)
+                stats["cache_hits"] += int(cache_hit)
+                stats["bytes_processed"] += bytes_processed
+                stats["query_seconds"] += seconds
+                stats["max_query_seconds"] = max(stats["max_query_seconds"], seconds)
+        if not fetch:
+            logger.info("%s: BigQuery job took %.3fs (%d bytes, cache_hit=%s, error=%s)",
+                        label, seconds, bytes_processed, cache_hit, error)
+
+    def get_stats(self) -> dict:
+        """Returns per-label call counts, bytes processed and timings."""
+        with self._stats_lock:
+            snapshot = {label: dict(stats) for label, stats in self._stats.items()}
+        for stats in snapshot.values():
+            stats["avg_query_seconds"] = stats["query_seconds"] / stats["calls"] if stats["calls"] else 0.0
+        return snapshot
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> QueryExecutor:
+    """Returns the process-wide QueryExecutor shared by all LSEG tools."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = QueryExecutor()
+    return _executor
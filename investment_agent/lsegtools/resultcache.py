@@ -0,0 +1,300 @@
+import datetime
+import functools
+import gzip
+import hashlib
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from ..config import config
+
+logger = logging.getLogger("MarketMind")
+
+# Numeric day-first or month-first dates (01/02/2025) are ambiguous and are left unparsed
+DATE_FORMATS = ["%Y-%m-%d", "%Y/%m/%d", "%Y%m%d", "%d %B %Y", "%B %d, %Y", "%d %b %Y", "%b %d, %Y"]
+
+
+def utc_today() -> datetime.date:
+    """Returns today's UTC date, the day the LSEG query bounds (DATE of UTC timestamps) are in."""
+    return datetime.datetime.now(datetime.timezone.utc).date()
+
+
+def normalize_date(value):
+    """Returns a date as a canonical YYYY-MM-DD string, or the stripped input if it can't be parsed."""
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.strftime("%Y-%m-%d")
+    text = str(value).strip()
+    for candidate in (text, text[:10]):
+        for date_format in DATE_FORMATS:
+            try:
+                return datetime.datetime.strptime(candidate, date_format).strftime("%Y-%m-%d")
+            except ValueError:
+                continue
+    return text
+
+
+def normalize_rics(rics):
+    """Returns RICs stripped, de-duplicated and sorted.
+
+    RICs are case-sensitive (RDSa.L is a share class of its own), so the case is kept.
+    """
+    if isinstance(rics, str):
+        rics = rics.split(",")
+    return sorted({str(ric).strip() for ric in rics if str(ric).strip()})
+
+
+def normalize_arguments(arguments: dict) -> dict:
+    """Canonicalizes tool arguments so equivalent requests share a cache key."""
+    normalized = {}
+    for name, value in arguments.items():
+        if name == "rics":
+            normalized[name] = normalize_rics(value)
+        elif name.endswith("_date"):
+            normalized[name] = normalize_date(value)
+        else:
+            normalized[name] = value
+    return normalized
+
+
+def make_key(tool_name: str, arguments: dict) -> str:
+    return json.dumps({"tool": tool_name, "args": normalize_arguments(arguments)}, sort_keys=True, default=str)
+
+
+def ttl_for(arguments: dict) -> int:
+    """Picks a TTL for a tool call based on the window it covers.
+
+    Windows that end before today only touch immutable history and are kept for a long
+    time, windows that include today can still change, and calls without a date range
+    (company details, ESG) use the reference-data TTL.
+    """
+    window_dates = [normalize_date(value) for name, value in arguments.items() if name.endswith("_date")]
+    if not window_dates:
+        return config.result_cache_reference_ttl
+    today = utc_today().isoformat()
+    if any(len(value) != 10 or value >= today for value in window_dates):
+        return config.result_cache_live_ttl
+    return config.result_cache_historical_ttl
+
+
+class ResultCache:
+    """Two-tier cache for tool results: an in-memory LRU in front of a gzip'd on-disk store.
+
+    The disk tier is swept on the first write and every SWEEP_INTERVAL writes after
+    that: files older than the longest TTL are removed, then the oldest files until
+    the store is back under config.result_cache_max_disk_bytes.
+    """
+
+    SWEEP_INTERVAL = 64
+
+    def __init__(self, max_entries: int = None, cache_dir: str = None, max_disk_bytes: int = None):
+        self._max_entries = max_entries or config.result_cache_max_entries
+        self._cache_dir = cache_dir or config.result_cache_dir
+        self._max_disk_bytes = max_disk_bytes or config.result_cache_max_disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes_since_sweep = None
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "expired": 0, "swept": 0}
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._cache_dir, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json.gz")
+
+    def _count(self, stat: str):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+                self._stats["expired"] += 1
+
+        entry = self._read_disk(key)
+        if entry is not None and entry["expires_at"] > now:
+            self._remember(key, entry["expires_at"], entry["value"])
+            self._count("disk_hits")
+            return entry["value"]
+        if entry is not None:
+            self._count("expired")
+            self._remove_file(self._path(key))
+
+        self._count("misses")
+        return None
+
+    def set(self, key: str, value, ttl: int):
+        expires_at = time.time() + ttl
+        self._remember(key, expires_at, value)
+        self._write_disk(key, {"key": key, "expires_at": expires_at, "value": value})
+        self._count("stores")
+        with self._lock:
+            due = self._writes_since_sweep is None or self._writes_since_sweep >= self.SWEEP_INTERVAL
+            self._writes_since_sweep = 0 if due else self._writes_since_sweep + 1
+        if due:
+            self.sweep()
+
+    def _remember(self, key, expires_at, value):
+        with self._lock:
+            self._memory[key] = (expires_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self._max_entries:
+                self._memory.popitem(last=False)
+
+    def _read_disk(self, key):
+        try:
+            with gzip.open(self._path(key), "rt", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get("key") == key else None
+
+    def _write_disk(self, key, entry):
+        path = self._path(key)
+        try:
+            os.makedirs(self._cache_dir, exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with gzip.open(temp_path, "wt", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(temp_path, path)
+        except (OSError, TypeError) as e:
+            logger.warning(f"Could not write result cache entry: {e}")
+
+    @staticmethod
+    def _remove_file(path) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    def sweep(self):
+        """Removes disk entries past the longest TTL, then the oldest ones over the size bound."""
+        try:
+            names = [name for name in os.listdir(self._cache_dir) if name.endswith(".json.gz")]
+        except OSError:
+            return
+        files = []
+        for name in names:
+            path = os.path.join(self._cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        max_ttl = max(config.result_cache_historical_ttl, config.result_cache_live_ttl, config.result_cache_reference_ttl)
+        oldest_kept = time.time() - max_ttl
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        swept = 0
+        for mtime, size, path in files:
+            if mtime >= oldest_kept and total <= self._max_disk_bytes:
+                break
+            if self._remove_file(path):
+                total -= size
+                swept += 1
+        if swept:
+            with self._lock:
+                self._stats["swept"] += swept
+            logger.info(f"Result cache: swept {swept} disk entries, {total} bytes left")
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if os.path.isdir(self._cache_dir):
+            for name in os.listdir(self._cache_dir):
+                if name.endswith(".json.gz"):
+                    os.remove(os.path.join(self._cache_dir, name))
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """Returns the process-wide ResultCache used by the tickhistory tools."""
+    global _result_cache
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                _result_cache = ResultCache()
+    return _result_cache
+
+
+def cache_results(func, get_cache, key_for, ttl_for, enabled, cache_name: str):
+    """Wraps a tool so its successful results are served from and stored in a cache.
+
+    The wrapper keeps the wrapped function's name, signature and docstring so ADK
+    exposes the tool exactly as before. Async tools get an async wrapper.
+
+    Args:
+        func (callable): The tool.
+        get_cache (callable): Returns the cache, an object with get(key) and set(key, value, ttl).
+        key_for (callable): Builds the key from the tool name and its bound arguments.
+        ttl_for (callable): Returns the TTL in seconds of a result, from the bound arguments.
+        enabled (callable): Returns whether the cache is on, read on every call.
+        cache_name (str): The cache name for the log.
+    """
+    signature = inspect.signature(func)
+
+    def lookup(args, kwargs) -> tuple:
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = dict(bound.arguments)
+        key = key_for(func.__name__, arguments)
+        result = get_cache().get(key)
+        if result is not None:
+            logger.info(f"{func.__name__}: served from {cache_name}")
+            result = dict(result)
+        return key, arguments, result
+
+    def store(key, arguments, result):
+        if result.get("status") == "success":
+            get_cache().set(key, result, ttl_for(arguments))
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            if not enabled():
+                return await func(*args, **kwargs)
+            key, arguments, result = lookup(args, kwargs)
+            if result is None:
+                result = await func(*args, **kwargs)
+                store(key, arguments, result)
+            return result
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not enabled():
+            return func(*args, **kwargs)
+        key, arguments, result = lookup(args, kwargs)
+        if result is None:
+            result = func(*args, **kwargs)
+            store(key, arguments, result)
+        return result
+
+    return wrapper
+
+
+def cached_tool(func):
+    """Caches a tool's successful results under its normalized (tool, RICs, dates) key."""
+    return cache_results(func, get_result_cache, make_key, ttl_for,
+                         lambda: config.result_cache_enabled, "result cache")
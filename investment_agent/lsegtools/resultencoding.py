@@ -0,0 +1,208 @@
+import csv
+import datetime
+import decimal
+import io
+import json
+import math
+import sys
+
+from ..config import config
+
+ENCODINGS = ("columns", "csv", "json")
+# How to read the "report" of each encoding, given to the agents that analyse the results
+ENCODING_NOTES = {
+    "columns": (
+        'Each "report" is JSON in a column layout: "rows" is the row count, "columns" lists the column names '
+        'and "data" holds one array of values per column, where the n-th value of every array belongs to row n. '
+        'A column that also appears under "dictionaries" holds integer codes instead of strings: '
+        'the value of code k is the k-th entry of that column\'s dictionary. null means no value.'
+    ),
+    "csv": 'Each "report" is CSV text whose first line holds the column names.',
+    "json": 'Each "report" is JSON mapping each column name to an object of row index to value.',
+}
+
+
+def _is_nat(value) -> bool:
+    # pandas is imported on first DataFrame read, no value can be NaT before that
+    pandas = sys.modules.get("pandas")
+    return pandas is not None and value is pandas.NaT
+
+
+def _iso(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)) or _is_nat(value):
+        return None
+    if isinstance(value, datetime.datetime):
+        if value.time() == datetime.time.min and value.tzinfo is None:
+            return value.date().isoformat()
+        return value.isoformat()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return value
+
+
+def _round(value, digits):
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, float):
+        if math.isnan(value) or math.isinf(value):
+            return None
+        rounded = round(value, digits)
+        return int(rounded) if rounded.is_integer() else rounded
+    return value
+
+
+def plain_value(value, digits):
+    """Converts one value to a plain JSON value: rounded float, ISO date or None for nulls."""
+    value = _iso(value)
+    if isinstance(value, decimal.Decimal):
+        value = float(value)
+    if isinstance(value, float):
+        return _round(value, digits)
+    if value is not None and not isinstance(value, (str, int, bool)):
+        return str(value)
+    return value
+
+
+def _column_values(series, digits):
+    """Converts a column to plain JSON values: rounded floats, ISO dates, None for nulls."""
+    import pandas as pd
+
+    if pd.api.types.is_datetime64_any_dtype(series):
+        if (series.dropna().dt.normalize() == series.dropna()).all():
+            values = series.dt.strftime("%Y-%m-%d")
+        else:
+            values = series.dt.strftime("%Y-%m-%dT%H:%M:%S.%f")
+        return [None if pd.isna(value) else value for value in values.tolist()]
+    if pd.api.types.is_float_dtype(series):
+        return [_round(value, digits) for value in series.tolist()]
+    if pd.api.types.is_integer_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return [None if pd.isna(value) else value for value in series.astype(object).tolist()]
+    return [plain_value(value, digits) for value in series.astype(object).tolist()]
+
+
+def _dictionary_encode(values):
+    """Returns (dictionary, codes) when a string column repeats enough to be worth it."""
+    strings = [value for value in values if value is not None]
+    if len(values) < 4 or not strings or not all(isinstance(value, str) for value in strings):
+        return None
+    dictionary = sorted(set(strings))
+    if len(dictionary) > len(values) // 2:
+        return None
+    index = {value: code for code, value in enumerate(dictionary)}
+    return dictionary, [None if value is None else index[value] for value in values]
+
+
+def encode_columns(columns: dict, row_count: int) -> str:
+    """Encodes plain column arrays as compact JSON, dictionary-encoding repeated strings.
+
+    The layout is {"rows": n, "columns": [...], "data": {col: [...]}, "dictionaries":
+    {col: [...]}}; a column listed in "dictionaries" holds indexes into its dictionary.
+    """
+    data = {}
+    dictionaries = {}
+    for name, values in columns.items():
+        encoded = _dictionary_encode(values)
+        if encoded is None:
+            data[name] = values
+        else:
+            dictionaries[name], data[name] = encoded
+    payload = {"rows": row_count, "columns": list(columns), "data": data}
+    if dictionaries:
+        payload["dictionaries"] = dictionaries
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+
+
+def encode_csv(columns: dict) -> str:
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator="\n")
+    writer.writerow(list(columns))
+    writer.writerows(zip(*columns.values()))
+    return output.getvalue()
+
+
+def _encoded(report: str, encoding: str) -> dict:
+    return {"report": report, "encoding": encoding, "report_bytes": len(report.encode("utf-8"))}
+
+
+def describe_encoding(encoding: str = None) -> str:
+    """Returns how to read the reports of an encoding, by default config.result_encoding."""
+    return ENCODING_NOTES[_check_encoding(encoding)]
+
+
+def _check_encoding(encoding: str) -> str:
+    encoding = encoding or config.result_encoding
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown result encoding {encoding}, expected one of {ENCODINGS}")
+    return encoding
+
+
+def encode_column_arrays(columns: dict, row_count: int, encoding: str = None) -> dict:
+    """Encodes plain column arrays (already rounded) with the "columns" or "csv" encoding."""
+    encoding = _check_encoding(encoding)
+    if encoding == "columns":
+        return _encoded(encode_columns(columns, row_count), encoding)
+    if encoding == "csv":
+        return _encoded(encode_csv(columns), encoding)
+    import pandas as pd
+
+    return _encoded(pd.DataFrame(columns, columns=list(columns)).to_json(), encoding)
+
+
+def encode_records(records: list, column_names: list, encoding: str = None, float_digits: dict = None) -> dict:
+    """Encodes a list of row dicts without building a DataFrame."""
+    float_digits = float_digits or {}
+    columns = {
+        name: [plain_value(record.get(name), float_digits.get(name, config.result_float_digits)) for record in records]
+        for name in column_names
+    }
+    return encode_column_arrays(columns, len(records), encoding)
+
+
+def encode_arrow_batches(batches, encoding: str = None, float_digits: dict = None) -> dict:
+    """Encodes Arrow record batches straight into the report, without pandas.
+
+    Args:
+        batches (iterable): pyarrow RecordBatches, e.g. from RowIterator.to_arrow_iterable().
+        encoding (str): As for encode_frame().
+        float_digits (dict): As for encode_frame().
+
+    Returns:
+        dict: the encoded report, the encoding used and the report size in bytes.
+    """
+    encoding = _check_encoding(encoding)
+    float_digits = float_digits or {}
+    columns = None
+    row_count = 0
+    for batch in batches:
+        if columns is None:
+            columns = {name: [] for name in batch.schema.names}
+        for name, array in zip(batch.schema.names, batch.columns):
+            digits = float_digits.get(name, config.result_float_digits)
+            columns[name].extend(plain_value(value, digits) for value in array.to_pylist())
+        row_count += batch.num_rows
+    return encode_column_arrays(columns or {}, row_count, encoding)
+
+
+def encode_frame(df, encoding: str = None, float_digits: dict = None) -> dict:
+    """Encodes a query result for the report returned to the agents.
+
+    Args:
+        df (DataFrame): The query result.
+        encoding (str): "columns" (compact JSON column arrays), "csv", or "json" for the
+            legacy DataFrame.to_json() output. Defaults to config.result_encoding.
+        float_digits (dict): Optional per-column rounding, other float columns are rounded
+            to config.result_float_digits.
+
+    Returns:
+        dict: the encoded report, the encoding used and the report size in bytes.
+    """
+    encoding = _check_encoding(encoding)
+    if encoding == "json":
+        return _encoded(df.to_json(), encoding)
+
+    float_digits = float_digits or {}
+    columns = {
+        str(name): _column_values(df.iloc[:, position], float_digits.get(name, config.result_float_digits))
+        for position, name in enumerate(df.columns)
+    }
+    return encode_column_arrays(columns, len(df), encoding)
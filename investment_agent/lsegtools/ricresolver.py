@@ -0,0 +1,251 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+from google.adk.tools import AgentTool
+from pydantic import BaseModel, Field
+
+from ..config import config
+from .querybuilder import build_query
+from .queryexecutor import get_executor
+
+logger = logging.getLogger("MarketMind")
+
+COMPANY_INFO_TABLE = "genaillentsearch.LSEGQA202510.company_info_mpicmpinfo"
+
+RIC_ALIASES = {
+    "vodafone": "VOD.L",
+    "bt": "BT.L",
+    "british telecom": "BT.L",
+    "british telecommunications": "BT.L",
+}
+
+# The shape of a whole request that may itself be a RIC (VOD.L, RDSa.L); it is checked against LSEG before use
+RIC_SHAPE = re.compile(r"[A-Za-z0-9]{1,10}\.[A-Za-z]{1,3}")
+COMPANY_SUFFIXES = {"plc", "group", "ltd", "limited", "holdings", "inc", "corp", "corporation", "co", "the", "company"}
+REQUEST_FILLER = {"what", "is", "the", "ric", "rics", "code", "for", "of", "convert", "to", "get", "find", "stock",
+                  "on", "lse", "london", "exchange", "primary", "common", "please", "name", "symbol", "traded"}
+
+
+class RicLookup(BaseModel):
+    """The structured answer of symbol_to_ric_agent."""
+    company: str = Field(description="The company name as given in the request")
+    ric: str = Field(default="", description="The RIC of the company's common stock, empty if not found")
+
+
+def ric_from_result(result) -> str:
+    """Returns the ric field of a RIC lookup result, or "" when it has none."""
+    if isinstance(result, BaseModel):
+        result = result.model_dump()
+    if isinstance(result, dict):
+        return str(result.get("ric") or "").strip()
+    return ""
+
+
+def normalize_company_name(name: str) -> str:
+    """Lower-cases a company name and drops punctuation and legal suffixes such as plc or group."""
+    words = re.sub(r"[^a-z0-9& ]", " ", str(name).lower()).split()
+    while len(words) > 1 and words[-1] in COMPANY_SUFFIXES:
+        words.pop()
+    while len(words) > 1 and words[0] == "the":
+        words.pop(0)
+    return " ".join(words)
+
+
+def _candidate_names(request: str) -> list:
+    """Returns the lookup keys to try for a free-text request to the RIC agent."""
+    full = normalize_company_name(request)
+    stripped = normalize_company_name(" ".join(word for word in full.split() if word not in REQUEST_FILLER))
+    return [name for name in dict.fromkeys([full, stripped]) if name]
+
+
+class RicResolver:
+    """Resolves company names to RICs from an in-process and a persistent cache.
+
+    The cache is seeded with hard-coded aliases and, on the first miss, with the
+    company names of the LSEG company info table. Callers that miss while the seed
+    query runs wait for it, and a failed seed is retried after
+    config.ric_seed_retry_seconds. Names it still can't resolve are left to the LLM
+    agent, and the RICs it finds are learned for next time once the company info
+    table confirms them. Only the learned names are persisted. The lookups block on
+    BigQuery, so async callers run them in a thread.
+    """
+
+    def __init__(self, cache_path: str = None):
+        self._cache_path = cache_path or config.ric_cache_path
+        self._rics = {name: ric for name, ric in RIC_ALIASES.items()}
+        self._learned = {}  # the names learned from the agent, persisted to the cache file
+        self._lock = threading.Lock()
+        self._seed_lock = threading.Lock()
+        self._persist_lock = threading.Lock()
+        self._known_rics = {}  # RIC -> whether the company info table has it
+        self._loaded = False
+        self._seeded = False
+        self._seed_failed_at = None
+        self._stats = {"hits": 0, "misses": 0, "learned": 0}
+
+    def _load(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            try:
+                with open(self._cache_path, encoding="utf-8") as f:
+                    self._learned.update(json.load(f))
+            except (OSError, ValueError):
+                pass
+            self._rics.update(self._learned)
+            self._loaded = True
+
+    def _seed_from_lseg(self):
+        """Loads the LSE RICs and company names of the company info table, once per process.
+
+        Every string column with "name" in its name is used, as listed by the table schema.
+        Rows are read primary RIC first (by a column with "primary" in its name when the
+        table has one, else shortest RIC first), and each name keeps the first RIC read.
+        """
+        if self._seeded:
+            return
+        with self._seed_lock:
+            if self._seeded:
+                return
+            if self._seed_failed_at is not None and time.monotonic() - self._seed_failed_at < config.ric_seed_retry_seconds:
+                return
+            try:
+                executor = get_executor()
+                columns = executor.get_table_columns(COMPANY_INFO_TABLE)
+                name_columns = [name for name in columns if "name" in name.lower()]
+                if not name_columns:
+                    logger.warning(f"No company name column in the schema of {COMPANY_INFO_TABLE}, skipping RIC seeding")
+                    self._seeded = True
+                    return
+                names = ", ".join(f"`{name}`" for name in name_columns)
+                order = "".join(f"`{name}` DESC, " for name in columns if "primary" in name.lower())
+                records = executor.query_to_records(f"""### Obtain company names for LSE RICs, primary RICs first
+                    SELECT ric, {names} FROM `{COMPANY_INFO_TABLE}`
+                    WHERE ric LIKE '%.L'
+                    ORDER BY {order}LENGTH(ric), ric""", label="ricresolver_seed")
+            except Exception as e:
+                logger.warning(f"Could not seed the RIC cache from LSEG company info, retrying in "
+                               f"{config.ric_seed_retry_seconds}s: {e}")
+                self._seed_failed_at = time.monotonic()
+                return
+            with self._lock:
+                for record in records:
+                    self._known_rics[record["ric"]] = True
+                    for name in name_columns:
+                        if isinstance(record.get(name), str) and record[name].strip():
+                            self._rics.setdefault(normalize_company_name(record[name]), record["ric"])
+            self._seeded = True
+        logger.info(f"Seeded the RIC cache with {len(records)} LSEG companies from {name_columns}")
+
+    def is_known_ric(self, ric: str) -> bool:
+        """Returns whether the LSEG company info table has the RIC, looked up once per RIC."""
+        with self._lock:
+            known = self._known_rics.get(ric)
+        if known is not None:
+            return known
+        try:
+            records = get_executor().query_to_records(build_query(f"""### Check a RIC
+                SELECT ric FROM `{COMPANY_INFO_TABLE}` WHERE ric = @ric LIMIT 1""", ric=ric), label="ricresolver_check")
+        except Exception as e:
+            logger.warning(f"Could not check {ric} against LSEG company info: {e}")
+            return False
+        with self._lock:
+            self._known_rics[ric] = bool(records)
+        return bool(records)
+
+    def _lookup(self, request: str):
+        for name in _candidate_names(request):
+            ric = self._rics.get(name)
+            if ric:
+                return ric
+        return None
+
+    def resolve(self, request: str):
+        """Returns the cached RIC for a company name or request text, or None on a miss."""
+        request = str(request).strip()
+        if RIC_SHAPE.fullmatch(request) and self.is_known_ric(request):
+            return request
+        self._load()
+        ric = self._lookup(request)
+        if ric is None:
+            self._seed_from_lseg()
+            ric = self._lookup(request)
+        with self._lock:
+            self._stats["hits" if ric else "misses"] += 1
+        return ric
+
+    def learn(self, request: str, ric: str):
+        """Remembers the RIC found for a request and persists the learned names."""
+        names = _candidate_names(request)
+        if not names:
+            return
+        self._load()
+        with self._lock:
+            for name in names:
+                self._rics[name] = ric
+                self._learned[name] = ric
+            self._stats["learned"] += 1
+        try:
+            os.makedirs(os.path.dirname(self._cache_path), exist_ok=True)
+            temp_path = f"{self._cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with self._persist_lock:
+                with self._lock:
+                    learned = dict(self._learned)
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump(learned, f)
+                os.replace(temp_path, self._cache_path)
+        except OSError as e:
+            logger.warning(f"Could not persist the RIC cache: {e}")
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["names"] = len(self._rics)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+_ric_resolver = None
+_ric_resolver_lock = threading.Lock()
+
+
+def get_ric_resolver() -> RicResolver:
+    """Returns the process-wide RicResolver shared by every agent."""
+    global _ric_resolver
+    if _ric_resolver is None:
+        with _ric_resolver_lock:
+            if _ric_resolver is None:
+                _ric_resolver = RicResolver()
+    return _ric_resolver
+
+
+class CachedRicAgentTool(AgentTool):
+    """Wraps symbol_to_ric_agent so it only runs when the RIC cache misses.
+
+    The tool keeps the agent's name and declaration, so the agents calling it are
+    unchanged; cache hits answer without an LLM or google_search round trip.
+    """
+
+    async def run_async(self, *, args, tool_context):
+        request = str(args.get("request", ""))
+        resolver = get_ric_resolver()
+        ric = await asyncio.to_thread(resolver.resolve, request)
+        if ric:
+            logger.info(f"symbol_to_ric_agent: resolved '{request}' to {ric} from cache")
+            return RicLookup(company=request, ric=ric).model_dump()
+
+        result = await super().run_async(args=args, tool_context=tool_context)
+        ric = ric_from_result(result)
+        if ric and await asyncio.to_thread(resolver.is_known_ric, ric):
+            resolver.learn(request, ric)
+        elif ric:
+            logger.warning(f"symbol_to_ric_agent: {ric} for '{request}' is not in LSEG company info, not cached")
+        return result
@@ -0,0 +1,79 @@
+"""Dry-run audit of the bytes scanned by the LSE_NORMALISED VWAP query.
+
+Run it against a project with access to the tick table:
+
+    python -m investment_agent.lsegtools.scanaudit VOD.L,BT.L 2025-01-01 2025-01-31
+"""
+import json
+import logging
+import sys
+
+from .querybuilder import parse_date_range
+from .queryexecutor import get_executor
+from .resultcache import normalize_rics
+from .tickhistory import build_vwap_query
+
+logger = logging.getLogger("MarketMind")
+
+# The query getVWAP used to send, verbatim: string-literal time bounds and the RIC filter applied
+# after the CTE. It quoted the comma-joined RICs as one literal ('VOD.L, BT.L'), so with several RICs
+# it matched none of them; that doesn't change the bytes a dry run reports, the columns scanned are the same
+LEGACY_VWAP_QUERY = """### Obtain VWAP for RIC
+        WITH AllTrades AS(
+            SELECT Date_Time,RIC,Price,Volume, Ask_Price,Ask_Size,Bid_Price,Bid_Size,Qualifiers
+            FROM `dbd-sdlc-prod.LSE_NORMALISED.LSE_NORMALISED`
+            WHERE Price IS NOT NULL
+            -- Specific Date/Time range:
+            AND (Date_Time BETWEEN "{1} 00:00:00.000000" AND "{2} 23:59:59.999999")
+            AND Type = "Trade"
+            AND VOLUME > 0
+            AND PRICE > 0
+            )
+        SELECT CAST (extract(DATE FROM Date_Time) AS STRING) AS date_time, RIC, ROUND(SAFE_DIVIDE(SUM(Volume*Price),SUM(Volume)),3) AS VWAP,SUM(Volume) AS TotalVolume,AVG(Price) AS AvgPrice,
+        COUNT(RIC) AS NumTrades, MAX(Ask_Price) AS MaxAskPrice,MAX(Ask_Size) as MaxAskSize,
+         MAX(Bid_Price) AS MaxBidPrice, MAx(Bid_Size) AS MaxBidSize
+        FROM AllTrades
+        WHERE RIC IN ('{0}')
+        GROUP BY RIC, date_time
+        ORDER BY 1,2"""
+
+
+def compare_vwap_scan_bytes(rics: list, start_date: str, end_date: str) -> dict:
+    """Dry-runs the legacy and the partition-pruning VWAP queries and compares their scan size.
+
+    Args:
+        rics (list): The RICs to query.
+        start_date (str): The first day of the window.
+        end_date (str): The last day of the window.
+
+    Returns:
+        dict: bytes processed before and after, and whether the new query scans strictly less.
+    """
+    rics = normalize_rics(rics)
+    start, end = parse_date_range(start_date, end_date)
+    executor = get_executor()
+
+    legacy_query = LEGACY_VWAP_QUERY.format(", ".join(rics), start.isoformat(), end.isoformat())
+    legacy_bytes = executor.dry_run(legacy_query, label="getVWAP legacy")
+    pruned_bytes = executor.dry_run(build_vwap_query(rics, start, end), label="getVWAP pruned")
+
+    results = {
+        "rics": rics,
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "legacy_bytes_processed": legacy_bytes,
+        "pruned_bytes_processed": pruned_bytes,
+        "reduction": 1 - pruned_bytes / legacy_bytes if legacy_bytes else 0.0,
+        "pruned": pruned_bytes < legacy_bytes,
+    }
+    if not results["pruned"]:
+        logger.warning(f"VWAP query doesn't scan less than the legacy query: {results}")
+    return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4:
+        sys.exit("usage: python -m investment_agent.lsegtools.scanaudit RIC[,RIC...] START_DATE END_DATE")
+    results = compare_vwap_scan_bytes(sys.argv[1].split(","), sys.argv[2], sys.argv[3])
+    print(json.dumps(results, indent=2))
+    sys.exit(0 if results["pruned"] else 1)
@@ -1,9 +1,39 @@
-from . import helpercode
-import pandas as pd
-import google.cloud.bigquery.client as bigquery
+import datetime
+import math
+from typing import Optional
 
-PROJECT_ID = helpercode.get_project_id()
+from ..config import config
+from .queryexecutor import get_executor
+from .projection import (ProjectionError, decode_page_token, page_result, page_size_or_default,
+                         resolve_columns, select_list)
+from .querybuilder import build_query, day_bounds, parse_date_range
+from .resultcache import cached_tool, normalize_rics
+from .resultencoding import encode_records
+from .esgfetch import fetch_esg_pillar
+from .vwapstore import VWAP_COLUMNS, get_vwap_store
 
+COMPANY_DETAILS_TABLE = "genaillentsearch.LSEGQA202510.company_info_RKDFndCmpDet"
+
+BAR_COLUMNS = ["RIC", "bar_start", "Open", "High", "Low", "Close", "VWAP", "Volume", "NumTrades"]
+# Bucket sizes, in minutes, getVWAPBars steps down through to stay within its row budget. Buckets
+# start at UTC midnight, so each size divides a day and every day has the same bucket boundaries
+BAR_BUCKET_MINUTES = [1, 5, 15, 30, 60, 120, 240, 480, 1440]
+
+SIGNIFICANT_EVENTS_TABLE = "genaillentsearch.LSEGQA202510.rkdcmpsigdev"
+
+
+def _error(function: str, error_message: str) -> dict:
+    return {
+        "status": "error",
+        "function": function,
+        "error_message": error_message,
+    }
+
+
+def _date_range_error(function: str, start_date, end_date) -> dict:
+    return _error(function, f"Could not parse the date range {start_date} - {end_date}, use YYYY-MM-DD dates.")
+
+@cached_tool
 def getVWAP(rics: list, start_date: str, end_date: str) -> dict:
     """Uses The tick history product to get the VWAP for a RIC code
 
@@ -15,39 +45,160 @@ def getVWAP(rics: list, start_date: str, end_date: str) -> dict:
     Returns:
         dict: status and result or error msg.
     """
-    placeholders = ', '.join(map(str, rics))
-    query = ("""### Obtain VWAP for RIC
+    try:
+        start, end = parse_date_range(start_date, end_date)
+    except ValueError:
+        return _date_range_error("getVWAP", start_date, end_date)
+    rics = normalize_rics(rics)
+
+    # Only scan the days not already held in the daily aggregate store
+    store = get_vwap_store()
+    for range_start, range_end, missing_rics in store.missing_ranges(rics, start, end):
+        query = build_vwap_query(missing_rics, range_start, range_end)
+        records = get_executor().query_to_records(query, label="getVWAP")
+        store.add(records, missing_rics, range_start, range_end)
+    return vwap_result(rics, start, end)
+
+def vwap_result(rics: list, start: datetime.date, end: datetime.date) -> dict:
+    return {
+        "status": "success",
+        "function": "getVWAP",
+        **encode_records(get_vwap_store().rows(rics, start, end), VWAP_COLUMNS, float_digits={"VWAP": 3, "AvgPrice": 3}),
+    }
+
+def build_vwap_query(rics: list, start: datetime.date, end: datetime.date):
+    """Builds the daily VWAP aggregate query over LSE_NORMALISED for whole days.
+
+    The scan filters on typed, half-open TIMESTAMP bounds on the bare Date_Time column
+    and on RIC directly, inside the CTE, so BigQuery can prune partitions and clusters
+    instead of relying on the optimizer to push the predicates down.
+    """
+    start_ts, end_ts = day_bounds(start, end)
+    return build_query("""### Obtain daily VWAP aggregates for RIC
         WITH AllTrades AS(
-            SELECT Date_Time,RIC,Price,Volume, Ask_Price,Ask_Size,Bid_Price,Bid_Size,Qualifiers
+            SELECT Date_Time,RIC,Price,Volume, Ask_Price,Ask_Size,Bid_Price,Bid_Size
             FROM `dbd-sdlc-prod.LSE_NORMALISED.LSE_NORMALISED`
-            WHERE Price IS NOT NULL
-            -- Specific Date/Time range:
-            AND (Date_Time BETWEEN "{1} 00:00:00.000000" AND "{2} 23:59:59.999999")
+            WHERE Date_Time >= @start_ts
+            AND Date_Time < @end_ts
+            AND RIC IN UNNEST(@rics)
             AND Type = "Trade"
+            AND Price IS NOT NULL
             AND VOLUME > 0
             AND PRICE > 0
             )
-        SELECT CAST (extract(DATE FROM Date_Time) AS STRING) AS date_time, RIC, ROUND(SAFE_DIVIDE(SUM(Volume*Price),SUM(Volume)),3) AS VWAP,SUM(Volume) AS TotalVolume,AVG(Price) AS AvgPrice,
+        SELECT CAST (extract(DATE FROM Date_Time) AS STRING) AS date_time, RIC, SUM(Volume*Price) AS SumVolumePrice,SUM(Volume) AS TotalVolume,SUM(Price) AS SumPrice,
         COUNT(RIC) AS NumTrades, MAX(Ask_Price) AS MaxAskPrice,MAX(Ask_Size) as MaxAskSize,
          MAX(Bid_Price) AS MaxBidPrice, MAx(Bid_Size) AS MaxBidSize
         FROM AllTrades
-        WHERE RIC IN ('{0}')
         GROUP BY RIC, date_time
-        ORDER BY 1,2""").format(placeholders, start_date, end_date)
-    
-    client = bigquery.Client(project=PROJECT_ID)
-    query_job = client.query(query)
-    rows = query_job.result()
-    pd = rows.to_dataframe()
+        ORDER BY 1,2""", rics=rics, start_ts=start_ts, end_ts=end_ts)
+
+def _weekdays(start: datetime.date, end: datetime.date) -> int:
+    return sum(1 for offset in range((end - start).days + 1)
+               if (start + datetime.timedelta(days=offset)).weekday() < 5)
+
+
+def _buckets_per_session(minutes: int) -> int:
+    # a session that doesn't start on a bucket boundary touches one more bucket
+    return min(math.ceil(config.trading_minutes_per_day / minutes) + 1, 1440 // minutes)
+
+
+def bar_bucket_minutes(requested: int, ric_count: int, start: datetime.date, end: datetime.date) -> int:
+    """Picks the smallest bucket of at least `requested` minutes that keeps the bars within budget.
+
+    The row count is estimated as RICs x trading days x buckets a trading session touches.
+    """
+    days = max(_weekdays(start, end), 1)
+    candidates = [minutes for minutes in BAR_BUCKET_MINUTES if minutes >= requested] or BAR_BUCKET_MINUTES[-1:]
+    for minutes in candidates:
+        if ric_count * days * _buckets_per_session(minutes) <= config.bars_max_rows:
+            return minutes
+    return candidates[-1]
+
+
+def bars_per_ric(ric_count: int) -> int:
+    """Returns each RIC's share of the getVWAPBars row budget."""
+    return max(config.bars_max_rows // max(ric_count, 1), 1)
+
+@cached_tool
+def getVWAPBars(rics: list, start_date: str, end_date: str, bucket_minutes: int = 5) -> dict:
+    """Uses The tick history product to get intraday OHLC and VWAP bars for RIC codes
+
+    The bars are aggregated in BigQuery. When the window is too long for the requested bucket
+    size, a coarser bucket is used automatically so the result stays compact. Each RIC gets an
+    equal share of the row budget and the RICs cut short are listed in truncated_rics.
+
+    Args:
+        rics (list): The stock RICs of the companies whoes bars are being retreived.
+        start_date (str): The date from which to start the bars.
+        end_date (str): The date at which to end the bars.
+        bucket_minutes (int): The requested bar size in minutes, e.g. 1, 5, 15, 30 or 60.
+
+    Returns:
+        dict: status and result or error msg, with the bucket_minutes actually used.
+    """
+    try:
+        start, end = parse_date_range(start_date, end_date)
+    except ValueError:
+        return _date_range_error("getVWAPBars", start_date, end_date)
+    rics = normalize_rics(rics)
+    requested = max(int(bucket_minutes or 1), 1)
+    minutes = bar_bucket_minutes(requested, len(rics), start, end)
+    records = get_executor().query_to_records(build_vwap_bars_query(rics, start, end, minutes), label="getVWAPBars")
+    return vwap_bars_result(records, rics, minutes, requested)
+
+def build_vwap_bars_query(rics: list, start: datetime.date, end: datetime.date, minutes: int):
+    start_ts, end_ts = day_bounds(start, end)
+    # one row past each RIC's share shows whether that RIC was cut short
+    return build_query("""### Obtain intraday VWAP bars for RICs
+        WITH Trades AS(
+            SELECT RIC, Date_Time, Price, Volume,
+            TIMESTAMP_SECONDS(DIV(UNIX_SECONDS(Date_Time), @bucket_seconds) * @bucket_seconds) AS bar_start
+            FROM `dbd-sdlc-prod.LSE_NORMALISED.LSE_NORMALISED`
+            WHERE RIC IN UNNEST(@rics)
+            AND Date_Time >= @start_ts
+            AND Date_Time < @end_ts
+            AND Type = "Trade"
+            AND Price IS NOT NULL
+            AND VOLUME > 0
+            AND PRICE > 0
+            ),
+        Bars AS(
+            SELECT RIC, bar_start,
+            ARRAY_AGG(Price ORDER BY Date_Time ASC LIMIT 1)[OFFSET(0)] AS Open,
+            MAX(Price) AS High, MIN(Price) AS Low,
+            ARRAY_AGG(Price ORDER BY Date_Time DESC LIMIT 1)[OFFSET(0)] AS Close,
+            ROUND(SAFE_DIVIDE(SUM(Volume*Price),SUM(Volume)),3) AS VWAP,
+            SUM(Volume) AS Volume, COUNT(*) AS NumTrades,
+            ROW_NUMBER() OVER (PARTITION BY RIC ORDER BY bar_start) AS bar_number
+            FROM Trades
+            GROUP BY RIC, bar_start
+            )
+        SELECT * EXCEPT(bar_number) FROM Bars
+        WHERE bar_number <= @max_rows_per_ric
+        ORDER BY RIC, bar_start""", rics=rics, start_ts=start_ts, end_ts=end_ts,
+        bucket_seconds=minutes * 60, max_rows_per_ric=bars_per_ric(len(rics)) + 1)
+
+def vwap_bars_result(records: list, rics: list, minutes: int, requested: int) -> dict:
+    limit = bars_per_ric(len(rics))
+    kept, counts = [], {}
+    for record in records:
+        counts[record["RIC"]] = counts.get(record["RIC"], 0) + 1
+        if counts[record["RIC"]] <= limit:
+            kept.append(record)
+    truncated_rics = sorted(ric for ric, count in counts.items() if count > limit)
     return {
         "status": "success",
-        "function": "getVWAP",
-        "report": (
-            pd.to_json()
-        ),
+        "function": "getVWAPBars",
+        **encode_records(kept, BAR_COLUMNS,
+                         float_digits={"Open": 3, "High": 3, "Low": 3, "Close": 3, "VWAP": 3}),
+        "bucket_minutes": minutes,
+        "requested_bucket_minutes": requested,
+        "truncated": bool(truncated_rics),
+        "truncated_rics": truncated_rics,
     }
 
-
+@cached_tool
 def getMarketPsycSentiment(rics: list, start_date: str, end_date: str) -> dict:
     """Uses LSEG QA MarketPsyc data to get Sentiment data for  RIC codes
 
@@ -59,8 +210,18 @@ def getMarketPsycSentiment(rics: list, start_date: str, end_date: str) -> dict:
     Returns:
         dict: status and result or error msg.
     """
-    placeholders = ', '.join(map(str, rics))
-    query = ("""### Obtain Sentiment for RICs
+    try:
+        start, end = parse_date_range(start_date, end_date)
+    except ValueError:
+        return _date_range_error("getMarketPsycSentiment", start_date, end_date)
+    return {
+        "status": "success",
+        "function": "getMarketPsycSentiment",
+        **get_executor().query_encoded(build_sentiment_query(rics, start, end), label="getMarketPsycSentiment"),
+    }
+
+def build_sentiment_query(rics: list, start: datetime.date, end: datetime.date):
+    return build_query("""### Obtain Sentiment for RICs
         SELECT a.ric, b.date_, avg(b.sentiment) sentiment,avg(b.uncertainty) uncertainty, avg(b.anger) anger, 
         avg(b.stress) stress, avg(b.optimism) optimism, avg(b.joy) joy, avg(b.fear) fear, avg(b.surprise) surprise, 
         avg(b.trust) trust, avg(b.violence) violence, avg(b.volatility) volatility, avg(b.gloom) gloom, avg(b.buzz) buzz, 
@@ -71,83 +232,110 @@ def getMarketPsycSentiment(rics: list, start_date: str, end_date: str) -> dict:
         on a.orgpermid = b.orgpermid
         inner join `genaillentsearch.LSEGQA202510.MPICode` c
         on b.datatype = c.type_
-        where ric in ('{0}')
-        and date_ between "{1} 00:00:00.000000" AND "{2} 23:59:59.999999"
+        where ric in UNNEST(@rics)
+        and DATE(date_) between @start_date AND @end_date
         and c.desc_ not in ('AMER','APAC')
         and datatype=2
         group by a.ric, b.date_
         order by a.ric, b.date_
-        """).format(placeholders, start_date, end_date)
-    
-    client = bigquery.Client(project=PROJECT_ID)
-    query_job = client.query(query)
-    rows = query_job.result()
-    pd = rows.to_dataframe()
-    return {
-        "status": "success",
-        "function": "getMarketPsycSentiment",
-        "report": (
-            pd.to_json()
-        ),
-    }
+        """, rics=rics, start_date=start, end_date=end)
 
-def getCompanyDetails(rics: list) -> dict:
+@cached_tool
+def getCompanyDetails(rics: list, columns: Optional[list[str]] = None, page_size: int = 0, page_token: str = "") -> dict:
     """Uses LSEG QA Data to get Company Details  RIC codes
 
     Args:
         rics (list): The stock RIC of the companies whoes details is being retreived.
+        columns (list): Optional company detail columns to return, a default set is used when empty.
+        page_size (int): Optional maximum number of rows to return, 0 uses the default page size.
+        page_token (str): The next_page_token of a previous call, to get the following page.
     Returns:
-        dict: status and result or error msg.
+        dict: status and result or error msg, with next_page_token set when more rows are available.
     """
-    placeholders = ', '.join(map(str, rics))
-    query = ("""### Obtain Company Details for RICs
-        SELECT a.ric, b.* FROM `genaillentsearch.LSEGQA202510.CompanyInfo_RKDFndInfo` a
-        inner join `genaillentsearch.LSEGQA202510.company_info_RKDFndCmpDet` b
+    try:
+        query, column_names, page_size, offset = build_company_details_query(rics, columns, page_size, page_token)
+    except ProjectionError as e:
+        return _error("getCompanyDetails", str(e))
+    records = get_executor().query_to_records(query, label="getCompanyDetails")
+    return paged_result("getCompanyDetails", records, column_names, page_size, offset)
+
+def build_company_details_query(rics: list, columns: Optional[list], page_size: int, page_token: str) -> tuple:
+    """Builds the getCompanyDetails query.
+
+    Returns:
+        tuple: the query, the returned column names, the page size and the row offset.
+
+    Raises:
+        ProjectionError: for unknown columns or an invalid page token.
+    """
+    selected = resolve_columns(COMPANY_DETAILS_TABLE, columns, config.company_details_columns)
+    offset = decode_page_token(page_token)
+    # a.ric is always returned first
+    selected = [name for name in selected if name.lower() != "ric"]
+    projection = ", ".join(["a.ric"] + ([select_list("b", selected)] if selected else []))
+    page_size = page_size_or_default(page_size)
+    query = build_query(f"""### Obtain Company Details for RICs
+        SELECT {projection} FROM `genaillentsearch.LSEGQA202510.CompanyInfo_RKDFndInfo` a
+        inner join `{COMPANY_DETAILS_TABLE}` b
         on a.code=b.code
-        where ric in ('{0}')
-        """).format(placeholders)
-    
-    client = bigquery.Client(project=PROJECT_ID)
-    query_job = client.query(query)
-    rows = query_job.result()
-    pd = rows.to_dataframe()
+        where ric in UNNEST(@rics)
+        order by a.ric
+        limit @limit offset @offset
+        """, rics=rics, limit=page_size + 1, offset=offset)
+    return query, ["ric"] + selected, page_size, offset
+
+def paged_result(function: str, records: list, column_names: list, page_size: int, offset: int) -> dict:
+    records, next_page_token = page_result(records, page_size, offset)
     return {
         "status": "success",
-        "function": "getCompanyDetails",
-        "report": (
-            pd.to_json()
-        ),
+        "function": function,
+        **encode_records(records, column_names),
+        "next_page_token": next_page_token,
     }
 
-def getSignificantEvents(rics: list, start_date: str, end_date: str) -> dict:
-    """Uses LSEG QA MarketPsyc data to get Sentiment data for  RIC codes
+@cached_tool
+def getSignificantEvents(rics: list, start_date: str, end_date: str, columns: Optional[list[str]] = None,
+                         page_size: int = 0, page_token: str = "") -> dict:
+    """Uses LSEG QA Significant Developments data to get the significant events for RIC codes, most recent first
 
     Args:
         rics (list): The stock RIC of the companies whoes significant events are being retreived.
         start_date (str): The date from which to start significant events retreival.
         end_date (str): The date from whcih to end significant events retreival.
+        columns (list): Optional event columns to return, a default set is used when empty.
+        page_size (int): Optional maximum number of events to return, 0 uses the default page size.
+        page_token (str): The next_page_token of a previous call, to get the following page.
     Returns:
-        dict: status and result or error msg.
+        dict: status and result or error msg, with next_page_token set when more events are available.
     """
-    placeholders = ', '.join(map(str, rics))
-    query = ("""### Obtain Company Details for RICs
-        SELECT * from  `genaillentsearch.LSEGQA202510.rkdcmpsigdev` b
-        where b.ric in ('{0}')
-        and b.srcdt between "{1} 00:00:00.000000" AND "{2} 23:59:59.999999"
-        """).format(placeholders, start_date, end_date)
-    
-    client = bigquery.Client(project=PROJECT_ID)
-    query_job = client.query(query)
-    rows = query_job.result()
-    pd = rows.to_dataframe()
-    return {
-        "status": "success",
-        "function": "getSignificantEvents",
-        "report": (
-            pd.to_json()
-        ),
-    }
+    try:
+        start, end = parse_date_range(start_date, end_date)
+    except ValueError:
+        return _date_range_error("getSignificantEvents", start_date, end_date)
+    try:
+        query, column_names, page_size, offset = build_significant_events_query(
+            rics, start, end, columns, page_size, page_token)
+    except ProjectionError as e:
+        return _error("getSignificantEvents", str(e))
+    records = get_executor().query_to_records(query, label="getSignificantEvents")
+    return paged_result("getSignificantEvents", records, column_names, page_size, offset)
 
+def build_significant_events_query(rics: list, start: datetime.date, end: datetime.date, columns: Optional[list],
+                                   page_size: int, page_token: str) -> tuple:
+    """Builds the getSignificantEvents query, see build_company_details_query()."""
+    selected = resolve_columns(SIGNIFICANT_EVENTS_TABLE, columns, config.significant_events_columns)
+    offset = decode_page_token(page_token)
+    page_size = page_size_or_default(page_size)
+    query = build_query(f"""### Obtain Significant Events for RICs
+        SELECT {select_list("b", selected)} from `{SIGNIFICANT_EVENTS_TABLE}` b
+        where b.ric in UNNEST(@rics)
+        and DATE(b.srcdt) between @start_date AND @end_date
+        order by b.srcdt desc, b.ric
+        limit @limit offset @offset
+        """, rics=rics, start_date=start, end_date=end, limit=page_size + 1, offset=offset)
+    return query, selected, page_size, offset
+
+@cached_tool
 def getESGEnvIndicator(rics: list, fyscal_year: int) -> dict:
     """Uses LSEG QA ESG data to get Env Indicators data for  RIC codes
 
@@ -157,29 +345,13 @@ def getESGEnvIndicator(rics: list, fyscal_year: int) -> dict:
     Returns:
         dict: status and result or error msg.
     """
-    placeholders = ', '.join(map(str, rics))
-    query = ("""### Obtain Company Details for RICs
-        select a.ric, b.*, c.* from `genaillentsearch.LSEGQA202510.company_info_mpicmpinfo` a
-        inner join `genaillentsearch.LSEGQA202510.ESG2EnvIndicator` b
-        on a.orgpermid = b.orgpermid
-        inner join `genaillentsearch.LSEGQA202510.ESG2Item` c
-        on b.item = c.item
-        where ric in ('{0}')
-        and fy={1}
-        """).format(placeholders, fyscal_year)
-    
-    client = bigquery.Client(project=PROJECT_ID)
-    query_job = client.query(query)
-    rows = query_job.result()
-    pd = rows.to_dataframe()
     return {
         "status": "success",
         "function": "getESGEnvIndicator",
-        "report": (
-            pd.to_json()
-        ),
+        **fetch_esg_pillar(rics, fyscal_year, "Env"),
     }
 
+@cached_tool
 def getESGGovIndicator(rics: list, fyscal_year: int) -> dict:
     """Uses LSEG QA ESG data to get Gov Indicators data for  RIC codes
 
@@ -189,29 +361,13 @@ def getESGGovIndicator(rics: list, fyscal_year: int) -> dict:
     Returns:
         dict: status and result or error msg.
     """
-    placeholders = ', '.join(map(str, rics))
-    query = ("""### Obtain Company Details for RICs
-        select a.ric, b.*, c.* from `genaillentsearch.LSEGQA202510.company_info_mpicmpinfo` a
-        inner join `genaillentsearch.LSEGQA202510.ESG2GovIndicator` b
-        on a.orgpermid = b.orgpermid
-        inner join `genaillentsearch.LSEGQA202510.ESG2Item` c
-        on b.item = c.item
-        where ric in ('{0}')
-        and fy={1}
-        """).format(placeholders, fyscal_year)
-    
-    client = bigquery.Client(project=PROJECT_ID)
-    query_job = client.query(query)
-    rows = query_job.result()
-    pd = rows.to_dataframe()
     return {
         "status": "success",
         "function": "getESGGovIndicator",
-        "report": (
-            pd.to_json()
-        ),
+        **fetch_esg_pillar(rics, fyscal_year, "Gov"),
     }
 
+@cached_tool
 def getESGSocIndicator(rics: list, fyscal_year: int) -> dict:
     """Uses LSEG QA ESG data to get Soc Indicators data for  RIC codes
 
@@ -221,25 +377,8 @@ def getESGSocIndicator(rics: list, fyscal_year: int) -> dict:
     Returns:
         dict: status and result or error msg.
     """
-    placeholders = ', '.join(map(str, rics))
-    query = ("""### Obtain Company Details for RICs
-        select a.ric, b.*, c.* from `genaillentsearch.LSEGQA202510.company_info_mpicmpinfo` a
-        inner join `genaillentsearch.LSEGQA202510.ESG2SocIndicator` b
-        on a.orgpermid = b.orgpermid
-        inner join `genaillentsearch.LSEGQA202510.ESG2Item` c
-        on b.item = c.item
-        where ric in ('{0}')
-        and fy={1}
-        """).format(placeholders, fyscal_year)
-    
-    client = bigquery.Client(project=PROJECT_ID)
-    query_job = client.query(query)
-    rows = query_job.result()
-    pd = rows.to_dataframe()
     return {
         "status": "success",
         "function": "getESGSocIndicator",
-        "report": (
-            pd.to_json()
-        ),
+        **fetch_esg_pillar(rics, fyscal_year, "Soc"),
     }
\ No newline at end of file
@@ -0,0 +1,127 @@
+import datetime
+import math
+import threading
+from collections import OrderedDict
+
+from ..config import config
+from .resultcache import utc_today
+
+VWAP_COLUMNS = ["date_time", "RIC", "VWAP", "TotalVolume", "AvgPrice", "NumTrades",
+                "MaxAskPrice", "MaxAskSize", "MaxBidPrice", "MaxBidSize"]
+
+AGGREGATE_FIELDS = ["SumVolumePrice", "TotalVolume", "SumPrice", "NumTrades",
+                    "MaxAskPrice", "MaxAskSize", "MaxBidPrice", "MaxBidSize"]
+
+
+def _number(value):
+    if value is None:
+        return None
+    value = float(value)
+    return None if math.isnan(value) else value
+
+
+def _days(start: datetime.date, end: datetime.date):
+    day = start
+    while day <= end:
+        yield day
+        day += datetime.timedelta(days=1)
+
+
+class DailyVWAPStore:
+    """Holds per (RIC, date) trade aggregates so getVWAP only scans days it hasn't seen.
+
+    For every RIC the store remembers which days have been fetched, including days
+    without trades, so weekends and holidays are not queried again. Days from today
+    (UTC) onwards are never marked as held because their ticks are still arriving.
+    At most max_rics RICs are held, the least recently used ones are evicted first.
+    """
+
+    def __init__(self, max_rics: int = None):
+        self._max_rics = max_rics or config.vwap_store_max_rics
+        self._aggregates = {}  # RIC -> {date: aggregate}
+        self._held_days = OrderedDict()  # RIC -> set of dates, least recently used first
+        self._lock = threading.Lock()
+
+    def _touch(self, rics: list):
+        for ric in rics:
+            if ric in self._held_days:
+                self._held_days.move_to_end(ric)
+
+    def missing_ranges(self, rics: list, start_date: datetime.date, end_date: datetime.date) -> list:
+        """Returns (start, end, rics) tuples covering the days that still need to be queried.
+
+        Contiguous runs of missing days are computed per RIC and RICs sharing the
+        same run are grouped so they are fetched by a single query.
+        """
+        groups = {}
+        with self._lock:
+            self._touch(rics)
+            for ric in rics:
+                held = self._held_days.get(ric, set())
+                run_start = run_end = None
+                for day in _days(start_date, end_date):
+                    if day in held:
+                        if run_start is not None:
+                            groups.setdefault((run_start, run_end), []).append(ric)
+                            run_start = None
+                        continue
+                    if run_start is None:
+                        run_start = day
+                    run_end = day
+                if run_start is not None:
+                    groups.setdefault((run_start, run_end), []).append(ric)
+        return [(run_start, run_end, sorted(group_rics)) for (run_start, run_end), group_rics in sorted(groups.items())]
+
+    def add(self, records: list, rics: list, start_date: datetime.date, end_date: datetime.date):
+        """Stores the daily aggregate rows of one query and marks its window as held."""
+        today = utc_today()
+        with self._lock:
+            for record in records:
+                day = datetime.date.fromisoformat(str(record["date_time"])[:10])
+                self._aggregates.setdefault(record["RIC"], {})[day] = {
+                    field: _number(record.get(field)) for field in AGGREGATE_FIELDS
+                }
+            for ric in rics:
+                held = self._held_days.setdefault(ric, set())
+                held.update(day for day in _days(start_date, end_date) if day < today)
+            self._touch(rics)
+            while len(self._held_days) > self._max_rics:
+                ric, _ = self._held_days.popitem(last=False)
+                self._aggregates.pop(ric, None)
+
+    def rows(self, rics: list, start_date: datetime.date, end_date: datetime.date) -> list:
+        """Re-derives the getVWAP rows for the window from the held daily aggregates."""
+        rows = []
+        with self._lock:
+            self._touch(rics)
+            for day in _days(start_date, end_date):
+                for ric in rics:
+                    aggregate = self._aggregates.get(ric, {}).get(day)
+                    if aggregate is None or not aggregate["TotalVolume"]:
+                        continue
+                    rows.append({
+                        "date_time": day.isoformat(),
+                        "RIC": ric,
+                        "VWAP": round(aggregate["SumVolumePrice"] / aggregate["TotalVolume"], 3),
+                        "TotalVolume": int(aggregate["TotalVolume"]) if aggregate["TotalVolume"].is_integer() else aggregate["TotalVolume"],
+                        "AvgPrice": aggregate["SumPrice"] / aggregate["NumTrades"],
+                        "NumTrades": int(aggregate["NumTrades"]),
+                        "MaxAskPrice": aggregate["MaxAskPrice"],
+                        "MaxAskSize": aggregate["MaxAskSize"],
+                        "MaxBidPrice": aggregate["MaxBidPrice"],
+                        "MaxBidSize": aggregate["MaxBidSize"],
+                    })
+        return rows
+
+
+_vwap_store = None
+_vwap_store_lock = threading.Lock()
+
+
+def get_vwap_store() -> DailyVWAPStore:
+    """Returns the process-wide DailyVWAPStore."""
+    global _vwap_store
+    with _vwap_store_lock:
+        if _vwap_store is None:
+            _vwap_store = DailyVWAPStore()
+        return _vwap_store
@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import time
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+
+from ..config import config
+
+logger = logging.getLogger("MarketMind")
+
+AGENT_TIMINGS_KEY = "agent_timings"
+
+
+def deadline_for(agent_name: str) -> float:
+    return config.agent_deadlines.get(agent_name, config.default_agent_deadline)
+
+
+def unavailable_section(agent_name: str, status: str, seconds: float) -> str:
+    reason = f"timed out after {seconds:.1f}s" if status == "timed_out" else "failed"
+    return f"Section unavailable: {agent_name} {reason}."
+
+
+def branch_context(agent: BaseAgent, sub_agent: BaseAgent, ctx: InvocationContext) -> InvocationContext:
+    """Returns a copy of the context on its own branch for the sub-agent, as ParallelAgent does.
+
+    Sub-agents on separate branches don't see each other's conversation history.
+    """
+    branch = f"{agent.name}.{sub_agent.name}"
+    return ctx.model_copy(update={"branch": f"{ctx.branch}.{branch}" if ctx.branch else branch})
+
+
+class DeadlineParallelAgent(BaseAgent):
+    """Runs its sub-agents in parallel, like ParallelAgent, with a deadline for each.
+
+    A sub-agent still running at its deadline (config.agent_deadlines, or
+    config.default_agent_deadline) is cancelled, as is one that fails, and its
+    output_key is set to an "unavailable" note so the report goes ahead without it.
+    The stage therefore never takes longer than its longest deadline. The status
+    and run time of every sub-agent are written to agent_timings.
+    """
+
+    async def _run_sub_agent(self, sub_agent: BaseAgent, ctx: InvocationContext, queue: asyncio.Queue):
+        start = time.perf_counter()
+        status = "completed"
+
+        async def forward_events():
+            async for event in sub_agent.run_async(ctx):
+                resume = asyncio.Event()
+                await queue.put((sub_agent, event, resume))
+                # Wait for the event to be consumed before generating the next one
+                await resume.wait()
+
+        try:
+            await asyncio.wait_for(forward_events(), timeout=deadline_for(sub_agent.name))
+        except asyncio.TimeoutError:
+            status = "timed_out"
+        except Exception:
+            logger.exception(f"{sub_agent.name} failed in {self.name}")
+            status = "failed"
+        finally:
+            await queue.put((sub_agent, None, (status, time.perf_counter() - start)))
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        if not self.sub_agents:
+            return
+        queue = asyncio.Queue()
+        tasks = [
+            asyncio.create_task(self._run_sub_agent(sub_agent, branch_context(self, sub_agent, ctx), queue))
+            for sub_agent in self.sub_agents
+        ]
+        timings = {}
+        try:
+            while len(timings) < len(tasks):
+                sub_agent, event, payload = await queue.get()
+                if event is not None:
+                    yield event
+                    payload.set()
+                    continue
+
+                status, seconds = payload
+                timings[sub_agent.name] = {"status": status, "seconds": round(seconds, 3)}
+                if status == "completed":
+                    logger.info(f"{self.name}: {sub_agent.name} completed in {seconds:.2f}s")
+                    continue
+                logger.warning(f"{self.name}: {sub_agent.name} {status} after {seconds:.2f}s, reporting without it")
+                output_key = getattr(sub_agent, "output_key", None)
+                if output_key:
+                    yield Event(
+                        invocation_id=ctx.invocation_id,
+                        author=self.name,
+                        branch=ctx.branch,
+                        actions=EventActions(state_delta={
+                            output_key: unavailable_section(sub_agent.name, status, seconds),
+                        }),
+                    )
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(state_delta={AGENT_TIMINGS_KEY: timings}),
+        )
@@ -0,0 +1,132 @@
+import asyncio
+import functools
+import inspect
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import AsyncGenerator, Callable
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+
+from ..config import config
+from ..lsegtools.asynctickhistory import (getCompanyDetails, getESGEnvIndicator, getESGGovIndicator, getESGSocIndicator,
+                                     getMarketPsycSentiment, getSignificantEvents, getVWAP)
+from ..lsegtools.resultencoding import describe_encoding
+
+logger = logging.getLogger("MarketMind")
+
+FETCH_TIMINGS_KEY = "fetch_timings"
+# How to read the encoded reports, for the instructions of the agents that analyse them
+DATA_FORMAT_KEY = "data_format"
+
+
+@dataclass
+class Fetch:
+    """One deterministic tool call of the fetch engine.
+
+    Attributes:
+        state_key: The session state key the tool result is written to.
+        tool: The tool function to call.
+        arguments: Builds the tool arguments from the session state.
+    """
+    state_key: str
+    tool: Callable
+    arguments: Callable
+
+
+def _period(state) -> dict:
+    return {"rics": state["rics"], "start_date": state["start_date"], "end_date": state["end_date"]}
+
+
+def _fiscal_year(state) -> dict:
+    return {"rics": state["rics"], "fyscal_year": state["fiscal_year"]}
+
+
+LSEG_FETCHES = [
+    Fetch("companyinfo_data", getCompanyDetails, lambda state: {"rics": state["rics"]}),
+    Fetch("vwap_data", getVWAP, _period),
+    Fetch("marketpsycsentiment_data", getMarketPsycSentiment, _period),
+    Fetch("significantevent_data", getSignificantEvents, _period),
+    Fetch("esgenvindicator_data", getESGEnvIndicator, _fiscal_year),
+    Fetch("esggovindicator_data", getESGGovIndicator, _fiscal_year),
+    Fetch("esgsocindicator_data", getESGSocIndicator, _fiscal_year),
+]
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    """Returns the worker pool the fetches run on, sized by config.fetch_max_concurrency."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=config.fetch_max_concurrency, thread_name_prefix="fetch")
+    return _pool
+
+
+def _error(function: str, error_message: str) -> dict:
+    return {
+        "status": "error",
+        "function": function,
+        "error_message": error_message,
+    }
+
+
+class FetchEngineAgent(BaseAgent):
+    """Runs the deterministic data tool calls concurrently, without any LLM turns.
+
+    Every fetch reads its arguments from the research context published into session
+    state and writes the tool result to its state key, so data retrieval takes about
+    as long as the slowest BigQuery job. Async tools are awaited on the event loop,
+    sync tools run on a shared pool of config.fetch_max_concurrency threads. A failing
+    fetch, or one still running after config.fetch_deadline seconds, stores an error
+    result and doesn't stop the others. Per-fetch timings are
+    written to fetch_timings.
+    """
+
+    fetches: list[Fetch] = LSEG_FETCHES
+
+    async def _run_fetch(self, fetch: Fetch, state) -> tuple:
+        name = fetch.tool.__name__
+        start = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(fetch.tool):
+                pending = fetch.tool(**fetch.arguments(state))
+            else:
+                call = functools.partial(fetch.tool, **fetch.arguments(state))
+                pending = asyncio.get_running_loop().run_in_executor(_get_pool(), call)
+            result = await asyncio.wait_for(pending, timeout=config.fetch_deadline)
+        except asyncio.TimeoutError:
+            logger.warning(f"{name} timed out after {config.fetch_deadline}s in the fetch engine")
+            result = _error(name, f"Timed out after {config.fetch_deadline}s, data unavailable")
+        except Exception as e:
+            logger.exception(f"{name} failed in the fetch engine")
+            result = _error(name, str(e))
+        seconds = time.perf_counter() - start
+        logger.info("%s: fetched in %.3fs (%s)", name, seconds, result.get("status"))
+        return fetch.state_key, result, seconds
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        state = ctx.session.state
+        if not state.get("rics"):
+            results = [(fetch.state_key, _error(fetch.tool.__name__, "No RICs were resolved for the request"), 0.0)
+                       for fetch in self.fetches]
+        else:
+            results = await asyncio.gather(*(self._run_fetch(fetch, state) for fetch in self.fetches))
+
+        state_delta = {state_key: result for state_key, result, _ in results}
+        state_delta[FETCH_TIMINGS_KEY] = {state_key: round(seconds, 3) for state_key, _, seconds in results}
+        state_delta[DATA_FORMAT_KEY] = describe_encoding()
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(state_delta=state_delta),
+        )
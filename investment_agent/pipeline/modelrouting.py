@@ -0,0 +1,136 @@
+import logging
+import threading
+import time
+
+from google.adk.agents import LlmAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest
+
+from ..config import config
+
+logger = logging.getLogger("MarketMind")
+
+_lock = threading.Lock()
+# (invocation id, agent name) -> start time of the running agent
+_started = {}
+# agent name -> time until which the agent runs on its fallback model
+_degraded_until = {}
+_stats = {}
+
+
+def model_for(agent_name: str) -> str:
+    """Returns the model configured for an agent in config.agent_models, or config.gemini_model."""
+    model = config.agent_models.get(agent_name, config.gemini_model)
+    logger.info(f"Model routing: {agent_name} -> {model}")
+    return model
+
+
+def fallback_model(model: str) -> str:
+    """Returns the next faster model after `model`, or `model` itself at the end of the chain."""
+    return config.model_fallbacks.get(model, model)
+
+
+def _agent_stats(agent_name: str) -> dict:
+    return _stats.setdefault(agent_name, {
+        "runs": 0,
+        "over_budget": 0,
+        "fallback_calls": 0,
+        "seconds": 0.0,
+        "max_seconds": 0.0,
+    })
+
+
+def _evict_stale_starts(now: float):
+    # An agent cancelled mid-run never reaches record_agent_latency, drop its start time
+    # once it is older than any run could be
+    for key in [key for key, started in _started.items() if now - started > config.latency_clock_max_age]:
+        del _started[key]
+
+
+def start_latency_budget(callback_context: CallbackContext):
+    """before_agent_callback that starts the agent's latency budget clock."""
+    now = time.perf_counter()
+    with _lock:
+        _evict_stale_starts(now)
+        _started[(callback_context.invocation_id, callback_context.agent_name)] = now
+    return None
+
+
+def apply_latency_budget(callback_context: CallbackContext, llm_request: LlmRequest):
+    """before_model_callback that switches to the fallback model when the budget is exceeded.
+
+    The model call goes to the fallback model when the agent has already used up its
+    latency budget in this run, or when one of its recent runs went over budget (for
+    config.model_fallback_cooldown seconds afterwards).
+    """
+    agent_name = callback_context.agent_name
+    budget = config.agent_latency_budgets.get(agent_name)
+    if budget is None:
+        return None
+    now = time.perf_counter()
+    with _lock:
+        started = _started.get((callback_context.invocation_id, agent_name), now)
+        degraded = _degraded_until.get(agent_name, 0) > now
+    elapsed = now - started
+    if not degraded and elapsed <= budget:
+        return None
+
+    model = llm_request.model
+    fallback = fallback_model(model)
+    if fallback != model:
+        reason = "recently over budget" if degraded else f"{elapsed:.1f}s elapsed"
+        logger.warning(f"Model routing: {agent_name} falls back from {model} to {fallback} "
+                       f"({reason}, budget {budget}s)")
+        llm_request.model = fallback
+        with _lock:
+            _agent_stats(agent_name)["fallback_calls"] += 1
+    return None
+
+
+def record_agent_latency(callback_context: CallbackContext):
+    """after_agent_callback that records the agent's run time against its budget."""
+    agent_name = callback_context.agent_name
+    now = time.perf_counter()
+    with _lock:
+        started = _started.pop((callback_context.invocation_id, agent_name), None)
+        if started is None:
+            return None
+        seconds = now - started
+        stats = _agent_stats(agent_name)
+        stats["runs"] += 1
+        stats["seconds"] += seconds
+        stats["max_seconds"] = max(stats["max_seconds"], seconds)
+        budget = config.agent_latency_budgets.get(agent_name)
+        over_budget = budget is not None and seconds > budget
+        if over_budget:
+            stats["over_budget"] += 1
+            _degraded_until[agent_name] = now + config.model_fallback_cooldown
+    if over_budget:
+        logger.warning(f"Model routing: {agent_name} took {seconds:.1f}s, over its {budget}s budget, "
+                       f"using its fallback model for the next {config.model_fallback_cooldown}s")
+    else:
+        logger.info(f"Model routing: {agent_name} took {seconds:.1f}s (budget {budget}s)")
+    return None
+
+
+def _as_list(callback) -> list:
+    if callback is None:
+        return []
+    return list(callback) if isinstance(callback, list) else [callback]
+
+
+def install_latency_budgets(agent):
+    """Adds the latency budget callbacks to every LlmAgent under `agent`, including itself."""
+    if isinstance(agent, LlmAgent) and start_latency_budget not in _as_list(agent.before_agent_callback):
+        agent.before_agent_callback = [start_latency_budget] + _as_list(agent.before_agent_callback)
+        agent.before_model_callback = _as_list(agent.before_model_callback) + [apply_latency_budget]
+        # first, ADK stops at the first after_agent_callback returning content
+        agent.after_agent_callback = [record_agent_latency] + _as_list(agent.after_agent_callback)
+    for sub_agent in agent.sub_agents:
+        install_latency_budgets(sub_agent)
+
+
+def get_routing_stats() -> dict:
+    """Returns per-agent run counts, run times, budget overruns and fallback model calls."""
+    with _lock:
+        return {agent_name: dict(stats) for agent_name, stats in _stats.items()}
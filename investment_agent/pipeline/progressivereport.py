@@ -0,0 +1,30 @@
+import logging
+
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.utils.instructions_utils import inject_session_state
+
+from ..config import config
+
+logger = logging.getLogger("MarketMind")
+
+
+def report_instruction(full: str, progressive: str):
+    """Returns the instruction provider of report_creation_agent.
+
+    ADK already shows each data agent's section to the user as soon as that agent
+    completes. In progressive mode (config.progressive_report) the report agent only
+    writes the closing summary and correlations (`progressive`) instead of repeating
+    every section (`full`). The flag is read here on every run, nowhere else.
+
+    Args:
+        full (str): The instruction template of the complete report.
+        progressive (str): The instruction template of the closing part only.
+
+    Returns:
+        InstructionProvider: fills the chosen template from session state.
+    """
+    async def provider(context: ReadonlyContext) -> str:
+        template = progressive if config.progressive_report else full
+        return await inject_session_state(template, context)
+
+    return provider
@@ -0,0 +1,174 @@
+import logging
+import math
+
+from google.adk.agents.callback_context import CallbackContext
+
+from ..config import config
+
+logger = logging.getLogger("MarketMind")
+
+# The data agent outputs report_creation_agent reads, in report order
+REPORT_SECTIONS = [
+    ("companyinfo_result", "Company Info"),
+    ("vwap_result", "VWAP"),
+    ("marketpsycsentiment_result", "Market Sentiment"),
+    ("significantevent_result", "Significant Events"),
+    ("esgenvindicator_result", "ESG Environmental Indicators"),
+    ("esggovindicator_result", "ESG Governance Indicators"),
+    ("esgsocindicator_result", "ESG Social Indicators"),
+    ("companynews_result", "Company News"),
+]
+REPORT_INPUTS_KEY = "report_inputs"
+REPORT_INPUT_TOKENS_KEY = "report_input_tokens"
+UNAVAILABLE = "No data available for this section."
+TRIMMED_NOTE = "[... trimmed to fit the report budget]"
+# Characters of the budget kept for the notes on what was left out, at most half of it
+NOTE_CHARS = 80
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimates the model tokens of a text from its length, see config.report_chars_per_token."""
+    return math.ceil(len(text) / config.report_chars_per_token)
+
+
+def allocate_budget(tokens: dict, total: int) -> dict:
+    """Splits a token budget across sections by max-min fairness.
+
+    Sections that fit in an equal share keep all their tokens and the share they
+    don't use goes to the larger sections, so only the largest sections are trimmed.
+
+    Args:
+        tokens (dict): The token count of each section.
+        total (int): The total token budget.
+
+    Returns:
+        dict: the token budget of each section.
+    """
+    budgets = {}
+    remaining = dict(tokens)
+    left = total
+    while remaining:
+        share = left // len(remaining)
+        fitting = {name: count for name, count in remaining.items() if count <= share}
+        if not fitting:
+            budgets.update({name: share for name in remaining})
+            break
+        for name, count in fitting.items():
+            budgets[name] = count
+            left -= count
+            del remaining[name]
+    return budgets
+
+
+def omitted_note(rows: int) -> str:
+    return f"({rows} more rows omitted)"
+
+
+def _is_table_row(line: str) -> bool:
+    return line.lstrip().startswith("|")
+
+
+def trim_to_budget(text: str, budget: int) -> str:
+    """Trims a section to about `budget` tokens.
+
+    Markdown table rows are dropped first, from the bottom of each table but always
+    keeping its header, then the remaining text is cut at the budget, inside a line
+    (at a word boundary where possible) if that line doesn't fit. What was left out
+    is noted in the text.
+    """
+    if estimate_tokens(text) <= budget:
+        return text
+    lines = text.splitlines()
+    # leave room for the notes on what was left out
+    chars = max(budget, 0) * config.report_chars_per_token
+    limit = chars - min(NOTE_CHARS, chars // 2)
+
+    # Drop table body rows, last ones first, until the section fits
+    body_rows = [index for index, line in enumerate(lines)
+                 if _is_table_row(line) and index >= 2
+                 and _is_table_row(lines[index - 1]) and _is_table_row(lines[index - 2])]
+    dropped = set()
+    size = len(text)
+    for index in reversed(body_rows):
+        if size <= limit:
+            break
+        if index + 1 not in dropped:
+            # a new run of dropped rows gets its "(n more rows omitted)" line
+            size += len(omitted_note(len(body_rows))) + 1
+        dropped.add(index)
+        size -= len(lines[index]) + 1
+    kept = []
+    omitted_rows = 0
+    for index, line in enumerate(lines):
+        if index in dropped:
+            omitted_rows += 1
+            continue
+        if omitted_rows and not _is_table_row(line):
+            kept.append(omitted_note(omitted_rows))
+            omitted_rows = 0
+        kept.append(line)
+    if omitted_rows:
+        kept.append(omitted_note(omitted_rows))
+
+    # Then cut the remaining text at the budget
+    trimmed = []
+    size = 0
+    for line in kept:
+        # every line but the first follows a newline
+        separator = 1 if trimmed else 0
+        if size + separator + len(line) > limit:
+            room = max(limit - size - separator, 0)
+            cut = line[:room]
+            if " " in cut[room // 2:]:
+                cut = cut[:cut.rindex(" ")]
+            if cut.strip():
+                trimmed.append(cut.rstrip())
+            trimmed.append(TRIMMED_NOTE)
+            break
+        trimmed.append(line)
+        size += separator + len(line)
+    return "\n".join(trimmed)
+
+
+def compact_sections(sections: dict, total: int = None) -> tuple:
+    """Fits the report sections into the total token budget.
+
+    Args:
+        sections (dict): The text of each section, by title.
+        total (int): The total token budget, defaults to config.report_input_token_budget.
+
+    Returns:
+        tuple: the compacted text of each section and the token metrics of each section.
+    """
+    total = total or config.report_input_token_budget
+    tokens = {title: estimate_tokens(text) for title, text in sections.items()}
+    budgets = allocate_budget(tokens, total)
+    compacted = {title: trim_to_budget(text, budgets[title]) for title, text in sections.items()}
+    metrics = {
+        title: {"tokens": tokens[title], "budget": budgets[title], "compacted_tokens": estimate_tokens(compacted[title])}
+        for title in sections
+    }
+    return compacted, metrics
+
+
+def compact_report_inputs(callback_context: CallbackContext):
+    """before_agent_callback of report_creation_agent.
+
+    Reads each data agent output once from session state, fits them into the report
+    token budget and writes the combined inputs to report_inputs, and the per-section
+    token counts to report_input_tokens.
+    """
+    state = callback_context.state
+    sections = {}
+    for state_key, title in REPORT_SECTIONS:
+        value = state.get(state_key)
+        sections[title] = str(value).strip() if value else UNAVAILABLE
+
+    compacted, metrics = compact_sections(sections)
+    state[REPORT_INPUTS_KEY] = "\n\n".join(f"### {title}\n{text}" for title, text in compacted.items())
+    state[REPORT_INPUT_TOKENS_KEY] = metrics
+
+    before = sum(section["tokens"] for section in metrics.values())
+    after = sum(section["compacted_tokens"] for section in metrics.values())
+    logger.info(f"report_creation_agent input: {before} tokens compacted to {after} (budget {config.report_input_token_budget}): {metrics}")
+    return None
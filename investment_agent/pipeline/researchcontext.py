@@ -0,0 +1,119 @@
+import asyncio
+import datetime
+import logging
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.adk.tools.tool_context import ToolContext
+from google.genai import types
+from pydantic import BaseModel, Field
+
+from ..config import config
+from ..lsegtools.querybuilder import parse_date_range
+from ..lsegtools.ricresolver import CachedRicAgentTool, ric_from_result
+from .modelrouting import model_for
+
+logger = logging.getLogger("MarketMind")
+
+# Session state keys published by the research context stage
+RESEARCH_REQUEST_KEY = "research_request"
+CONTEXT_STATE_KEYS = ("companies", "rics", "ric_list", "start_date", "end_date", "fiscal_year")
+
+
+class ResearchRequest(BaseModel):
+    companies: list[str] = Field(description="The companies or RICs the user wants analysed, as written by the user")
+    start_date: str = Field(default="", description="The first day of the analysis period as YYYY-MM-DD, empty if not given")
+    end_date: str = Field(default="", description="The last day of the analysis period as YYYY-MM-DD, empty if not given")
+
+
+def research_request_instruction(context) -> str:
+    today = datetime.date.today()
+    return (
+        f"The current date is {today}. "
+        "Extract the companies the user wants analysed and the analysis period from the conversation. "
+        "List each company once, by name or RIC exactly as the user gave it, do not look anything up. "
+        "Convert relative periods such as 'last 6 months' or 'this year' to start and end dates in YYYY-MM-DD using the current date. "
+        f"If the user gives no period, use the current year: {today.year}-01-01 to {today}."
+    )
+
+
+def create_research_request_agent(name: str = "research_request_agent") -> LlmAgent:
+    """Creates the single-turn agent that extracts the companies and period from the user's request."""
+    return LlmAgent(
+        name=name,
+        model=model_for(name),
+        description="Extracts the companies and the analysis period from the user's request",
+        instruction=research_request_instruction,
+        output_schema=ResearchRequest,
+        output_key=RESEARCH_REQUEST_KEY,
+    )
+
+
+def _date_window(request: dict) -> tuple:
+    """Returns the validated (start, end) dates of a request, defaulting to the current year to date."""
+    today = datetime.date.today()
+    try:
+        start, end = parse_date_range(request.get("start_date"), request.get("end_date"))
+    except (TypeError, ValueError):
+        if request.get("start_date") or request.get("end_date"):
+            logger.warning(f"Invalid research period {request.get('start_date')} to {request.get('end_date')}, using the current year")
+        return datetime.date(today.year, 1, 1), today
+    if start > end:
+        start, end = end, start
+    return start, end
+
+
+def fiscal_year_for(end: datetime.date) -> int:
+    """Returns the ESG fiscal year to analyse: config.esg_fiscal_year, else the last full year before `end`."""
+    return config.esg_fiscal_year or end.year - 1
+
+
+class ResearchContextAgent(BaseAgent):
+    """Resolves the RICs and the date window once and publishes them into session state.
+
+    Reads the ResearchRequest written by the research request agent, resolves the
+    companies concurrently through the shared RIC cache (falling back to
+    symbol_to_ric_agent only on a miss) and writes companies, rics, ric_list,
+    start_date, end_date and fiscal_year for the data agents and tools to read, so
+    none of them need their own lookup turns.
+    """
+
+    ric_tool: CachedRicAgentTool
+
+    async def _resolve(self, ctx: InvocationContext, company: str):
+        result = await self.ric_tool.run_async(args={"request": company}, tool_context=ToolContext(ctx))
+        return ric_from_result(result) or None
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        request = ctx.session.state.get(RESEARCH_REQUEST_KEY) or {}
+        if isinstance(request, BaseModel):
+            request = request.model_dump()
+
+        companies = list(dict.fromkeys(str(company).strip() for company in request.get("companies") or [] if str(company).strip()))
+        resolved = await asyncio.gather(*(self._resolve(ctx, company) for company in companies))
+        rics = list(dict.fromkeys(ric for ric in resolved if ric))
+        unresolved = [company for company, ric in zip(companies, resolved) if not ric]
+        start, end = _date_window(request)
+
+        state_delta = {
+            "companies": companies,
+            "rics": rics,
+            "ric_list": ", ".join(rics),
+            "start_date": start.isoformat(),
+            "end_date": end.isoformat(),
+            "fiscal_year": fiscal_year_for(end),
+        }
+        logger.info(f"Research context: {state_delta}, unresolved companies: {unresolved}")
+
+        summary = f"Analysing {state_delta['ric_list'] or 'no RICs'} from {start} to {end}."
+        if unresolved:
+            summary += f" Could not find a RIC for {', '.join(unresolved)}."
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=summary)]),
+            actions=EventActions(state_delta=state_delta),
+        )
@@ -0,0 +1,20 @@
+import asyncio
+
+import pytest
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+
+async def _run(agent, state: dict) -> tuple:
+    runner = InMemoryRunner(agent=agent, app_name="tests")
+    session = await runner.session_service.create_session(app_name="tests", user_id="user", state=state)
+    message = types.Content(role="user", parts=[types.Part(text="Analyse the companies")])
+    events = [event async for event in runner.run_async(user_id="user", session_id=session.id, new_message=message)]
+    session = await runner.session_service.get_session(app_name="tests", user_id="user", session_id=session.id)
+    return events, session.state
+
+
+@pytest.fixture
+def run_agent():
+    """Runs an agent for one user turn on a fresh session, returns its events and the final session state."""
+    return lambda agent, state: asyncio.run(_run(agent, state))
@@ -0,0 +1,31 @@
+import asyncio
+
+from investment_agent.generaltools import asyncfinhubtools
+from investment_agent.generaltools.asyncfinhubtools import AsyncFinnhubClient
+
+
+def test_async_client_builds_no_requests_session():
+    assert AsyncFinnhubClient(api_key="key").session is None
+
+
+def test_loop_session_is_closed_with_its_loop():
+    async def get_session():
+        return await asyncfinhubtools._get_loop_session()
+
+    state = asyncio.run(get_session())
+
+    assert state.session.closed
+    assert len(asyncfinhubtools._loop_sessions) == 0
+
+
+def test_sessions_of_loops_closed_without_shutdown_are_dropped():
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(asyncfinhubtools._get_loop_session())
+    # closed without shutting down its async generators, so its closer never runs
+    loop.close()
+    closer_frame = asyncfinhubtools._loop_sessions[loop].closer.ag_frame
+    assert loop not in closer_frame.f_locals.values()
+
+    asyncio.run(asyncfinhubtools._get_loop_session())
+
+    assert len(asyncfinhubtools._loop_sessions) == 0
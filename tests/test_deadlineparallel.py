@@ -0,0 +1,61 @@
+import asyncio
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+
+from investment_agent.config import config
+from investment_agent.pipeline.deadlineparallel import AGENT_TIMINGS_KEY, DeadlineParallelAgent
+
+
+class SleepyAgent(BaseAgent):
+    """Writes its output_key after sleeping for `delay` seconds."""
+
+    output_key: str
+    delay: float = 0.0
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        await asyncio.sleep(self.delay)
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(state_delta={self.output_key: f"{self.name} report"}),
+        )
+
+
+def test_a_sub_agent_past_its_deadline_is_reported_unavailable(monkeypatch, run_agent):
+    monkeypatch.setattr(config, "agent_deadlines", {"slow_agent": 0.2})
+    monkeypatch.setattr(config, "default_agent_deadline", 5.0)
+    agent = DeadlineParallelAgent(name="data_agents", sub_agents=[
+        SleepyAgent(name="fast_agent", output_key="fast_report"),
+        SleepyAgent(name="slow_agent", output_key="slow_report", delay=10.0),
+    ])
+
+    events, state = run_agent(agent, {})
+
+    assert state["fast_report"] == "fast_agent report"
+    assert state["slow_report"] == "Section unavailable: slow_agent timed out after 0.2s."
+    timings = state[AGENT_TIMINGS_KEY]
+    assert timings["fast_agent"]["status"] == "completed"
+    assert timings["slow_agent"]["status"] == "timed_out"
+    assert timings["slow_agent"]["seconds"] < 1.0
+    # each sub-agent runs on its own branch, as under ParallelAgent
+    assert {event.branch for event in events if event.author == "fast_agent"} == {"data_agents.fast_agent"}
+
+
+def test_a_failing_sub_agent_is_reported_unavailable(run_agent):
+    class FailingAgent(SleepyAgent):
+        async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+            raise RuntimeError("backend down")
+            yield
+
+    agent = DeadlineParallelAgent(name="data_agents", sub_agents=[
+        FailingAgent(name="broken_agent", output_key="broken_report"),
+    ])
+
+    _, state = run_agent(agent, {})
+
+    assert state["broken_report"] == "Section unavailable: broken_agent failed."
+    assert state[AGENT_TIMINGS_KEY]["broken_agent"]["status"] == "failed"
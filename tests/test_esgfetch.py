@@ -0,0 +1,142 @@
+import asyncio
+import json
+
+import pytest
+
+from investment_agent.config import config
+from investment_agent.lsegtools import esgfetch
+from investment_agent.lsegtools.esgfetch import SingleFlight
+
+ROWS = [
+    {"pillar": "Env", "ric": "VOD.L", "indicator": json.dumps({"orgpermid": 1, "item": 10, "value": 0.5}),
+     "item": json.dumps({"item": 10, "title": "Emissions"})},
+    {"pillar": "Env", "ric": "BT.L", "indicator": json.dumps({"orgpermid": 2, "item": 10, "value": 0.7}),
+     "item": json.dumps({"item": 10, "title": "Emissions"})},
+    {"pillar": "Soc", "ric": "VOD.L", "indicator": json.dumps({"orgpermid": 1, "item": 20, "value": 3}),
+     "item": json.dumps({"item": 20, "title": "Employees"})},
+]
+
+
+class FakeExecutor:
+    def __init__(self, rows=ROWS, delay=0.0, error=None):
+        self.rows = rows
+        self.delay = delay
+        self.error = error
+        self.queries = []
+
+    def get_table_columns(self, table_id):
+        return ["orgpermid", "item", "fy"] if "Indicator" in table_id else ["item", "title"]
+
+    def query_to_records(self, query, label="query"):
+        self.queries.append(label)
+        return [dict(row) for row in self.rows]
+
+    async def query_to_records_async(self, query, label="query"):
+        self.queries.append(label)
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return [dict(row) for row in self.rows]
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    executor = FakeExecutor()
+    monkeypatch.setattr(esgfetch, "get_executor", lambda: executor)
+    monkeypatch.setattr(config, "result_encoding", "columns")
+    monkeypatch.setattr(config, "result_cache_enabled", False)
+    monkeypatch.setattr(config, "esg_combined_fetch", True)
+    esgfetch._recent_pillars.clear()
+    yield executor
+    esgfetch._recent_pillars.clear()
+
+
+def decode(report: dict) -> dict:
+    return json.loads(report["report"])
+
+
+def test_split_pillars_reports_each_pillar_and_the_schema_of_empty_ones(executor):
+    reports = esgfetch._split_pillars([dict(row) for row in ROWS])
+
+    env = decode(reports["Env"])
+    assert env["rows"] == 2
+    assert env["columns"] == ["ric", "orgpermid", "item", "value", "title"]
+    assert env["data"]["value"] == [0.5, 0.7]
+    assert decode(reports["Soc"])["rows"] == 1
+    gov = decode(reports["Gov"])
+    assert gov["rows"] == 0
+    assert gov["columns"] == ["ric", "orgpermid", "item", "fy", "title"]
+
+
+def test_pillars_are_fetched_by_one_query(executor):
+    reports = [esgfetch.fetch_esg_pillar(["VOD.L", "BT.L"], 2024, pillar) for pillar in ("Env", "Gov", "Soc")]
+
+    assert executor.queries == ["getESGIndicators"]
+    assert [decode(report)["rows"] for report in reports] == [2, 0, 1]
+
+
+def test_concurrent_async_pillars_share_the_query(executor):
+    executor.delay = 0.05
+
+    async def fetch_all():
+        return await asyncio.gather(*(esgfetch.fetch_esg_pillar_async(["BT.L", "VOD.L"], 2024, pillar)
+                                      for pillar in ("Env", "Gov", "Soc")))
+
+    reports = asyncio.run(fetch_all())
+    assert executor.queries == ["getESGIndicators"]
+    assert [decode(report)["rows"] for report in reports] == [2, 0, 1]
+
+
+def test_cancelling_the_first_caller_does_not_cancel_the_others():
+    single_flight = SingleFlight()
+    runs = []
+
+    async def query():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return "rows"
+
+    async def scenario():
+        leader = asyncio.create_task(single_flight.do_async("key", query))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(single_flight.do_async("key", query))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(scenario()) == "rows"
+    assert runs == [1]
+    assert single_flight._calls == {}
+
+
+def test_errors_reach_every_caller_and_the_next_call_retries():
+    single_flight = SingleFlight()
+    runs = []
+
+    async def failing():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("quota exceeded")
+
+    async def scenario():
+        return await asyncio.gather(*(single_flight.do_async("key", failing) for _ in range(3)),
+                                    return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert [str(result) for result in results] == ["quota exceeded"] * 3
+    assert runs == [1]
+    asyncio.run(scenario())
+    assert runs == [1, 1]
+
+
+def test_sync_errors_reach_the_caller_and_clear_the_call():
+    single_flight = SingleFlight()
+
+    def failing():
+        raise RuntimeError("quota exceeded")
+
+    with pytest.raises(RuntimeError):
+        single_flight.do("key", failing)
+    assert single_flight.do("key", lambda: "rows") == "rows"
@@ -0,0 +1,86 @@
+import asyncio
+import json
+
+import pytest
+
+from investment_agent.config import config
+from investment_agent.lsegtools import esgfetch
+from investment_agent.pipeline.fetchengine import DATA_FORMAT_KEY, FETCH_TIMINGS_KEY, LSEG_FETCHES, Fetch, FetchEngineAgent
+
+ESG_FETCHES = [fetch for fetch in LSEG_FETCHES if fetch.state_key.startswith("esg")]
+ROWS = [
+    {"pillar": pillar, "ric": "VOD.L", "indicator": json.dumps({"orgpermid": 1, "item": item, "value": 1.0}),
+     "item": json.dumps({"item": item, "title": title})}
+    for pillar, item, title in (("Env", 10, "Emissions"), ("Gov", 20, "Board"), ("Soc", 30, "Employees"))
+]
+
+
+class FakeExecutor:
+    def __init__(self):
+        self.queries = []
+
+    def get_table_columns(self, table_id):
+        return ["orgpermid", "item"]
+
+    async def query_to_records_async(self, query, label="query"):
+        self.queries.append((label, query.parameters))
+        await asyncio.sleep(0.05)
+        return [dict(row) for row in ROWS]
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    executor = FakeExecutor()
+    monkeypatch.setattr(esgfetch, "get_executor", lambda: executor)
+    monkeypatch.setattr(config, "result_cache_enabled", False)
+    monkeypatch.setattr(config, "esg_combined_fetch", True)
+    esgfetch._recent_pillars.clear()
+    yield executor
+    esgfetch._recent_pillars.clear()
+
+
+def test_esg_pillars_are_fetched_by_one_query(executor, run_agent):
+    agent = FetchEngineAgent(name="data_fetch_agent", fetches=ESG_FETCHES)
+
+    events, state = run_agent(agent, {"rics": ["VOD.L"], "fiscal_year": 2024})
+
+    assert [label for label, _ in executor.queries] == ["getESGIndicators"]
+    for fetch, pillar in zip(ESG_FETCHES, ("Env", "Gov", "Soc")):
+        result = state[fetch.state_key]
+        assert result["status"] == "success"
+        assert json.loads(result["report"])["rows"] == 1, pillar
+    assert set(state[FETCH_TIMINGS_KEY]) == {fetch.state_key for fetch in ESG_FETCHES}
+    assert DATA_FORMAT_KEY in state
+    assert len(events) == 1
+
+
+def test_failures_and_timeouts_become_error_results(monkeypatch, run_agent):
+    monkeypatch.setattr(config, "fetch_deadline", 0.1)
+
+    def failing(rics):
+        raise RuntimeError("quota exceeded")
+
+    async def slow(rics):
+        await asyncio.sleep(5)
+
+    async def fine(rics):
+        return {"status": "success", "report": rics}
+
+    agent = FetchEngineAgent(name="data_fetch_agent", fetches=[
+        Fetch("failing_data", failing, lambda state: {"rics": state["rics"]}),
+        Fetch("slow_data", slow, lambda state: {"rics": state["rics"]}),
+        Fetch("fine_data", fine, lambda state: {"rics": state["rics"]}),
+    ])
+
+    _, state = run_agent(agent, {"rics": ["VOD.L"]})
+
+    assert state["failing_data"] == {"status": "error", "function": "failing", "error_message": "quota exceeded"}
+    assert state["slow_data"]["status"] == "error" and "Timed out" in state["slow_data"]["error_message"]
+    assert state["fine_data"] == {"status": "success", "report": ["VOD.L"]}
+
+
+def test_no_rics_skips_the_queries(executor, run_agent):
+    _, state = run_agent(FetchEngineAgent(name="data_fetch_agent", fetches=ESG_FETCHES), {"rics": [], "fiscal_year": 2024})
+
+    assert executor.queries == []
+    assert all(state[fetch.state_key]["status"] == "error" for fetch in ESG_FETCHES)
@@ -0,0 +1,41 @@
+import asyncio
+
+from investment_agent.config import config
+from investment_agent.generaltools import finnhubcache
+from investment_agent.generaltools.finnhubcache import FinnhubCache, cached_endpoint
+
+
+def test_memory_is_bounded_least_recently_used_first():
+    cache = FinnhubCache(max_entries=2)
+    cache.set("a", {"status": "success"}, 60)
+    cache.set("b", {"status": "success"}, 60)
+    assert cache.get("a") is not None
+    cache.set("c", {"status": "success"}, 60)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def test_cached_endpoint_serves_repeated_calls(monkeypatch):
+    monkeypatch.setattr(config, "finnhub_cache_enabled", True)
+    monkeypatch.setattr(finnhubcache, "_finnhub_cache", FinnhubCache(max_entries=8))
+    calls = []
+
+    @cached_endpoint
+    def company_profile(symbol: str) -> dict:
+        calls.append(symbol)
+        return {"status": "success", "report": symbol}
+
+    @cached_endpoint
+    async def insider_sentiment(symbol: str) -> dict:
+        calls.append(symbol)
+        return {"status": "error", "error_message": "no data"}
+
+    assert company_profile("aapl") == {"status": "success", "report": "aapl"}
+    assert company_profile(" AAPL ") == {"status": "success", "report": "aapl"}
+    assert company_profile.__name__ == "company_profile"
+    # errors are never cached
+    asyncio.run(insider_sentiment("MSFT"))
+    asyncio.run(insider_sentiment("MSFT"))
+    assert calls == ["aapl", "MSFT", "MSFT"]
@@ -0,0 +1,121 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+
+from investment_agent.config import config
+from investment_agent.generaltools.finnhubclient import FinnhubClient, TokenBucket
+
+
+class StubFinnhub(BaseHTTPRequestHandler):
+    """Answers each path with the next (status, body) of its script, recording the queries."""
+
+    scripts = {}
+    queries = []
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        StubFinnhub.queries.append((url.path, {name: values[0] for name, values in parse_qs(url.query).items()}))
+        script = StubFinnhub.scripts.get(url.path, [])
+        status, body = script.pop(0) if len(script) > 1 else script[0]
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        if status == 429:
+            self.send_header("Retry-After", "0")
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    monkeypatch.setattr(config, "finnhub_max_retries", 2)
+    monkeypatch.setattr(config, "finnhub_backoff_base", 0.01)
+    StubFinnhub.scripts = {}
+    StubFinnhub.queries = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubFinnhub)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def make_client(base_url: str) -> FinnhubClient:
+    return FinnhubClient(api_key="test-key", base_url=base_url, limiter=TokenBucket(rate=1000, capacity=100))
+
+
+def test_retries_throttled_requests(stub):
+    StubFinnhub.scripts["/search"] = [(429, {}), (429, {}), (200, {"count": 1, "result": [{"symbol": "VOD"}]})]
+    client = make_client(stub)
+
+    assert client.symbol_lookup("Vodafone")["result"] == [{"symbol": "VOD"}]
+    stats = client.get_stats()
+    assert stats["requests"] == 3
+    assert stats["throttled"] == 2
+    assert stats["retries"] == 2
+    assert stats["failures"] == 0
+    assert StubFinnhub.queries[-1] == ("/search", {"q": "Vodafone", "token": "test-key"})
+
+
+def test_gives_up_after_max_retries(stub):
+    StubFinnhub.scripts["/stock/metric"] = [(503, {})]
+    client = make_client(stub)
+
+    with pytest.raises(requests.HTTPError):
+        client.company_basic_financials("VOD", "all")
+    stats = client.get_stats()
+    assert stats["requests"] == config.finnhub_max_retries + 1
+    assert stats["server_errors"] == config.finnhub_max_retries + 1
+    assert stats["failures"] == 1
+
+
+def test_client_errors_are_not_retried(stub):
+    StubFinnhub.scripts["/stock/profile2"] = [(403, {"error": "no access"})]
+    client = make_client(stub)
+
+    with pytest.raises(requests.HTTPError):
+        client.company_profile2(symbol="VOD")
+    assert client.get_stats()["requests"] == 1
+
+
+def test_filings_sends_the_finnhub_client_parameters(stub):
+    StubFinnhub.scripts["/stock/filings"] = [(200, [{"accessNumber": "1", "form": "10-Q"}])]
+    client = make_client(stub)
+
+    assert client.filings(symbol="AAPL", _from="2025-01-01", to="2025-03-31") == [{"accessNumber": "1", "form": "10-Q"}]
+    path, query = StubFinnhub.queries[-1]
+    assert path == "/stock/filings"
+    assert query["symbol"] == "AAPL"
+    assert query["from"] == "2025-01-01"
+    assert query["to"] == "2025-03-31"
+    # the dates used to land in the cik and accessNumber slots
+    assert not query.get("cik") and not query.get("accessNumber")
+
+
+def test_connection_errors_are_retried(monkeypatch):
+    monkeypatch.setattr(config, "finnhub_max_retries", 1)
+    monkeypatch.setattr(config, "finnhub_backoff_base", 0.01)
+    client = make_client("http://127.0.0.1:1")
+
+    with pytest.raises(requests.ConnectionError):
+        client.symbol_lookup("Vodafone")
+    stats = client.get_stats()
+    assert stats["requests"] == 2
+    assert stats["retries"] == 1
+    assert stats["failures"] == 1
+
+
+def test_token_bucket_spaces_requests_beyond_the_burst():
+    bucket = TokenBucket(rate=10, capacity=2)
+
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.02)
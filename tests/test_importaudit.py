@@ -0,0 +1,51 @@
+from investment_agent import importaudit
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       100 |        100 |       aiohttp.client
+import time:        50 |        150 |     aiohttp
+import time:       200 |        350 |   google.genai.types
+import time:        80 |         80 |     pandas.core
+import time:        20 |        100 |   pandas
+import time:        10 |        460 | investment_agent.lsegtools
+import time:         5 |        465 | investment_agent
+"""
+
+
+def test_parses_the_importer_of_each_module():
+    modules, importers = importaudit._parse_importtime(IMPORTTIME)
+
+    assert modules["investment_agent"] == (5e-6, 465e-6)
+    assert importers["aiohttp.client"] == "aiohttp"
+    assert importers["aiohttp"] == "google.genai.types"
+    assert importers["pandas"] == "investment_agent.lsegtools"
+    assert "investment_agent" not in importers
+    assert importaudit.deferred_importers(modules, importers) == {
+        "aiohttp": ["google.genai.types"],
+        "pandas": ["investment_agent.lsegtools"],
+    }
+    assert importaudit.dependency_imports(importers) == ["google.genai.types", "pandas"]
+
+
+def test_budget_fails_a_slow_import(monkeypatch):
+    modules, importers = importaudit._parse_importtime(IMPORTTIME)
+    monkeypatch.setattr(importaudit, "measure_import", lambda: (modules, importers))
+    times = {("investment_agent",): 1.5, ("google.genai.types", "pandas"): 1.0}
+    monkeypatch.setattr(importaudit, "time_import", lambda names: times[tuple(names)])
+
+    results = importaudit.audit_imports()
+
+    assert results["import_ratio"] == 1.5
+    assert results["deferred_loaded_by_package"] == {"pandas": ["investment_agent.lsegtools"]}
+    assert not results["passed"]
+
+
+def test_package_import_defers_the_client_libraries_within_budget():
+    results = importaudit.audit_imports()
+
+    assert results["import_ratio"] <= results["budget_ratio"], results
+    assert results["deferred_loaded_by_package"] == {}
+    loaded = results["deferred_loaded_by_dependencies"]
+    # only aiohttp may come in, through google.genai which ADK imports
+    assert set(loaded) <= {"aiohttp"}
+    assert all(importer.startswith("google.genai") for importer in loaded.get("aiohttp", []))
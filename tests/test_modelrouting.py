@@ -0,0 +1,43 @@
+import time
+from types import SimpleNamespace
+
+from investment_agent.config import ResearchConfiguration, config
+from investment_agent.pipeline import modelrouting
+from investment_agent.pipeline.modelrouting import record_agent_latency, start_latency_budget
+
+
+def callback_context(invocation_id: str, agent_name: str) -> SimpleNamespace:
+    return SimpleNamespace(invocation_id=invocation_id, agent_name=agent_name)
+
+
+def test_agent_models_follow_the_gemini_model_fields():
+    configuration = ResearchConfiguration(gemini_pro_model="gemini-3-pro",
+                                          agent_models={"vwap_agent": "gemini-3-flash"})
+
+    assert configuration.agent_models["report_creation_agent"] == "gemini-3-pro"
+    assert configuration.agent_models["vwap_agent"] == "gemini-3-flash"
+    assert configuration.agent_models["companyinfo_agent"] == configuration.gemini_lite_model
+    assert config.agent_models["companynews_agent"] == config.gemini_flash_model
+
+
+def test_finished_agents_release_their_start_time(monkeypatch):
+    monkeypatch.setattr(modelrouting, "_started", {})
+    monkeypatch.setattr(modelrouting, "_stats", {})
+
+    start_latency_budget(callback_context("run-1", "vwap_agent"))
+    record_agent_latency(callback_context("run-1", "vwap_agent"))
+
+    assert modelrouting._started == {}
+    assert modelrouting.get_routing_stats()["vwap_agent"]["runs"] == 1
+
+
+def test_start_times_of_cancelled_agents_are_evicted(monkeypatch):
+    monkeypatch.setattr(modelrouting, "_started", {})
+    monkeypatch.setattr(config, "latency_clock_max_age", 60)
+    # an agent cancelled two minutes ago, and one still running
+    modelrouting._started[("run-1", "vwap_agent")] = time.perf_counter() - 120
+    modelrouting._started[("run-2", "vwap_agent")] = time.perf_counter() - 10
+
+    start_latency_budget(callback_context("run-3", "companyinfo_agent"))
+
+    assert set(modelrouting._started) == {("run-2", "vwap_agent"), ("run-3", "companyinfo_agent")}
@@ -0,0 +1,61 @@
+from investment_agent.generaltools.passageindex import PassageIndex, chunk_text, tokenize
+
+
+def test_chunk_text_keeps_whole_lines_with_overlap():
+    lines = [f"line {number} " + "x" * 30 for number in range(10)]
+    passages = chunk_text("\n".join(lines), size=120, overlap=50)
+
+    assert all(len(passage) <= 120 for passage in passages)
+    assert passages[0].splitlines() == lines[:3]
+    # each passage starts with the last line of the previous one
+    for previous, passage in zip(passages, passages[1:]):
+        assert passage.splitlines()[0] == previous.splitlines()[-1]
+    assert {line for passage in passages for line in passage.splitlines()} == set(lines)
+
+
+def test_chunk_text_cuts_long_lines():
+    passages = chunk_text("y" * 250, size=100, overlap=20)
+
+    assert [len(passage) for passage in passages] == [100, 100, 90]
+
+
+def test_tokenize_drops_stopwords():
+    assert tokenize("The Revenue of the Q3 was 1.5bn") == ["revenue", "q3", "1.5bn"]
+
+
+def make_index(max_documents: int = 10) -> PassageIndex:
+    index = PassageIndex(max_documents=max_documents)
+    index.add_document("filing:1", "Revenue grew on strong iPhone demand.\nSupply chain risk remains.",
+                       {"source": "10-Q 1", "symbol": "AAPL"})
+    index.add_document("filing:2", "Cloud revenue grew, revenue guidance raised, revenue up again.",
+                       {"source": "10-Q 2", "symbol": "MSFT"})
+    index.add_document("news:3", "Chip supply chain disruption hits carmakers.", {"source": "news", "symbol": "TSLA"})
+    return index
+
+
+def test_search_ranks_passages_by_bm25():
+    results = make_index().search("revenue guidance", top_k=5)
+
+    assert [result["source"] for result in results] == ["10-Q 2", "10-Q 1"]
+    assert results[0]["score"] > results[1]["score"]
+    assert make_index().search("the of and") == []
+
+
+def test_search_filters_by_symbol():
+    results = make_index().search("supply chain", top_k=5, symbol=" tsla ")
+
+    assert [result["source"] for result in results] == ["news"]
+
+
+def test_documents_are_added_once_and_evicted_least_recently_used_first():
+    index = make_index(max_documents=3)
+    assert index.add_document("filing:1", "Revenue grew.", {"symbol": "AAPL"}) == 0
+    assert index.search("cloud")[0]["source"] == "10-Q 2"
+
+    index.add_document("news:4", "Battery costs fell.", {"source": "news 4", "symbol": "TSLA"})
+
+    # filing:1 and filing:2 were used since news:3 was added
+    assert not index.has_document("news:3")
+    assert index.search("carmakers") == []
+    assert index.get_stats()["documents"] == 3
+    assert index.search("battery")[0]["source"] == "news 4"
@@ -0,0 +1,101 @@
+import datetime
+
+import pytest
+
+from investment_agent.config import config
+from investment_agent.lsegtools import projection, tickhistory
+from investment_agent.lsegtools.projection import (ProjectionError, decode_page_token, encode_page_token,
+                                                   page_result, resolve_columns)
+
+TABLE = "dataset.events"
+
+
+class FakeExecutor:
+    def __init__(self, fields):
+        self.fields = fields
+
+    def get_table_fields(self, table_id):
+        return self.fields
+
+    def get_table_columns(self, table_id):
+        return [name for name, _, _ in self.fields]
+
+
+def use_schema(monkeypatch, fields):
+    monkeypatch.setattr(projection, "get_executor", lambda: FakeExecutor(fields))
+    projection._reported_tables.clear()
+
+
+EVENTS = [("RIC", "STRING", "NULLABLE"), ("SrcDt", "TIMESTAMP", "NULLABLE"), ("Headline", "STRING", "NULLABLE"),
+          ("Body", "STRING", "NULLABLE"), ("Raw", "BYTES", "NULLABLE"), ("Tags", "STRING", "REPEATED"),
+          ("Extra", "RECORD", "NULLABLE")]
+
+
+def test_requested_columns_map_onto_the_schema(monkeypatch):
+    use_schema(monkeypatch, EVENTS)
+
+    assert resolve_columns(TABLE, [" headline", "ric", "Headline"], ["srcdt"]) == ["Headline", "RIC"]
+
+
+def test_unknown_requested_columns_are_an_error(monkeypatch):
+    use_schema(monkeypatch, EVENTS)
+
+    with pytest.raises(ProjectionError, match="'topic'"):
+        resolve_columns(TABLE, ["headline", "topic"], ["srcdt"])
+
+
+def test_defaults_are_used_when_they_all_exist(monkeypatch):
+    use_schema(monkeypatch, EVENTS)
+
+    assert resolve_columns(TABLE, None, ["srcdt", "ric"]) == ["SrcDt", "RIC"]
+
+
+def test_missing_defaults_add_the_compact_schema_columns(monkeypatch):
+    use_schema(monkeypatch, EVENTS)
+    monkeypatch.setattr(config, "projection_excluded_columns", ["body"])
+
+    assert resolve_columns(TABLE, None, ["headline", "topic"]) == ["Headline", "RIC", "SrcDt"]
+
+
+def test_all_missing_defaults_fall_back_to_the_schema_instead_of_failing(monkeypatch):
+    use_schema(monkeypatch, EVENTS)
+
+    assert resolve_columns(TABLE, [], ["topic", "brief"]) == ["RIC", "SrcDt", "Headline", "Body"]
+
+
+def test_a_table_of_large_columns_selects_them_all(monkeypatch):
+    use_schema(monkeypatch, [("Raw", "BYTES", "NULLABLE"), ("Tags", "STRING", "REPEATED")])
+
+    assert resolve_columns(TABLE, None, ["topic"]) == ["Raw", "Tags"]
+
+
+def test_page_token_round_trip():
+    assert decode_page_token("") == 0
+    assert decode_page_token(encode_page_token(150)) == 150
+    for token in ("not-a-token", encode_page_token(-1), "eyJwYWdlIjogMX0="):
+        with pytest.raises(ProjectionError):
+            decode_page_token(token)
+
+
+def test_page_result_returns_the_next_token_only_when_rows_remain():
+    records = [{"n": n} for n in range(6)]
+
+    page, token = page_result(records, 5, 10)
+    assert page == records[:5]
+    assert decode_page_token(token) == 15
+    assert page_result(records[:5], 5, 10) == (records[:5], "")
+
+
+def test_significant_events_query_pages_with_the_token(monkeypatch):
+    use_schema(monkeypatch, EVENTS)
+    monkeypatch.setattr(config, "significant_events_columns", ["ric", "srcdt", "headline"])
+
+    query, columns, page_size, offset = tickhistory.build_significant_events_query(
+        ["VOD.L"], datetime.date(2025, 1, 1), datetime.date(2025, 3, 31), None, 20, encode_page_token(40))
+
+    assert columns == ["RIC", "SrcDt", "Headline"]
+    assert (page_size, offset) == (20, 40)
+    assert "SELECT b.`RIC`, b.`SrcDt`, b.`Headline` from" in query.sql
+    parameters = {parameter.name: parameter.value for parameter in query.parameters if parameter.name != "rics"}
+    assert parameters == {"start_date": datetime.date(2025, 1, 1), "end_date": datetime.date(2025, 3, 31),
+                          "limit": 21, "offset": 40}
@@ -0,0 +1,57 @@
+import datetime
+
+import pytest
+
+from investment_agent.lsegtools import esgfetch
+from investment_agent.lsegtools.querybuilder import build_query, canonical_sql, parse_date_range
+from investment_agent.lsegtools.tickhistory import build_vwap_query
+
+
+def vwap_query(rics, start_date, end_date):
+    return build_vwap_query(rics, *parse_date_range(start_date, end_date))
+
+
+def test_equivalent_requests_build_identical_queries():
+    query = vwap_query(["VOD.L", "BT.L"], "2025-01-02", "2025-01-31")
+
+    for other in (vwap_query(["BT.L", "VOD.L"], "2025/01/02", "January 31, 2025"),
+                  vwap_query([" BT.L", "VOD.L", "BT.L"], "20250102", "31 Jan 2025"),
+                  vwap_query("VOD.L,BT.L", datetime.date(2025, 1, 2), datetime.datetime(2025, 1, 31, 16, 30))):
+        assert other.sql == query.sql
+        assert other.parameters == query.parameters
+
+
+def test_different_requests_build_different_parameters_not_sql():
+    query = vwap_query(["VOD.L"], "2025-01-02", "2025-01-31")
+    other = vwap_query(["BT.L"], "2025-02-03", "2025-02-28")
+
+    assert other.sql == query.sql
+    assert other.parameters != query.parameters
+    assert "VOD.L" not in query.sql and "2025" not in query.sql
+
+
+def test_sql_is_canonical_whatever_the_indentation():
+    assert canonical_sql("\n    SELECT a\n\n        FROM t   \n") == "SELECT a\nFROM t"
+    assert build_query("SELECT 1\n   LIMIT @n", n=1).sql == build_query("  SELECT 1\nLIMIT @n  ", n=1).sql
+
+
+def test_parameters_are_typed_and_sorted_by_name():
+    query = build_query("SELECT @b, @a, @c, @d", b=datetime.date(2025, 1, 2), a=3, c="x", d=datetime.datetime(2025, 1, 2))
+
+    assert [(parameter.name, parameter.type_) for parameter in query.parameters] == [
+        ("a", "INT64"), ("b", "DATE"), ("c", "STRING"), ("d", "TIMESTAMP")]
+    assert query.parameters[3].value.tzinfo == datetime.timezone.utc
+    assert query.job_config().use_query_cache
+
+
+def test_esg_query_is_identical_for_reordered_rics():
+    first = esgfetch._pillars_query(["VOD.L", "BT.L"], 2024, list(esgfetch.ESG_PILLAR_TABLES))
+    second = esgfetch._pillars_query(["BT.L", "VOD.L", "VOD.L"], "2024", list(esgfetch.ESG_PILLAR_TABLES))
+
+    assert first[0].sql == second[0].sql
+    assert first[0].parameters == second[0].parameters
+
+
+def test_unparseable_dates_are_rejected():
+    with pytest.raises(ValueError):
+        parse_date_range("01/02/2025", "2025-01-31")
@@ -0,0 +1,76 @@
+import pytest
+
+from investment_agent.config import config
+from investment_agent.pipeline.reportcompaction import (TRIMMED_NOTE, allocate_budget, compact_sections,
+                                                        estimate_tokens, trim_to_budget)
+
+
+@pytest.fixture(autouse=True)
+def four_chars_per_token(monkeypatch):
+    monkeypatch.setattr(config, "report_chars_per_token", 4)
+
+
+def table(rows: int) -> list:
+    return ["| Date | VWAP |", "|---|---|"] + [f"| 2025-01-{day:02d} | {100 + day}.5 |" for day in range(1, rows + 1)]
+
+
+def test_small_sections_keep_their_tokens_and_give_the_rest_to_large_ones():
+    budgets = allocate_budget({"info": 100, "vwap": 5000, "news": 3000, "esg": 200}, 2000)
+
+    assert budgets["info"] == 100 and budgets["esg"] == 200
+    assert budgets["vwap"] == budgets["news"] == 850
+    assert sum(budgets.values()) <= 2000
+
+
+def test_nothing_is_trimmed_when_everything_fits():
+    tokens = {"info": 100, "vwap": 500}
+
+    assert allocate_budget(tokens, 1000) == tokens
+
+
+def test_text_within_budget_is_unchanged():
+    text = "\n".join(["Summary line."] + table(3))
+
+    assert trim_to_budget(text, estimate_tokens(text)) == text
+
+
+def test_table_rows_are_dropped_before_text():
+    summary = "VWAP rose steadily over the month on heavy volume."
+    lines = [summary] + table(30) + ["Closing remarks on the trend."]
+    text = "\n".join(lines)
+
+    trimmed = trim_to_budget(text, 150)
+
+    kept = trimmed.splitlines()
+    assert kept[0] == summary
+    assert kept[1:3] == lines[1:3]  # the table header is kept
+    assert kept[3:5] == lines[3:5]  # the first rows are kept, the last ones dropped
+    assert any(line.endswith("more rows omitted)") for line in kept)
+    assert kept[-1] == "Closing remarks on the trend."
+    assert TRIMMED_NOTE not in trimmed
+    assert estimate_tokens(trimmed) <= 150
+
+
+def test_text_is_cut_at_a_word_once_the_rows_are_gone():
+    text = "\n".join(["word " * 200] + table(2))
+
+    trimmed = trim_to_budget(text, 50)
+
+    assert trimmed.endswith(TRIMMED_NOTE)
+    assert trimmed.splitlines()[0].endswith("word")
+    assert estimate_tokens(trimmed) <= 50
+
+
+def test_tiny_budgets_still_return_the_note():
+    assert trim_to_budget("x" * 1000, 0) == TRIMMED_NOTE
+
+
+def test_compact_sections_reports_the_metrics():
+    sections = {"Info": "Company info.", "VWAP": "\n".join(table(200))}
+
+    compacted, metrics = compact_sections(sections, total=300)
+
+    assert compacted["Info"] == "Company info."
+    assert metrics["Info"] == {"tokens": 4, "budget": 4, "compacted_tokens": 4}
+    assert metrics["VWAP"]["budget"] == 296
+    assert metrics["VWAP"]["compacted_tokens"] <= 296 < metrics["VWAP"]["tokens"]
@@ -0,0 +1,84 @@
+import datetime
+import os
+import time
+
+import pytest
+
+from investment_agent.config import config
+from investment_agent.lsegtools import resultcache, vwapstore
+from investment_agent.lsegtools.resultcache import ResultCache, make_key, normalize_date, ttl_for
+
+
+def test_keys_ignore_ric_order_duplicates_and_spacing():
+    key = make_key("getVWAP", {"rics": ["VOD.L", "BT.L"], "start_date": "2025-01-02"})
+
+    assert make_key("getVWAP", {"rics": [" BT.L", "VOD.L", "BT.L"], "start_date": "2025-01-02"}) == key
+    assert make_key("getVWAP", {"rics": "VOD.L,BT.L", "start_date": "2025-01-02"}) == key
+    # RICs are case-sensitive
+    assert make_key("getVWAP", {"rics": ["vod.l", "BT.L"], "start_date": "2025-01-02"}) != key
+
+
+@pytest.mark.parametrize("value", ["2025-01-02", "2025/01/02", "20250102", "2 January 2025", "January 2, 2025",
+                                   "2 Jan 2025", "Jan 2, 2025", " 2025-01-02T10:30:00 ",
+                                   datetime.date(2025, 1, 2), datetime.datetime(2025, 1, 2, 10, 30)])
+def test_equivalent_dates_normalize_alike(value):
+    assert normalize_date(value) == "2025-01-02"
+
+
+def test_ambiguous_numeric_dates_are_left_unparsed():
+    assert normalize_date("01/02/2025") == "01/02/2025"
+
+
+def test_ttl_depends_on_the_window(monkeypatch):
+    monkeypatch.setattr(resultcache, "utc_today", lambda: datetime.date(2025, 3, 10))
+
+    assert ttl_for({"rics": ["VOD.L"]}) == config.result_cache_reference_ttl
+    assert ttl_for({"start_date": "2025-01-01", "end_date": "2025-03-09"}) == config.result_cache_historical_ttl
+    assert ttl_for({"start_date": "2025-01-01", "end_date": "2025-03-10"}) == config.result_cache_live_ttl
+    assert ttl_for({"start_date": "2025-01-01", "end_date": "next week"}) == config.result_cache_live_ttl
+
+
+def test_cache_and_vwap_store_share_the_utc_today():
+    assert vwapstore.utc_today is resultcache.utc_today
+    assert resultcache.utc_today() == datetime.datetime.now(datetime.timezone.utc).date()
+
+
+def test_entries_survive_memory_eviction_on_disk(tmp_path):
+    cache = ResultCache(max_entries=1, cache_dir=str(tmp_path))
+    cache.set("a", {"status": "success", "report": 1}, 60)
+    cache.set("b", {"status": "success", "report": 2}, 60)
+
+    assert cache.get("a") == {"status": "success", "report": 1}
+    assert cache.get_stats()["disk_hits"] == 1
+    assert cache.get("missing") is None
+
+
+def test_expired_entries_are_removed_on_read(tmp_path):
+    cache = ResultCache(cache_dir=str(tmp_path))
+    cache.set("a", {"status": "success"}, -1)
+
+    assert cache.get("a") is None
+    assert not list(tmp_path.glob("*.json.gz"))
+
+
+def test_sweep_removes_entries_past_the_longest_ttl_then_the_oldest(tmp_path, monkeypatch):
+    cache = ResultCache(cache_dir=str(tmp_path), max_disk_bytes=10 ** 9)
+    for name in ("old", "older", "new1", "new2", "new3"):
+        cache.set(name, {"status": "success", "report": "x" * 200}, 60)
+    max_ttl = max(config.result_cache_historical_ttl, config.result_cache_live_ttl, config.result_cache_reference_ttl)
+    now = time.time()
+    ages = {"older": max_ttl + 200, "old": max_ttl + 100, "new1": 30, "new2": 20, "new3": 10}
+    for name, age in ages.items():
+        os.utime(cache._path(name), (now - age, now - age))
+
+    cache.sweep()
+    assert not os.path.exists(cache._path("old"))
+    assert not os.path.exists(cache._path("older"))
+    assert all(os.path.exists(cache._path(name)) for name in ("new1", "new2", "new3"))
+
+    # over the size bound the oldest files go first
+    cache._max_disk_bytes = os.path.getsize(cache._path("new3")) * 2
+    cache.sweep()
+    assert not os.path.exists(cache._path("new1"))
+    assert os.path.exists(cache._path("new2")) and os.path.exists(cache._path("new3"))
+    assert cache.get_stats()["swept"] == 3
@@ -0,0 +1,88 @@
+import csv
+import datetime
+import io
+import json
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from investment_agent.lsegtools.resultencoding import (ENCODING_NOTES, ENCODINGS, describe_encoding,
+                                                       encode_arrow_batches, encode_frame, encode_records)
+
+RECORDS = [
+    {"RIC": "VOD.L", "date": datetime.date(2025, 1, 2), "VWAP": 0.712345, "Volume": 1000, "Sector": "Telecom"},
+    {"RIC": "VOD.L", "date": datetime.date(2025, 1, 3), "VWAP": 0.71, "Volume": None, "Sector": "Telecom"},
+    {"RIC": "BT.L", "date": datetime.date(2025, 1, 2), "VWAP": 1.5, "Volume": 2000, "Sector": "Telecom"},
+    {"RIC": "BT.L", "date": datetime.date(2025, 1, 3), "VWAP": float("nan"), "Volume": 3000, "Sector": None},
+]
+COLUMNS = ["RIC", "date", "VWAP", "Volume", "Sector"]
+# The records as an agent should read them back: rounded floats, ISO dates and nulls
+EXPECTED = [
+    {"RIC": "VOD.L", "date": "2025-01-02", "VWAP": 0.7123, "Volume": 1000, "Sector": "Telecom"},
+    {"RIC": "VOD.L", "date": "2025-01-03", "VWAP": 0.71, "Volume": None, "Sector": "Telecom"},
+    {"RIC": "BT.L", "date": "2025-01-02", "VWAP": 1.5, "Volume": 2000, "Sector": "Telecom"},
+    {"RIC": "BT.L", "date": "2025-01-03", "VWAP": None, "Volume": 3000, "Sector": None},
+]
+
+
+def decode_columns(report: str) -> list:
+    """Reads a "columns" report the way ENCODING_NOTES tells the agents to."""
+    payload = json.loads(report)
+    dictionaries = payload.get("dictionaries", {})
+    rows = []
+    for row in range(payload["rows"]):
+        record = {}
+        for name in payload["columns"]:
+            value = payload["data"][name][row]
+            if name in dictionaries and value is not None:
+                value = dictionaries[name][value]
+            record[name] = value
+        rows.append(record)
+    return rows
+
+
+def test_columns_encoding_round_trips_with_dictionaries():
+    encoded = encode_records(RECORDS, COLUMNS, encoding="columns")
+    payload = json.loads(encoded["report"])
+
+    assert decode_columns(encoded["report"]) == EXPECTED
+    # the repeated strings are dictionary-encoded, the unique ones are not
+    assert payload["dictionaries"] == {"RIC": ["BT.L", "VOD.L"], "Sector": ["Telecom"], "date": ["2025-01-02", "2025-01-03"]}
+    assert payload["data"]["RIC"] == [1, 1, 0, 0]
+    assert encoded["report_bytes"] == len(encoded["report"].encode("utf-8"))
+
+
+def test_short_or_varied_columns_are_not_dictionary_encoded():
+    encoded = encode_records(RECORDS[:3], ["RIC", "VWAP"], encoding="columns")
+
+    assert "dictionaries" not in json.loads(encoded["report"])
+    assert decode_columns(encoded["report"]) == [{"RIC": row["RIC"], "VWAP": row["VWAP"]} for row in EXPECTED[:3]]
+
+
+def test_frame_and_arrow_paths_encode_like_the_records():
+    expected = encode_records(RECORDS, COLUMNS, encoding="columns")["report"]
+    frame = pd.DataFrame(RECORDS, columns=COLUMNS)
+    frame["date"] = pd.to_datetime(frame["date"])
+    frame["Volume"] = frame["Volume"].astype("Int64")
+    batches = pa.Table.from_pylist(RECORDS).select(COLUMNS).to_batches(max_chunksize=3)
+
+    assert decode_columns(encode_frame(frame, encoding="columns")["report"]) == EXPECTED
+    assert encode_arrow_batches(batches, encoding="columns")["report"] == expected
+
+
+def test_csv_encoding_starts_with_the_column_names():
+    report = encode_records(RECORDS, COLUMNS, encoding="csv")["report"]
+    rows = list(csv.reader(io.StringIO(report)))
+
+    assert rows[0] == COLUMNS
+    assert rows[1] == ["VOD.L", "2025-01-02", "0.7123", "1000", "Telecom"]
+    assert len(rows) == len(RECORDS) + 1
+
+
+def test_every_encoding_has_a_note_for_the_agents():
+    assert set(ENCODING_NOTES) == set(ENCODINGS)
+    assert describe_encoding("columns") == ENCODING_NOTES["columns"]
+    assert "dictionaries" in ENCODING_NOTES["columns"] and "k-th entry" in ENCODING_NOTES["columns"]
+    with pytest.raises(ValueError):
+        describe_encoding("parquet")
@@ -0,0 +1,95 @@
+import json
+import threading
+import time
+
+import pytest
+
+from investment_agent.config import config
+from investment_agent.lsegtools import ricresolver
+from investment_agent.lsegtools.ricresolver import RicResolver
+
+
+class FakeExecutor:
+    """Answers the seed query with `records` after `delay` seconds, failing the first `failures` times."""
+
+    def __init__(self, records, columns=("ric", "compname"), delay=0.0, failures=0):
+        self.records = records
+        self.columns = list(columns)
+        self.delay = delay
+        self.failures = failures
+        self.queries = []
+
+    def get_table_columns(self, table_id):
+        return self.columns
+
+    def query_to_records(self, query, label="query"):
+        self.queries.append(query)
+        time.sleep(self.delay)
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("transient BigQuery error")
+        return [dict(record) for record in self.records]
+
+
+@pytest.fixture
+def resolver(tmp_path):
+    return RicResolver(cache_path=str(tmp_path / "rics.json"))
+
+
+def use_executor(monkeypatch, executor):
+    monkeypatch.setattr(ricresolver, "get_executor", lambda: executor)
+    return executor
+
+
+def test_concurrent_misses_wait_for_the_seed(resolver, monkeypatch):
+    executor = use_executor(monkeypatch, FakeExecutor([{"ric": "BARC.L", "compname": "Barclays PLC"}], delay=0.2))
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(resolver.resolve("Barclays"))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["BARC.L"] * 4
+    assert len(executor.queries) == 1
+
+
+def test_failed_seed_is_retried_after_the_backoff(resolver, monkeypatch):
+    executor = use_executor(monkeypatch, FakeExecutor([{"ric": "BARC.L", "compname": "Barclays PLC"}], failures=1))
+    monkeypatch.setattr(config, "ric_seed_retry_seconds", 60)
+
+    assert resolver.resolve("Barclays") is None
+    assert resolver.resolve("Barclays") is None
+    assert len(executor.queries) == 1
+
+    monkeypatch.setattr(config, "ric_seed_retry_seconds", 0)
+    assert resolver.resolve("Barclays") == "BARC.L"
+    assert len(executor.queries) == 2
+
+
+def test_seed_prefers_the_primary_ric(resolver, monkeypatch):
+    # rows arrive in the order of the ORDER BY, the first RIC read for a name wins
+    executor = use_executor(monkeypatch, FakeExecutor([
+        {"ric": "RR.L", "compname": "Rolls-Royce Holdings PLC", "isprimary": True},
+        {"ric": "RRa.L", "compname": "Rolls-Royce Holdings PLC", "isprimary": False},
+    ], columns=("ric", "compname", "isprimary")))
+
+    assert resolver.resolve("Rolls-Royce Holdings") == "RR.L"
+    assert "ORDER BY `isprimary` DESC, LENGTH(ric), ric" in executor.queries[0]
+
+
+def test_only_learned_names_are_persisted(resolver, monkeypatch, tmp_path):
+    use_executor(monkeypatch, FakeExecutor([{"ric": "BARC.L", "compname": "Barclays PLC"}]))
+    resolver.resolve("Barclays")
+
+    threads = [threading.Thread(target=resolver.learn, args=(f"Company {number}", f"C{number}.L")) for number in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with open(tmp_path / "rics.json", encoding="utf-8") as f:
+        learned = json.load(f)
+    assert learned == {f"company {number}": f"C{number}.L" for number in range(8)}
+    assert not list(tmp_path.glob("*.tmp"))
+    assert RicResolver(cache_path=str(tmp_path / "rics.json")).resolve("company 3") == "C3.L"
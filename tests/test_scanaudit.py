@@ -0,0 +1,39 @@
+import datetime
+
+import google.auth
+import pytest
+from google.auth.exceptions import DefaultCredentialsError
+
+from investment_agent.lsegtools.scanaudit import compare_vwap_scan_bytes
+from investment_agent.lsegtools.tickhistory import build_vwap_query
+
+
+def has_bigquery_credentials() -> bool:
+    try:
+        google.auth.default()
+    except DefaultCredentialsError:
+        return False
+    return True
+
+
+def test_vwap_query_filters_on_typed_half_open_bounds_inside_the_cte():
+    query = build_vwap_query(["VOD.L", "BT.L", "VOD.L"], datetime.date(2025, 1, 6), datetime.date(2025, 1, 10))
+
+    cte, outer = query.sql.split("\nSELECT CAST", 1)
+    assert "WHERE Date_Time >= @start_ts\nAND Date_Time < @end_ts\nAND RIC IN UNNEST(@rics)" in cte
+    assert "BETWEEN" not in query.sql
+    assert "RIC IN" not in outer
+    parameters = {parameter.name: parameter for parameter in query.parameters}
+    assert parameters["start_ts"].type_ == parameters["end_ts"].type_ == "TIMESTAMP"
+    assert parameters["start_ts"].value == datetime.datetime(2025, 1, 6, tzinfo=datetime.timezone.utc)
+    # the end bound is exclusive: midnight after the last day
+    assert parameters["end_ts"].value == datetime.datetime(2025, 1, 11, tzinfo=datetime.timezone.utc)
+    assert parameters["rics"].array_type == "STRING"
+    assert parameters["rics"].values == ["BT.L", "VOD.L"]
+
+
+@pytest.mark.skipif(not has_bigquery_credentials(), reason="needs BigQuery credentials with access to LSE_NORMALISED")
+def test_vwap_query_scans_less_than_the_legacy_query():
+    results = compare_vwap_scan_bytes(["VOD.L", "BT.L"], "2025-01-06", "2025-01-10")
+
+    assert results["pruned_bytes_processed"] < results["legacy_bytes_processed"], results
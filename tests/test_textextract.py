@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+from investment_agent.generaltools import textextract
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "filings")
+FIXTURES = sorted(name for name in os.listdir(FIXTURE_DIR) if name.endswith(".htm"))
+
+
+def read_fixture(name: str) -> bytes:
+    with open(os.path.join(FIXTURE_DIR, name), "rb") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("name", FIXTURES)
+def test_backends_extract_the_same_text(name):
+    content = read_fixture(name)
+    texts = {backend: textextract.extract_text(content, sections=[], extractor=backend)
+             for backend in textextract.available_extractors()}
+
+    assert len(set(texts.values())) == 1, texts.keys()
+    text = texts["bs4"]
+    assert "Example Devices, Inc." in text
+    # the hidden XBRL header, styles and scripts are dropped
+    assert "0000999999" not in text
+    assert "font-family" not in text
+    assert "ixviewer" not in text
+    assert "" not in text.splitlines()
+
+
+def test_selects_the_longest_match_of_each_section():
+    text = textextract.extract_text(read_fixture("10q_inline_xbrl.htm"), sections=["mdna", "risk_factors"])
+
+    # the table of contents lists both headings too, the sections themselves are kept
+    assert text.startswith("Item 2.")
+    assert "Liquidity and Capital Resources" in text
+    assert "Supply chain disruptions" in text
+    assert "no material changes to the company" not in text
+    assert "Legal Proceedings" not in text
+    assert "Net sales" not in text.split("Item 1A.")[1]
+
+
+def test_benchmark_runs_on_the_fixtures():
+    results = textextract.benchmark_extractors(FIXTURE_DIR, repeat=1)
+
+    assert set(results) == set(textextract.available_extractors())
+    assert {result["files"] for result in results.values()} == {len(FIXTURES)}
+    assert len({result["output_chars"] for result in results.values()}) == 1
@@ -0,0 +1,89 @@
+import datetime
+
+import pytest
+
+from investment_agent.lsegtools import vwapstore
+from investment_agent.lsegtools.vwapstore import DailyVWAPStore
+
+TODAY = datetime.date(2025, 3, 12)
+
+
+def day(number: int) -> datetime.date:
+    return datetime.date(2025, 3, number)
+
+
+def aggregate(ric: str, date: datetime.date, volume: float = 100, price: float = 2.0, trades: int = 4) -> dict:
+    return {"date_time": date.isoformat(), "RIC": ric, "SumVolumePrice": volume * price, "TotalVolume": volume,
+            "SumPrice": price * trades, "NumTrades": trades, "MaxAskPrice": price + 0.01, "MaxAskSize": 10,
+            "MaxBidPrice": price - 0.01, "MaxBidSize": 12}
+
+
+@pytest.fixture(autouse=True)
+def fixed_today(monkeypatch):
+    monkeypatch.setattr(vwapstore, "utc_today", lambda: TODAY)
+
+
+def test_everything_is_missing_in_an_empty_store():
+    assert DailyVWAPStore().missing_ranges(["VOD.L", "BT.L"], day(3), day(7)) == [(day(3), day(7), ["BT.L", "VOD.L"])]
+
+
+def test_held_days_are_not_queried_again_including_days_without_trades():
+    store = DailyVWAPStore()
+    # the 8th and 9th are a weekend without rows
+    store.add([aggregate("VOD.L", day(number)) for number in (3, 4, 5, 6, 7)], ["VOD.L"], day(3), day(9))
+
+    assert store.missing_ranges(["VOD.L"], day(3), day(9)) == []
+    assert store.missing_ranges(["VOD.L"], day(1), day(11)) == [(day(1), day(2), ["VOD.L"]), (day(10), day(11), ["VOD.L"])]
+
+
+def test_rics_sharing_a_missing_run_are_grouped():
+    store = DailyVWAPStore()
+    store.add([aggregate("VOD.L", day(5))], ["VOD.L"], day(5), day(5))
+
+    assert store.missing_ranges(["VOD.L", "BT.L"], day(4), day(6)) == [
+        (day(4), day(4), ["VOD.L"]),
+        (day(4), day(6), ["BT.L"]),
+        (day(6), day(6), ["VOD.L"]),
+    ]
+
+
+def test_today_is_never_held():
+    store = DailyVWAPStore()
+    store.add([aggregate("VOD.L", day(11)), aggregate("VOD.L", TODAY, volume=50)], ["VOD.L"], day(11), TODAY)
+
+    assert store.missing_ranges(["VOD.L"], day(11), TODAY) == [(TODAY, TODAY, ["VOD.L"])]
+    # the partial day is served until it is refetched, then replaced
+    assert [row["TotalVolume"] for row in store.rows(["VOD.L"], day(11), TODAY)] == [100, 50]
+    store.add([aggregate("VOD.L", TODAY, volume=80)], ["VOD.L"], TODAY, TODAY)
+    assert store.rows(["VOD.L"], TODAY, TODAY)[0]["TotalVolume"] == 80
+
+
+def test_rows_rederive_the_vwap_columns():
+    store = DailyVWAPStore()
+    store.add([aggregate("VOD.L", day(3), volume=200, price=1.2345, trades=5), aggregate("BT.L", day(3))],
+              ["VOD.L", "BT.L"], day(3), day(3))
+
+    rows = store.rows(["VOD.L", "BT.L"], day(3), day(3))
+    assert [row["RIC"] for row in rows] == ["VOD.L", "BT.L"]
+    assert rows[0] == {"date_time": "2025-03-03", "RIC": "VOD.L", "VWAP": 1.234, "TotalVolume": 200,
+                       "AvgPrice": pytest.approx(1.2345), "NumTrades": 5, "MaxAskPrice": pytest.approx(1.2445),
+                       "MaxAskSize": 10, "MaxBidPrice": pytest.approx(1.2245), "MaxBidSize": 12}
+    assert list(rows[0]) == vwapstore.VWAP_COLUMNS
+
+
+def test_days_without_volume_have_no_row():
+    store = DailyVWAPStore()
+    store.add([aggregate("VOD.L", day(3), volume=0)], ["VOD.L"], day(3), day(3))
+
+    assert store.rows(["VOD.L"], day(3), day(3)) == []
+
+
+def test_least_recently_used_rics_are_evicted():
+    store = DailyVWAPStore(max_rics=2)
+    for ric in ("VOD.L", "BT.L"):
+        store.add([aggregate(ric, day(3))], [ric], day(3), day(3))
+    store.rows(["VOD.L"], day(3), day(3))
+    store.add([aggregate("BARC.L", day(3))], ["BARC.L"], day(3), day(3))
+
+    assert store.missing_ranges(["VOD.L", "BT.L", "BARC.L"], day(3), day(3)) == [(day(3), day(3), ["BT.L"])]
+    assert store.rows(["BT.L"], day(3), day(3)) == []